@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from currencies.models import Currency, Provider
+from currencies.models import BackfillJob, Currency, Provider
 
 
 class ProviderAdmin(admin.ModelAdmin):
@@ -10,6 +10,15 @@ class ProviderAdmin(admin.ModelAdmin):
 admin.site.register(Provider, ProviderAdmin)
 
 
+class BackfillJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "from_date", "to_date", "pivot", "status", "total_chunks", "rows", "failures", "updated_at")
+    list_filter = ("status",)
+    readonly_fields = [field.name for field in BackfillJob._meta.fields]
+
+
+admin.site.register(BackfillJob, BackfillJobAdmin)
+
+
 class CurrencyAdmin(admin.ModelAdmin):
     list_display = ("code", "name")
 
@@ -0,0 +1,78 @@
+"""Compact representation of exchange rates: the dates, the to-currency codes and a rate matrix."""
+
+from collections.abc import Generator, Iterable, Sequence
+import csv
+from datetime import date
+from decimal import Decimal
+import io
+import json
+
+from currencies.exchange_rate_provider import ExchangeRateValues
+
+
+def group_rates_by_date(
+    currency_codes: Sequence[str], exchange_rate_values: Iterable[ExchangeRateValues]
+) -> Generator[tuple[date, list[Decimal | None]], None, None]:
+    """Yields the dates with their rates in the order of the currency codes from a date ordered sequence."""
+
+    index = {code: position for position, code in enumerate(currency_codes)}
+    last_date = None
+    rates = None
+
+    for _date, to_currency_code, rate in exchange_rate_values:
+        if _date != last_date:
+            if rates is not None:
+                yield last_date, rates
+
+            last_date = _date
+            rates = [None] * len(currency_codes)
+
+        rates[index[to_currency_code]] = rate
+
+    if rates is not None:
+        yield last_date, rates
+
+
+def stream_columnar_json(
+    from_currency_code: str, currency_codes: Sequence[str], exchange_rate_values: Iterable[ExchangeRateValues]
+) -> Generator[bytes, None, None]:
+    """Encodes a JSON object with the rate matrix streamed row by row, followed by the dates of the rows.
+
+    The rates are exact JSON numbers, missing rates are null.
+    """
+
+    header = {"from_currency": from_currency_code, "currencies": list(currency_codes)}
+    yield json.dumps(header, separators=(",", ":"))[:-1].encode() + b',"rates":['
+
+    dates = []
+
+    for _date, rates in group_rates_by_date(currency_codes, exchange_rate_values):
+        row = ",".join("null" if rate is None else str(rate) for rate in rates)
+        yield (b"," if dates else b"") + f"[{row}]".encode()
+
+        dates.append(_date.isoformat())
+
+    yield b'],"dates":' + json.dumps(dates, separators=(",", ":")).encode() + b"}"
+
+
+def stream_columnar_csv(
+    currency_codes: Sequence[str], exchange_rate_values: Iterable[ExchangeRateValues]
+) -> Generator[bytes, None, None]:
+    """Encodes CSV rows of the dates and their rates with a header of the currency codes, missing rates are empty."""
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    def flush() -> bytes:
+        content = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+        return content
+
+    writer.writerow(["date", *currency_codes])
+    yield flush()
+
+    for _date, rates in group_rates_by_date(currency_codes, exchange_rate_values):
+        writer.writerow([_date.isoformat(), *("" if rate is None else rate for rate in rates)])
+        yield flush()
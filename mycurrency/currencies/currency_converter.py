@@ -1,9 +1,16 @@
+from collections.abc import Iterable
+from datetime import date
 from decimal import Decimal
 
 from django.conf import settings
 
-from currencies.exchange_rate_provider import provide_latest_exchange_rate
+from currencies.exchange_rate_cache import latest_exchange_rate_cache
+from currencies.exchange_rate_provider import provide_historical_exchange_rate, provide_latest_exchange_rate
+from currencies.latest_rate_refresher import read_latest_exchange_rate
 from currencies.models import Currency
+from currencies.rate_store import current_rate_snapshot
+
+Conversion = tuple[Decimal, str, str, date | None]  # amount, from-currency code, to-currency code, date or latest
 
 
 class CurrencyConverterError(Exception):
@@ -19,7 +26,38 @@ def convert_with_latest_exchange_rate(
     from_currency_code: str,
     to_currency_code: str,
 ) -> tuple[Decimal, Decimal]:
-    """Returns the converted amount and the exchange rate used for the conversion."""
+    """Returns the converted amount and the exchange rate used for the conversion.
+
+    With `LATEST_EXCHANGE_RATE_MAX_STALENESS`, the rates from the hot base currencies are only read from the database.
+    """
+
+    if rate := latest_exchange_rate_cache.get(from_currency_code, to_currency_code, date.today()):
+        return _convert(amount, rate), rate
+
+    try:
+        from_currency = Currency.objects.get(code=from_currency_code)
+        to_currency = Currency.objects.get(code=to_currency_code)
+
+    except Currency.DoesNotExist:
+        raise CurrencyConverterError("Invalid currency.")
+
+    else:
+        rate = _latest_exchange_rate(from_currency, to_currency)
+
+        return _convert(amount, rate), rate
+
+
+def convert_with_historical_exchange_rate(
+    amount: Decimal,
+    from_currency_code: str,
+    to_currency_code: str,
+    query_date: date,
+) -> tuple[Decimal, Decimal, date]:
+    """Returns the converted amount, the exchange rate and its date used for the conversion at a date.
+
+    The nearest stored rate on or before the date is used, a provider is only asked when none is stored
+    within `HISTORICAL_EXCHANGE_RATE_MAX_LOOKBACK`.
+    """
 
     try:
         from_currency = Currency.objects.get(code=from_currency_code)
@@ -29,11 +67,85 @@ def convert_with_latest_exchange_rate(
         raise CurrencyConverterError("Invalid currency.")
 
     else:
-        if exchange_rate := provide_latest_exchange_rate(from_currency, to_currency):
-            return _convert(amount, exchange_rate.rate), exchange_rate.rate
+        rate, rate_date = _historical_exchange_rate(from_currency, to_currency, query_date)
+
+        return _convert(amount, rate), rate, rate_date
+
+
+def convert_batch(
+    conversions: Iterable[Conversion],
+) -> list[tuple[Decimal, Decimal, date] | CurrencyConverterError]:
+    """Returns the converted amounts, the exchange rates and their dates, or the errors, in the order of the conversions.
 
+    The currencies are looked up in one query and the exchange rate of each distinct currency pair and date
+    is resolved once, the ones at a date as by `convert_with_historical_exchange_rate`.
+    """
+
+    conversions = list(conversions)
+    currencies = Currency.objects.in_bulk(
+        {code for _, from_code, to_code, _ in conversions for code in (from_code, to_code)}, field_name="code"
+    )
+    rates: dict[tuple[str, str, date | None], tuple[Decimal, date] | CurrencyConverterError] = {}
+
+    for key in dict.fromkeys((from_code, to_code, _date) for _, from_code, to_code, _date in conversions):
+        try:
+            rates[key] = _exchange_rate(currencies, *key)
+
+        except CurrencyConverterError as exc:
+            rates[key] = exc
+
+    results = []
+
+    for amount, from_code, to_code, _date in conversions:
+        if isinstance(rate := rates[from_code, to_code, _date], CurrencyConverterError):
+            results.append(rate)
         else:
-            raise CurrencyExchangeRateNotAvailableError("Exchange rate is not available.")
+            results.append((_convert(amount, rate[0]), *rate))
+
+    return results
+
+
+def _exchange_rate(
+    currencies: dict[str, Currency], from_currency_code: str, to_currency_code: str, query_date: date | None
+) -> tuple[Decimal, date]:
+    if from_currency_code not in currencies or to_currency_code not in currencies:
+        raise CurrencyConverterError("Invalid currency.")
+
+    if query_date is not None:
+        return _historical_exchange_rate(currencies[from_currency_code], currencies[to_currency_code], query_date)
+
+    if rate := latest_exchange_rate_cache.get(from_currency_code, to_currency_code, date.today()):
+        return rate, date.today()
+
+    return _latest_exchange_rate(currencies[from_currency_code], currencies[to_currency_code]), date.today()
+
+
+def _historical_exchange_rate(from_currency: Currency, to_currency: Currency, query_date: date) -> tuple[Decimal, date]:
+    if (snapshot := current_rate_snapshot()) and (
+        found := snapshot.find_on_or_before(
+            from_currency.code, to_currency.code, query_date, settings.HISTORICAL_EXCHANGE_RATE_MAX_LOOKBACK
+        )
+    ):
+        return found
+
+    if exchange_rate := provide_historical_exchange_rate(from_currency, to_currency, query_date):
+        return exchange_rate.rate, exchange_rate.date
+
+    raise CurrencyExchangeRateNotAvailableError("Exchange rate is not available.")
+
+
+def _latest_exchange_rate(from_currency: Currency, to_currency: Currency) -> Decimal:
+    if settings.LATEST_EXCHANGE_RATE_MAX_STALENESS is not None and from_currency.code in settings.HOT_BASE_CURRENCIES:
+        exchange_rate = read_latest_exchange_rate(from_currency, to_currency)
+    else:
+        exchange_rate = provide_latest_exchange_rate(from_currency, to_currency)
+
+    if not exchange_rate:
+        raise CurrencyExchangeRateNotAvailableError("Exchange rate is not available.")
+
+    latest_exchange_rate_cache.set(from_currency.code, to_currency.code, exchange_rate.date, exchange_rate.rate)
+
+    return exchange_rate.rate
 
 
 def _convert(amount: Decimal, rate: Decimal) -> Decimal:
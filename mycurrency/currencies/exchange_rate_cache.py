@@ -0,0 +1,62 @@
+from datetime import date
+from decimal import Decimal
+import threading
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+
+
+class LatestExchangeRateCache:
+    """Caches the latest exchange rates by currency codes and date, counting the hits and misses.
+
+    The time-to-live and the bounded LRU eviction are configured in the `CACHES` entry
+    selected by the `LATEST_EXCHANGE_RATE_CACHE` setting.
+    """
+
+    KEY_PREFIX = "latest_exchange_rate"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self) -> BaseCache | None:
+        alias = settings.LATEST_EXCHANGE_RATE_CACHE
+
+        return caches[alias] if alias else None
+
+    def _key(self, from_currency_code: str, to_currency_code: str, date: date) -> str:
+        return f"{self.KEY_PREFIX}:{from_currency_code}:{to_currency_code}:{date.isoformat()}"
+
+    def get(self, from_currency_code: str, to_currency_code: str, date: date) -> Decimal | None:
+        if (cache := self.cache) is None:
+            return None
+
+        rate = cache.get(self._key(from_currency_code, to_currency_code, date))
+
+        with self._lock:
+            if rate is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return rate
+
+    def set(self, from_currency_code: str, to_currency_code: str, date: date, rate: Decimal) -> None:
+        if (cache := self.cache) is not None:
+            cache.set(self._key(from_currency_code, to_currency_code, date), rate)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        if (cache := self.cache) is not None:
+            cache.clear()
+
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+latest_exchange_rate_cache = LatestExchangeRateCache()
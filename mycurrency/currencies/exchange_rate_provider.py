@@ -1,156 +1,671 @@
-from collections.abc import Generator, Sequence
+from collections import defaultdict, deque
+from collections.abc import Generator, Iterable, Sequence
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import date, timedelta
 from decimal import Decimal
 from importlib import import_module, reload
 import logging
+import threading
+import time
 
 from django.conf import settings
-from django.db import transaction
+from django.db.models import Count
 
+from currencies.exchange_rate_writer import ExchangeRateWriter, upsert_exchange_rates
+from currencies.http_session import get_http_session
 from currencies.models import Currency, CurrencyExchangeRate, Provider
+from currencies.provider_health import provider_health
+from currencies.rate_limiter import RateLimiter
+from currencies.single_flight import SingleFlight, advisory_lock
+from currencies.unavailable_exchange_rates import UnavailableExchangeRates, find_unavailable_exchange_rates
 
 TIME_RESOLUTION = timedelta(days=1)
+ITERATOR_CHUNK_SIZE = 2000  # rows fetched at once when streaming the stored exchange rates
 logger = logging.getLogger(__file__)
+hedging_executor = ThreadPoolExecutor(thread_name_prefix="provider-hedging")  # shared by the hedged fetches
+
+
+class HedgingRace:
+    """Lets the calls of a hedged fetch record their outcomes only until the fetch is decided.
+
+    The calls losing the race keep running, but they leave no trace in the health of the providers
+    or in the unavailable exchange rates, which may already be saved by then.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._decided = False
+
+    def record(self, record, *args, **kwargs) -> None:
+        with self._lock:
+            if not self._decided:
+                record(*args, **kwargs)
+
+    def decide(self) -> None:
+        with self._lock:
+            self._decided = True
+
+
+def _record(race: HedgingRace | None, record, *args, **kwargs) -> None:
+    if race is None:
+        record(*args, **kwargs)
+    else:
+        race.record(record, *args, **kwargs)
 
 
 class ProviderHandler:
-    """Fetches a currency exchange rate from the highest priority available provider."""
+    """Fetches a currency exchange rate from the highest priority available provider.
+
+    The plugins get the pooled HTTP session of the process in their `session` attribute.
+    The providers whose circuit is tripped by too many errors are skipped until their cool-down elapses.
+    """
 
     def __init__(self):
-        self.providers = {
-            provider.name: self._import_provider(provider.name).Provider()
-            for provider in Provider.objects.filter(active=True).order_by("priority")
+        providers = Provider.objects.filter(active=True).order_by("priority")
+        self.providers = {provider.name: self._import_provider(provider.name).Provider() for provider in providers}
+        self.provider_ids = {provider.name: provider.pk for provider in providers}
+        self.priorities = {provider.name: provider.priority for provider in providers}
+
+        for provider in self.providers.values():
+            provider.session = get_http_session()
+
+        self.rate_limiters = {
+            name: RateLimiter(calls_per_second)
+            for name, calls_per_second in settings.PROVIDER_RATE_LIMITS.items()
+            if name in self.providers
         }
 
     @staticmethod
     def _import_provider(name):
         return reload(import_module(f"{settings.PROVIDERS_PKG}.{name}"))
 
-    def __call__(self, from_currency, to_currency, date) -> CurrencyExchangeRate | None:
-        for name, provider in self.providers.items():
+    def _throttle(self, name: str) -> None:
+        if rate_limiter := self.rate_limiters.get(name):
+            rate_limiter.acquire()
+
+    def _available_providers(self) -> list[tuple[str, object]]:
+        """Returns the providers with a closed or half-open circuit in priority order.
+
+        With `PROVIDER_ORDER_BY_LATENCY` the providers of the same priority are ordered by their median latency.
+        """
+
+        providers = [
+            (name, provider) for name, provider in self.providers.items() if provider_health[name].is_available()
+        ]
+
+        if settings.PROVIDER_ORDER_BY_LATENCY:
+            providers.sort(
+                key=lambda item: (self.priorities[item[0]], provider_health[item[0]].latency_percentile(50) or 0)
+            )
+
+        return providers
+
+    def _call(self, name: str, method, *args, race: HedgingRace | None = None):
+        """Calls a plugin method, recording its outcome and latency in the health of the provider."""
+
+        self._throttle(name)
+        health = provider_health[name]
+        start = health.clock()
+
+        try:
+            result = method(*args)
+        except Exception:
+            _record(race, health.record, health.clock() - start, failed=True, started=start)
+            raise
+
+        _record(race, health.record, health.clock() - start, started=start)
+
+        return result
+
+    def track_unavailable(self) -> UnavailableExchangeRates:
+        """Creates a tracker of the exchange rates the providers of the handler could not provide."""
+
+        return UnavailableExchangeRates(self.provider_ids)
+
+    def __call__(
+        self, from_currency, to_currency, date, unavailable: UnavailableExchangeRates | None = None
+    ) -> CurrencyExchangeRate | None:
+        for name, provider in self._providers_to_ask(from_currency, to_currency, date, unavailable):
+            if exchange_rate := self._fetch_exchange_rate(
+                name, provider, from_currency, to_currency, date, unavailable
+            ):
+                return exchange_rate
+
+    def hedged(
+        self, from_currency, to_currency, date, unavailable: UnavailableExchangeRates | None = None
+    ) -> CurrencyExchangeRate | None:
+        """Fetches an exchange rate like calling the handler, but asks the next provider in parallel as well
+        when the previous one has not answered within the hedging delay.
+
+        The first valid answer wins, the highest priority one among those arriving together.
+        """
+
+        providers = self._providers_to_ask(from_currency, to_currency, date, unavailable)
+        race = HedgingRace()
+        futures = []
+        hedge_at = None
+
+        def ask_next_provider():
+            nonlocal hedge_at
+            name, provider = providers[len(futures)]
+            futures.append(
+                hedging_executor.submit(
+                    self._fetch_exchange_rate, name, provider, from_currency, to_currency, date, unavailable, race
+                )
+            )
+            hedge_at = time.monotonic() + self._hedging_delay(name)
+
+        try:
+            while len(futures) < len(providers) or not all(future.done() for future in futures):
+                if not futures or all(future.done() for future in futures):
+                    ask_next_provider()
+
+                timeout = max(hedge_at - time.monotonic(), 0) if len(futures) < len(providers) else None
+                done, _ = wait([future for future in futures if not future.done()], timeout, FIRST_COMPLETED)
+
+                for future in futures:
+                    if future.done() and (exchange_rate := future.result()):
+                        return exchange_rate
+
+                if not done and len(futures) < len(providers):
+                    ask_next_provider()
+        finally:
+            race.decide()
+
+            for future in futures:
+                future.cancel()
+
+    def _providers_to_ask(self, from_currency, to_currency, date, unavailable) -> list[tuple[str, object]]:
+        return [
+            (name, provider)
+            for name, provider in self._available_providers()
+            if unavailable is None or (name, from_currency.code, to_currency.code, date) not in unavailable
+        ]
+
+    def _fetch_exchange_rate(
+        self, name, provider, from_currency, to_currency, date, unavailable, race: HedgingRace | None = None
+    ) -> CurrencyExchangeRate | None:
+        try:
+            rate = self._call(
+                name, provider.get_exchange_rate_data, from_currency.code, to_currency.code, date, race=race
+            )
+        except Exception:
+            logger.exception("Error getting exchange rate data from provider; name=%s", name)
+
+            if unavailable is not None:
+                _record(race, unavailable.record, name, from_currency, to_currency, date, failed=True)
+
+            return None
+
+        if rate:
+            return self._exchange_rate(from_currency, to_currency, date, rate)
+
+        if unavailable is not None:
+            _record(race, unavailable.record, name, from_currency, to_currency, date)
+
+    @staticmethod
+    def _hedging_delay(name: str) -> float:
+        """Returns the configured percentile of the observed latency of the provider, or the fixed delay."""
+
+        if settings.PROVIDER_HEDGING_PERCENTILE is not None:
+            latency = provider_health[name].latency_percentile(settings.PROVIDER_HEDGING_PERCENTILE)
+
+            if latency is not None:
+                return latency
+
+        return settings.PROVIDER_HEDGING_DELAY
+
+    def get_exchange_rates(
+        self,
+        from_currency: Currency,
+        to_currencies: Sequence[Currency],
+        date,
+        unavailable: UnavailableExchangeRates | None = None,
+        *,
+        rounded: bool = True,
+    ) -> list[CurrencyExchangeRate]:
+        """Fetches the exchange rates to several currencies in the order of the currency codes.
+
+        The rates missing from a provider are requested from the next one.
+        The rates known to be unavailable from a provider are not requested from it, the new ones are recorded.
+        Without `rounded` the rates are kept as precise as the provider returned them, e.g. to derive other rates.
+        """
+
+        missing_currencies = {to_currency.code: to_currency for to_currency in to_currencies}
+        exchange_rates = []
+
+        for name, provider in self._available_providers():
+            to_currency_codes = [
+                code
+                for code in missing_currencies
+                if unavailable is None or (name, from_currency.code, code, date) not in unavailable
+            ]
+
+            if not to_currency_codes:
+                continue
+
+            rates, failed_codes = self._get_exchange_rates_data(
+                name, provider, from_currency.code, to_currency_codes, date
+            )
+
+            for code in to_currency_codes:
+                if rate := rates.get(code):
+                    exchange_rates.append(
+                        self._exchange_rate(from_currency, missing_currencies.pop(code), date, rate, rounded=rounded)
+                    )
+                elif unavailable is not None:
+                    unavailable.record(name, from_currency, missing_currencies[code], date, failed=code in failed_codes)
+
+        return sorted(exchange_rates, key=lambda item: item.to_currency.code)
+
+    def get_cross_exchange_rates(
+        self,
+        pivot_currency: Currency,
+        from_currency: Currency,
+        to_currencies: Sequence[Currency],
+        date,
+        unavailable: UnavailableExchangeRates | None = None,
+    ) -> list[CurrencyExchangeRate]:
+        """Fetches only the rates from the pivot currency and derives the rates from the base currency.
+
+        The rates are derived from the precise rates of the provider, only the derived ones are rounded.
+        """
+
+        if from_currency.code == pivot_currency.code:
+            return self.get_exchange_rates(from_currency, to_currencies, date, unavailable)
+
+        pivot_rates = self.get_exchange_rates(
+            pivot_currency,
+            [from_currency] + [currency for currency in to_currencies if currency.code != pivot_currency.code],
+            date,
+            unavailable,
+            rounded=False,
+        )
+
+        return derive_exchange_rates(pivot_currency, pivot_rates, from_currency, to_currencies)
+
+    def _get_exchange_rates_data(
+        self, name, provider, from_currency_code: str, to_currency_codes: list[str], date
+    ) -> tuple[dict, set[str]]:
+        """Returns the rates and the codes the provider failed for.
+
+        Uses the batch method of the plugin if it is implemented, otherwise requests the currency pairs one by one.
+        """
+
+        if hasattr(provider, "get_exchange_rates_data"):
             try:
-                rate = provider.get_exchange_rate_data(from_currency.code, to_currency.code, date)
+                rates = self._call(name, provider.get_exchange_rates_data, from_currency_code, to_currency_codes, date)
+                return rates or {}, set()
             except Exception:
-                logger.exception("Error getting exchange rate data from provider; name=%s", name)
-                continue
+                logger.exception("Error getting exchange rates data from provider; name=%s", name)
+                return {}, set(to_currency_codes)
+
+        rates = {}
+        failed_codes = set()
 
-            if rate:
-                return CurrencyExchangeRate(
-                    date=date,
-                    from_currency=from_currency,
-                    to_currency=to_currency,
-                    rate=round(Decimal(str(rate)), settings.CURRENCY_EXCHANGE_RATE_PRECISION),
+        for to_currency_code in to_currency_codes:
+            try:
+                rates[to_currency_code] = self._call(
+                    name, provider.get_exchange_rate_data, from_currency_code, to_currency_code, date
                 )
+            except Exception:
+                logger.exception("Error getting exchange rate data from provider; name=%s", name)
+                failed_codes.add(to_currency_code)
+
+        return rates, failed_codes
+
+    @staticmethod
+    def _exchange_rate(from_currency, to_currency, date, rate, rounded: bool = True) -> CurrencyExchangeRate:
+        rate = Decimal(str(rate))
+
+        return CurrencyExchangeRate(
+            date=date,
+            from_currency=from_currency,
+            to_currency=to_currency,
+            rate=round(rate, settings.CURRENCY_EXCHANGE_RATE_PRECISION) if rounded else rate,
+        )
+
+
+def derive_exchange_rates(
+    pivot_currency: Currency,
+    pivot_rates: Iterable[CurrencyExchangeRate],
+    from_currency: Currency,
+    to_currencies: Iterable[Currency],
+) -> list[CurrencyExchangeRate]:
+    """Computes the rates of a base currency from the rates of the pivot currency of the same date.
+
+    The pivot rates are best given unrounded, so that the rounding errors do not compound in the derived rates.
+    The rates from the pivot currency are returned rounded, all the others are marked as derived.
+    """
+
+    rates = {exchange_rate.to_currency.code: exchange_rate for exchange_rate in pivot_rates}
+    to_currencies = sorted(to_currencies, key=lambda item: item.code)
+
+    if from_currency.code == pivot_currency.code:
+        return [
+            CurrencyExchangeRate(
+                date=rates[to_currency.code].date,
+                from_currency=from_currency,
+                to_currency=to_currency,
+                rate=round(rates[to_currency.code].rate, settings.CURRENCY_EXCHANGE_RATE_PRECISION),
+            )
+            for to_currency in to_currencies
+            if to_currency.code in rates
+        ]
+
+    if (from_rate := rates.get(from_currency.code)) is None:
+        return []
+
+    exchange_rates = []
+
+    for to_currency in to_currencies:
+        if to_currency.code == pivot_currency.code:
+            rate = 1 / from_rate.rate
+        elif to_rate := rates.get(to_currency.code):
+            rate = to_rate.rate / from_rate.rate
+        else:
+            continue
+
+        exchange_rates.append(
+            CurrencyExchangeRate(
+                date=from_rate.date,
+                from_currency=from_currency,
+                to_currency=to_currency,
+                rate=round(rate, settings.CURRENCY_EXCHANGE_RATE_PRECISION),
+                derived=True,
+            )
+        )
+
+    return exchange_rates
+
+
+class ProviderHandlerRegistry:
+    """Keeps a process-wide provider handler, rebuilding it only when the provider configuration changes.
+
+    The changes saved by the process invalidate the handler at once. The configuration is compared with the one
+    the handler is built from every `PROVIDER_CONFIGURATION_CHECK_INTERVAL` seconds, so the changes made by
+    other processes or by queryset updates are picked up as well.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._provider_handler = None
+        self._configuration = None
+        self._checked_at = 0.0
+
+    def __call__(self) -> ProviderHandler:
+        with self._lock:
+            if self._provider_handler is None or self._is_changed():
+                self._configuration = self._read_configuration()
+                self._checked_at = time.monotonic()
+                self._provider_handler = ProviderHandler()
+
+            return self._provider_handler
+
+    def _is_changed(self) -> bool:
+        if time.monotonic() - self._checked_at < settings.PROVIDER_CONFIGURATION_CHECK_INTERVAL:
+            return False
+
+        self._checked_at = time.monotonic()
+
+        return self._read_configuration() != self._configuration
+
+    @staticmethod
+    def _read_configuration() -> list[tuple]:
+        return list(Provider.objects.order_by("pk").values_list("pk", "name", "priority", "active"))
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._provider_handler = None
+
+
+get_provider_handler = ProviderHandlerRegistry()
 
 
 class ExchangeRateLoader:
-    """Yields currency exchange rates fetched from a provider and store them efficiently on-the-fly."""
+    """Yields currency exchange rates fetched from a provider and store them efficiently on-the-fly.
 
-    MAX_BULK_SIZE = 1000
+    The rates are upserted in batches, so a concurrent writer of the same rates does not make it fail.
+    The dates are fetched concurrently by at most `EXCHANGE_RATE_LOADER_CONCURRENCY` threads,
+    the rates are still yielded in date order.
+    """
 
     def __init__(self):
-        self.exchange_rates = []
-        self.provider_handler = ProviderHandler()
+        self.write_exchange_rate = ExchangeRateWriter()
+        self.provider_handler = get_provider_handler()
+        self.unavailable = self.provider_handler.track_unavailable()
+        self.pivot_currency = (
+            Currency.objects.filter(code=settings.CURRENCY_EXCHANGE_RATE_PIVOT).first()
+            if settings.CURRENCY_EXCHANGE_RATE_PIVOT
+            else None
+        )
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self._bulk_create()
+        self.write_exchange_rate.flush()
+        self.unavailable.save()
 
         return False
 
-    def _bulk_create(self) -> None:
-        CurrencyExchangeRate.objects.bulk_create(self.exchange_rates)
-        self.exchange_rates.clear()
-
     def __call__(
         self, from_currency: Currency, from_date: date, to_date: date, to_currencies: Sequence[Currency]
     ) -> Generator[CurrencyExchangeRate, None, None]:
         to_currencies = sorted(to_currencies, key=lambda item: item.code)
 
-        while from_date <= to_date:
-            for to_currency in to_currencies:
-                if exchange_rate := self.provider_handler(from_currency, to_currency, from_date):
-                    self._append(exchange_rate)
+        for base_currency in {from_currency, self.pivot_currency or from_currency}:
+            self.unavailable.load(base_currency, from_date, to_date)
+
+        for exchange_rates in self._fetch_in_date_order(from_currency, from_date, to_date, to_currencies):
+            for exchange_rate in exchange_rates:
+                self.write_exchange_rate(exchange_rate)
+
+                yield exchange_rate
+
+    def _fetch_in_date_order(
+        self, from_currency: Currency, from_date: date, to_date: date, to_currencies: Sequence[Currency]
+    ) -> Generator[list[CurrencyExchangeRate], None, None]:
+        """Keeps a bounded window of dates in flight and yields their results in date order."""
+
+        with ThreadPoolExecutor(max_workers=settings.EXCHANGE_RATE_LOADER_CONCURRENCY) as executor:
+            in_flight = deque()
+
+            while from_date <= to_date:
+                in_flight.append(executor.submit(self._get_exchange_rates, from_currency, to_currencies, from_date))
+                from_date += TIME_RESOLUTION
+
+                if len(in_flight) >= settings.EXCHANGE_RATE_LOADER_CONCURRENCY:
+                    yield in_flight.popleft().result()
+
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def _get_exchange_rates(self, from_currency: Currency, to_currencies: Sequence[Currency], date: date):
+        if self.pivot_currency:
+            return self.provider_handler.get_cross_exchange_rates(
+                self.pivot_currency, from_currency, to_currencies, date, self.unavailable
+            )
+
+        return self.provider_handler.get_exchange_rates(from_currency, to_currencies, date, self.unavailable)
+
+
+ExchangeRateValues = tuple[date, str, Decimal]  # date, code of the to-currency, rate
+ExchangeRateGap = tuple[date, date, set[Currency]]  # first date, last date, missing to-currencies
+
+
+def find_missing_exchange_rates(from_currency: Currency, from_date: date, to_date: date) -> list[ExchangeRateGap]:
+    """Returns the date ranges of the missing exchange rates with their missing to-currencies in date order.
+
+    The stored rates are counted per date in the database and only the incomplete dates are fetched row by row.
+    The exchange rates known to be unavailable from every active provider are not reported as missing.
+    """
+
+    all_to_currencies = {currency.pk: currency for currency in Currency.objects.exclude(pk=from_currency.pk)}
+    stored_exchange_rates = CurrencyExchangeRate.objects.filter(
+        date__range=(from_date, to_date), from_currency=from_currency, to_currency__in=all_to_currencies
+    )
+    counts_by_date = stored_exchange_rates.values("date").annotate(count=Count("pk")).order_by()
+    incomplete_dates = counts_by_date.filter(count__lt=len(all_to_currencies)).values("date")
+
+    stored_dates = {item["date"] for item in counts_by_date}
+    stored_to_currencies = defaultdict(set)
+
+    for _date, to_currency_id in stored_exchange_rates.filter(date__in=incomplete_dates).values_list(
+        "date", "to_currency_id"
+    ):
+        stored_to_currencies[_date].add(to_currency_id)
+
+    unavailable_to_currencies = find_unavailable_exchange_rates(from_currency, from_date, to_date)
+    gaps = []
+
+    while from_date <= to_date:
+        if from_date not in stored_dates:
+            missing = set(all_to_currencies.values())
+        elif from_date in stored_to_currencies:
+            missing = {
+                currency for pk, currency in all_to_currencies.items() if pk not in stored_to_currencies[from_date]
+            }
+        else:
+            missing = set()
 
-                    yield exchange_rate
+        missing -= {all_to_currencies[pk] for pk in unavailable_to_currencies[from_date] if pk in all_to_currencies}
 
-            from_date += TIME_RESOLUTION
+        if missing:
+            if gaps and gaps[-1][1] == from_date - TIME_RESOLUTION and gaps[-1][2] == missing:
+                gaps[-1] = (gaps[-1][0], from_date, missing)
+            else:
+                gaps.append((from_date, from_date, missing))
 
-    def _append(self, exchange_rate: CurrencyExchangeRate) -> None:
-        self.exchange_rates.append(exchange_rate)
+        from_date += TIME_RESOLUTION
 
-        if len(self.exchange_rates) >= self.MAX_BULK_SIZE:
-            self._bulk_create()
+    return gaps
+
+
+def load_missing_exchange_rates(from_currency: Currency, from_date: date, to_date: date) -> None:
+    """Fetches and stores the exchange rates missing from the database."""
+
+    if gaps := find_missing_exchange_rates(from_currency, from_date, to_date):
+        with ExchangeRateLoader() as load_exchange_rates:
+            for first_date, last_date, to_currencies in gaps:
+                deque(load_exchange_rates(from_currency, first_date, last_date, to_currencies), maxlen=0)
 
 
-@transaction.atomic
 def provide_exchange_rates(
     from_currency: Currency, from_date: date, to_date: date
 ) -> Generator[CurrencyExchangeRate, None, None]:
-    """Yields currency exchange rates in date order from the database completing the missing ones from a provider."""
+    """Yields currency exchange rates in date order from the database completing the missing ones from a provider.
 
-    last_date = from_date - TIME_RESOLUTION
-    all_to_currencies = set(Currency.objects.exclude(pk=from_currency.pk))
-    to_currencies = set()
+    The providers are called outside of any transaction, the fetched rates are stored in short batched transactions.
+    """
 
-    with ExchangeRateLoader() as load_exchange_rates:
-        for exchange_rate in CurrencyExchangeRate.objects.filter(
-            date__range=(from_date, to_date),
-            from_currency=from_currency,
-        ).order_by("date"):
-            if exchange_rate.date != last_date and last_date >= from_date:  # load missing currencies of last date
-                if to_currencies != all_to_currencies:
-                    yield from load_exchange_rates(
-                        from_currency,
-                        last_date,
-                        last_date,
-                        all_to_currencies - to_currencies,
-                    )
+    load_missing_exchange_rates(from_currency, from_date, to_date)
 
-                to_currencies = set()
+    yield from (
+        CurrencyExchangeRate.objects.filter(date__range=(from_date, to_date), from_currency=from_currency)
+        .select_related("to_currency")
+        .order_by("date")
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
 
-            if exchange_rate.date - last_date > TIME_RESOLUTION:  # load the missing date gap
-                yield from load_exchange_rates(
-                    from_currency,
-                    last_date + TIME_RESOLUTION,
-                    exchange_rate.date - TIME_RESOLUTION,
-                    all_to_currencies,
-                )
 
-            yield exchange_rate
+def provide_exchange_rate_values(
+    from_currency: Currency, from_date: date, to_date: date
+) -> Generator[ExchangeRateValues, None, None]:
+    """Yields the same as `provide_exchange_rates` as plain values without instantiating the models."""
+
+    load_missing_exchange_rates(from_currency, from_date, to_date)
 
-            last_date = exchange_rate.date
-            to_currencies.add(exchange_rate.to_currency)
+    yield from (
+        CurrencyExchangeRate.objects.filter(date__range=(from_date, to_date), from_currency=from_currency)
+        .order_by("date")
+        .values_list("date", "to_currency__code", "rate")
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
 
-        if to_currencies and to_currencies != all_to_currencies:  # load missing currencies of the last available date
-            yield from load_exchange_rates(from_currency, last_date, last_date, all_to_currencies - to_currencies)
 
-        if last_date < to_date:  # load the missing dates in the end
-            yield from load_exchange_rates(from_currency, last_date + TIME_RESOLUTION, to_date, all_to_currencies)
+latest_exchange_rate_flight = SingleFlight()
 
 
 def provide_latest_exchange_rate(from_currency: Currency, to_currency: Currency) -> CurrencyExchangeRate | None:
+    """Fetches and stores the exchange rate of the day.
+
+    Only one fetch per currency pair and date is in flight in the process, the concurrent callers share its result.
+    With `LATEST_EXCHANGE_RATE_ADVISORY_LOCK` on PostgreSQL, the processes waiting for the fetch of another one
+    get the rate it stored.
+    """
+
     current_date = date.today()
+    key = (from_currency.code, to_currency.code, current_date)
 
-    exchange_rate = ProviderHandler()(from_currency, to_currency, current_date)
+    return latest_exchange_rate_flight(key, _provide_latest_exchange_rate, from_currency, to_currency, current_date)
 
-    try:
-        stored_exchange_rate = CurrencyExchangeRate.objects.get(
-            from_currency=from_currency,
-            to_currency=to_currency,
-            date=current_date,
-        )
-    except CurrencyExchangeRate.DoesNotExist:
-        if exchange_rate:
-            exchange_rate.save()
 
-        return exchange_rate
+def _provide_latest_exchange_rate(
+    from_currency: Currency, to_currency: Currency, current_date: date
+) -> CurrencyExchangeRate | None:
+    if not settings.LATEST_EXCHANGE_RATE_ADVISORY_LOCK:
+        return _fetch_exchange_rate(from_currency, to_currency, current_date)
 
-    else:
-        if exchange_rate and stored_exchange_rate.rate != exchange_rate.rate:
-            stored_exchange_rate.rate = exchange_rate.rate
-            stored_exchange_rate.save()
+    with advisory_lock(f"latest_exchange_rate:{from_currency.code}:{to_currency.code}:{current_date}") as contended:
+        if contended:
+            stored_exchange_rate = CurrencyExchangeRate.objects.filter(
+                from_currency=from_currency, to_currency=to_currency, date=current_date
+            ).first()
+
+            if stored_exchange_rate:
+                return stored_exchange_rate
+
+        return _fetch_exchange_rate(from_currency, to_currency, current_date)
+
+
+def find_exchange_rate_on_or_before(
+    from_currency: Currency, to_currency: Currency, query_date: date, max_lookback: timedelta | None
+) -> CurrencyExchangeRate | None:
+    """Returns the stored exchange rate of the latest date on or before the given one, within the maximum lookback.
+
+    The lookup is a range scan of the index of the unique currency pair and date constraint.
+    """
+
+    exchange_rates = CurrencyExchangeRate.objects.filter(
+        from_currency=from_currency, to_currency=to_currency, date__lte=query_date
+    )
+
+    if max_lookback is not None:
+        exchange_rates = exchange_rates.filter(date__gte=query_date - max_lookback)
+
+    return exchange_rates.order_by("-date").first()
+
+
+def provide_historical_exchange_rate(
+    from_currency: Currency, to_currency: Currency, query_date: date
+) -> CurrencyExchangeRate | None:
+    """Returns the nearest stored exchange rate on or before the date within `HISTORICAL_EXCHANGE_RATE_MAX_LOOKBACK`.
+
+    Only when none is stored, the rate of the date is fetched from a provider and stored.
+    """
+
+    return find_exchange_rate_on_or_before(
+        from_currency, to_currency, query_date, settings.HISTORICAL_EXCHANGE_RATE_MAX_LOOKBACK
+    ) or _fetch_exchange_rate(from_currency, to_currency, query_date)
+
+
+def _fetch_exchange_rate(
+    from_currency: Currency, to_currency: Currency, query_date: date
+) -> CurrencyExchangeRate | None:
+    provider_handler = get_provider_handler()
+    unavailable = provider_handler.track_unavailable()
+    unavailable.load(from_currency, query_date, query_date, to_currency)
+
+    fetch_exchange_rate = provider_handler if settings.PROVIDER_HEDGING_DELAY is None else provider_handler.hedged
+    exchange_rate = fetch_exchange_rate(from_currency, to_currency, query_date, unavailable)
+    unavailable.save()
+
+    if exchange_rate:
+        upsert_exchange_rates([exchange_rate])
+
+        return exchange_rate
 
-        return stored_exchange_rate
+    return CurrencyExchangeRate.objects.filter(
+        from_currency=from_currency, to_currency=to_currency, date=query_date
+    ).first()
@@ -0,0 +1,59 @@
+from collections.abc import Iterable
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+
+from currencies.models import CurrencyExchangeRate
+
+UNIQUE_FIELDS = ["from_currency", "to_currency", "date"]
+UPDATE_FIELDS = ["rate", "derived", "updated_at"]
+
+
+def upsert_exchange_rates(exchange_rates: Iterable[CurrencyExchangeRate], batch_size: int | None = None) -> None:
+    """Inserts the exchange rates, updating the ones already stored for the same currency pair and date.
+
+    Concurrent writers of the same rates do not conflict, the last one wins.
+    """
+
+    CurrencyExchangeRate.objects.bulk_create(
+        exchange_rates,
+        batch_size=batch_size or settings.EXCHANGE_RATE_WRITE_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=UNIQUE_FIELDS,
+        update_fields=UPDATE_FIELDS,
+    )
+
+
+class ExchangeRateWriter:
+    """Buffers exchange rates and upserts them in batches of `EXCHANGE_RATE_WRITE_BATCH_SIZE`, a transaction each.
+
+    A rate buffered again for the same currency pair and date replaces the previous one,
+    as a statement cannot update the same row twice.
+    """
+
+    def __init__(self, batch_size: int | None = None):
+        self.batch_size = batch_size or settings.EXCHANGE_RATE_WRITE_BATCH_SIZE
+        self.exchange_rates: dict[tuple[int, int, date], CurrencyExchangeRate] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+        return False
+
+    def __call__(self, exchange_rate: CurrencyExchangeRate) -> None:
+        key = (exchange_rate.from_currency_id, exchange_rate.to_currency_id, exchange_rate.date)
+        self.exchange_rates[key] = exchange_rate
+
+        if len(self.exchange_rates) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.exchange_rates:
+            with transaction.atomic():
+                upsert_exchange_rates(list(self.exchange_rates.values()), self.batch_size)
+
+            self.exchange_rates.clear()
@@ -0,0 +1,37 @@
+"""Worker side of loading historical exchange rates.
+
+The module is importable before Django is set up, so that spawned worker processes can unpickle its functions.
+Only dates, currency codes and plain (date, code, code, Decimal | None) tuples are exchanged with the workers.
+"""
+
+from datetime import date
+from decimal import Decimal
+import multiprocessing as mp
+import os
+
+import django
+
+ExchangeRateCell = tuple[date, str, str]  # date, from-currency code, to-currency code
+ExchangeRateResult = tuple[date, str, str, Decimal | None]  # date, from-currency code, to-currency code, rate
+
+
+def init_worker() -> None:
+    """Prepares a worker, setting up Django unless it is inherited from the parent process."""
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mycurrency.settings")
+    django.setup()
+
+    from currencies.exchange_rate_provider import ProviderHandler
+    from currencies.models import Currency
+
+    process = mp.current_process()
+    process.provider_handler = ProviderHandler()
+    process.currencies = Currency.objects.in_bulk(field_name="code")
+
+
+def fetch_exchange_rate_cell(cell: ExchangeRateCell) -> ExchangeRateResult:
+    process = mp.current_process()
+    _date, from_code, to_code = cell
+    exchange_rate = process.provider_handler(process.currencies[from_code], process.currencies[to_code], _date)
+
+    return (_date, from_code, to_code, exchange_rate and exchange_rate.rate)
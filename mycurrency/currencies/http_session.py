@@ -0,0 +1,66 @@
+import os
+import threading
+
+from django.conf import settings
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class ProviderSession(requests.Session):
+    """HTTP session of the provider plugins applying a default timeout to every request."""
+
+    def __init__(self, timeout: float):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+
+        return super().request(method, url, **kwargs)
+
+
+def create_session() -> ProviderSession:
+    """Creates a session with a connection pool and retries with exponential backoff."""
+
+    session = ProviderSession(settings.PROVIDER_HTTP_TIMEOUT)
+    adapter = HTTPAdapter(
+        pool_maxsize=settings.PROVIDER_HTTP_POOL_SIZE,
+        max_retries=Retry(
+            total=settings.PROVIDER_HTTP_RETRIES,
+            backoff_factor=settings.PROVIDER_HTTP_BACKOFF_FACTOR,
+            status_forcelist=(429, 500, 502, 503, 504),
+            raise_on_status=False,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+
+class SessionRegistry:
+    """Keeps one session per process, so the connections are reused across threads but never shared by forks."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+
+    def __call__(self) -> ProviderSession:
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                self._session = create_session()
+                self._pid = os.getpid()
+
+            return self._session
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None and self._pid == os.getpid():
+                self._session.close()
+
+            self._session = None
+
+
+get_http_session = SessionRegistry()
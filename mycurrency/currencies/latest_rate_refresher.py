@@ -0,0 +1,153 @@
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from datetime import date
+import itertools
+import logging
+import os
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Min
+from django.utils import timezone
+
+from currencies.exchange_rate_provider import get_provider_handler
+from currencies.exchange_rate_writer import upsert_exchange_rates
+from currencies.models import Currency, CurrencyExchangeRate
+from currencies.single_flight import try_advisory_lock
+
+logger = logging.getLogger(__file__)
+
+
+def refresh_latest_exchange_rates(base_currencies: Sequence[Currency]) -> int:
+    """Fetches today's rates of the base currencies to every other currency and upserts them.
+
+    Returns the number of the refreshed rates.
+    """
+
+    current_date = date.today()
+    currencies = list(Currency.objects.order_by("code"))
+    provider_handler = get_provider_handler()
+    unavailable = provider_handler.track_unavailable()
+    exchange_rates = []
+
+    for base_currency in base_currencies:
+        unavailable.load(base_currency, current_date, current_date)
+        exchange_rates += provider_handler.get_exchange_rates(
+            base_currency, [currency for currency in currencies if currency != base_currency], current_date, unavailable
+        )
+
+    unavailable.save()
+    upsert_exchange_rates(exchange_rates)
+
+    return len(exchange_rates)
+
+
+def latest_exchange_rate_refresh_lag(base_currency_codes: Sequence[str]) -> dict[str, float | None]:
+    """Returns the seconds since the least recently refreshed rate of today by base currency, None if it has none."""
+
+    now = timezone.now()
+    oldest_updates = dict(
+        CurrencyExchangeRate.objects.filter(date=date.today(), from_currency__code__in=base_currency_codes)
+        .values("from_currency__code")
+        .annotate(oldest_update=Min("updated_at"))
+        .order_by()
+        .values_list("from_currency__code", "oldest_update")
+    )
+
+    return {
+        code: (now - oldest_updates[code]).total_seconds() if code in oldest_updates else None
+        for code in base_currency_codes
+    }
+
+
+class LatestExchangeRateRefresher:
+    """Refreshes today's rates of the hot base currencies on a jittered interval.
+
+    A refresh is skipped while another refresher holds the lock: a PostgreSQL advisory lock,
+    or on other databases a lock in the `default` cache, which needs to be shared by the processes
+    to protect against overlapping refreshes between them.
+    """
+
+    LOCK_KEY = "latest_exchange_rate_refresh_lock"
+
+    def __init__(self, base_currency_codes: Sequence[str], interval: float, jitter: float):
+        self.base_currency_codes = base_currency_codes
+        self.interval = interval
+        self.jitter = jitter
+
+    def run(self, cycles: int | None = None) -> None:
+        """Refreshes the rates forever, or for the given number of cycles."""
+
+        scheduled_at = time.monotonic()
+
+        for cycle in itertools.count(1):
+            self.refresh_once(lag=time.monotonic() - scheduled_at)
+
+            if cycle == cycles:
+                break
+
+            scheduled_at += self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            time.sleep(max(scheduled_at - time.monotonic(), 0))
+
+    def refresh_once(self, lag: float = 0.0) -> int | None:
+        """Refreshes the rates unless another refresh is in progress, returning the number of the refreshed rates."""
+
+        with self._lock() as locked:
+            if not locked:
+                logger.warning("Skipping the refresh of the latest exchange rates in progress elsewhere")
+                return None
+
+            started = time.monotonic()
+            refreshed = refresh_latest_exchange_rates(
+                list(Currency.objects.filter(code__in=self.base_currency_codes).order_by("code"))
+            )
+            duration = time.monotonic() - started
+
+        logger.info(
+            "Refreshed latest exchange rates; count=%s, duration=%.3fs, schedule_lag=%.3fs, rate_lag=%s",
+            refreshed,
+            duration,
+            lag,
+            latest_exchange_rate_refresh_lag(self.base_currency_codes),
+        )
+
+        return refreshed
+
+    @contextmanager
+    def _lock(self) -> Iterator[bool]:
+        """Holds the lock of the refreshes if no other refresher holds it, yielding whether it is held.
+
+        The cache lock is released at the end, its timeout only frees the lock of a crashed refresher.
+        """
+
+        with try_advisory_lock(self.LOCK_KEY) as locked:
+            if locked is not None:
+                yield locked
+                return
+
+        lock = caches["default"]
+
+        if not lock.add(self.LOCK_KEY, os.getpid(), timeout=settings.LATEST_EXCHANGE_RATE_REFRESH_LOCK_TIMEOUT):
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            lock.delete(self.LOCK_KEY)
+
+
+def read_latest_exchange_rate(from_currency: Currency, to_currency: Currency) -> CurrencyExchangeRate | None:
+    """Returns today's stored rate if it is refreshed within `LATEST_EXCHANGE_RATE_MAX_STALENESS`, otherwise None.
+
+    Older dates are not considered, as their rates are also upserted by backfills and gap fills.
+    """
+
+    return CurrencyExchangeRate.objects.filter(
+        from_currency=from_currency,
+        to_currency=to_currency,
+        date=date.today(),
+        updated_at__gte=timezone.now() - settings.LATEST_EXCHANGE_RATE_MAX_STALENESS,
+    ).first()
@@ -0,0 +1,207 @@
+"""Conversion of large CSV ledgers of (date, currency, amount) rows into a reporting currency.
+
+Only the stored exchange rates are used, no provider is asked.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from collections.abc import Iterable
+import csv
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+import time
+from typing import TextIO
+
+from django.conf import settings
+
+from currencies.currency_converter import _convert
+from currencies.exchange_rate_provider import TIME_RESOLUTION
+from currencies.models import Currency, CurrencyExchangeRate
+
+INPUT_FIELDS = ["date", "currency", "amount"]
+OUTPUT_FIELDS = ["converted_amount", "rate", "rate_date", "error"]
+
+
+class LedgerConverterError(Exception):
+    pass
+
+
+class ExchangeRateIndex:
+    """In-memory index of the stored exchange rates to a currency by from-currency and date, loaded by slices.
+
+    A rate is found for the latest date on or before the given one within the maximum lookback.
+    The slice of a currency is extended by the dates a chunk of the ledger needs beyond it and trimmed of the dates
+    no longer needed, so the memory is bounded by the date range of a chunk for date ordered ledgers,
+    and every rate is loaded once. Without maximum lookback, the slices are only extended.
+    """
+
+    def __init__(self, to_currency: Currency, max_lookback: timedelta | None):
+        self.to_currency = to_currency
+        self.max_lookback = max_lookback
+        self.dates: dict[str, list[date]] = {}
+        self.rates: dict[str, list[Decimal]] = {}
+        self.loaded: dict[str, tuple[date, date]] = {}  # the date range loaded by from-currency code
+
+    def load(self, currency_codes: Iterable[str], from_date: date, to_date: date) -> None:
+        """Loads the rates of the currencies needed for the date range that are not loaded yet.
+
+        The missing dates of the currencies are loaded with one query per distinct date range.
+        """
+
+        from_date = date.min if self.max_lookback is None else from_date - self.max_lookback
+        codes_by_range: dict[tuple[date, date], list[str]] = defaultdict(list)
+
+        for code in currency_codes:
+            loaded_from, loaded_to = self.loaded.get(code, (None, None))
+
+            if (
+                loaded_from is None
+                or from_date - loaded_to > TIME_RESOLUTION
+                or loaded_from - to_date > TIME_RESOLUTION
+            ):
+                self.dates[code], self.rates[code] = [], []
+                codes_by_range[from_date, to_date].append(code)
+                self.loaded[code] = (from_date, to_date)
+                continue
+
+            if from_date < loaded_from:
+                codes_by_range[from_date, loaded_from - TIME_RESOLUTION].append(code)
+            elif from_date > loaded_from:
+                start = bisect_left(self.dates[code], from_date)
+                del self.dates[code][:start], self.rates[code][:start]
+
+            if to_date > loaded_to:
+                codes_by_range[loaded_to + TIME_RESOLUTION, to_date].append(code)
+
+            self.loaded[code] = (from_date, max(to_date, loaded_to))
+
+        for (first_date, last_date), codes in codes_by_range.items():
+            dates: dict[str, list[date]] = defaultdict(list)
+            rates: dict[str, list[Decimal]] = defaultdict(list)
+
+            for from_code, _date, rate in (
+                CurrencyExchangeRate.objects.filter(
+                    from_currency__code__in=codes, to_currency=self.to_currency, date__range=(first_date, last_date)
+                )
+                .order_by("from_currency__code", "date")
+                .values_list("from_currency__code", "date", "rate")
+                .iterator()
+            ):
+                dates[from_code].append(_date)
+                rates[from_code].append(rate)
+
+            for code in codes:
+                if self.dates[code] and first_date < self.dates[code][0]:
+                    self.dates[code][:0], self.rates[code][:0] = dates[code], rates[code]
+                else:
+                    self.dates[code] += dates[code]
+                    self.rates[code] += rates[code]
+
+    def find(self, currency_code: str, query_date: date) -> tuple[Decimal, date] | None:
+        dates = self.dates.get(currency_code, [])
+
+        if not (index := bisect_right(dates, query_date)):
+            return None
+
+        if self.max_lookback is not None and dates[index - 1] < query_date - self.max_lookback:
+            return None
+
+        return self.rates[currency_code][index - 1], dates[index - 1]
+
+
+class LedgerStats:
+    """Counts the converted and the failed rows of a ledger."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.rows = 0
+        self.failures = 0
+
+    def __str__(self) -> str:
+        duration = time.monotonic() - self.started
+
+        return (
+            f"Converted ledger rows: {self.rows} ({self.failures} failed) in {duration:.2f}s"
+            f" ({self.rows / duration:.1f} rows/s)"
+        )
+
+
+def convert_ledger(
+    input_file: TextIO, output_file: TextIO, to_currency_code: str, chunk_size: int | None = None
+) -> LedgerStats:
+    """Converts the amounts of a CSV ledger with `date`, `currency` and `amount` columns into a currency.
+
+    The ledger is read, converted and written in chunks, loading the stored rates needed by a chunk into
+    an in-memory index. The rows are written with the converted amount, the rate and its date,
+    or with an error instead.
+    """
+
+    try:
+        to_currency = Currency.objects.get(code=to_currency_code)
+
+    except Currency.DoesNotExist:
+        raise LedgerConverterError(f"Invalid currency: {to_currency_code}")
+
+    reader = csv.DictReader(input_file)
+
+    if missing_fields := [field for field in INPUT_FIELDS if field not in (reader.fieldnames or [])]:
+        raise LedgerConverterError(f"Missing columns: {', '.join(missing_fields)}")
+
+    writer = csv.DictWriter(output_file, fieldnames=[*reader.fieldnames, *OUTPUT_FIELDS])
+    writer.writeheader()
+    index = ExchangeRateIndex(to_currency, settings.HISTORICAL_EXCHANGE_RATE_MAX_LOOKBACK)
+    stats = LedgerStats()
+
+    while rows := list(islice(reader, chunk_size or settings.LEDGER_CONVERT_CHUNK_SIZE)):
+        writer.writerows(convert_rows(rows, index, stats))
+
+    return stats
+
+
+def convert_rows(rows: list[dict], index: ExchangeRateIndex, stats: LedgerStats) -> list[dict]:
+    parsed_rows = [parse_row(row) for row in rows]
+    valid_rows = [parsed_row for parsed_row in parsed_rows if not isinstance(parsed_row, str)]
+
+    if valid_rows:
+        index.load(
+            {code for _, code, _ in valid_rows},
+            min(_date for _date, _, _ in valid_rows),
+            max(_date for _date, _, _ in valid_rows),
+        )
+
+    for row, parsed_row in zip(rows, parsed_rows):
+        stats.rows += 1
+
+        if isinstance(parsed_row, str):
+            error = parsed_row
+            row.pop(None, None)  # the extra fields of a row longer than the header
+        else:
+            _date, code, amount = parsed_row
+            found = (Decimal(1), _date) if code == index.to_currency.code else index.find(code, _date)
+            error = None if found else "Exchange rate is not available."
+
+        if error:
+            row["error"] = error
+            stats.failures += 1
+        else:
+            rate, rate_date = found
+            row.update(converted_amount=_convert(amount, rate), rate=rate, rate_date=rate_date)
+
+    return rows
+
+
+def parse_row(row: dict) -> tuple[date, str, Decimal] | str:
+    """Returns the date, the currency code and the amount of a row, or the error."""
+
+    if None in row:
+        return "Invalid number of fields."
+
+    try:
+        _date = datetime.strptime(row["date"], "%Y-%m-%d").date()
+        amount = Decimal(row["amount"])
+
+    except (TypeError, ValueError, InvalidOperation):
+        return "Invalid date or amount."
+
+    return (_date, row["currency"], amount) if amount.is_finite() else "Invalid date or amount."
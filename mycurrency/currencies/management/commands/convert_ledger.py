@@ -0,0 +1,41 @@
+from contextlib import ExitStack
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from currencies.ledger_converter import LedgerConverterError, convert_ledger
+
+
+class Command(BaseCommand):
+    help = "Convert the amounts of a CSV ledger into a reporting currency with the stored exchange rates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="CSV file with date, currency and amount columns, - for the standard input")
+        parser.add_argument("output", help="CSV file of the converted rows, - for the standard output")
+        parser.add_argument("--to", required=True, help="Code of the reporting currency")
+        parser.add_argument(
+            "--chunk-size", type=int, help="Rows converted at a time (default: LEDGER_CONVERT_CHUNK_SIZE)"
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] is not None and options["chunk_size"] < 1:
+            raise CommandError("The chunk size shall be at least 1.")
+
+        with ExitStack() as stack:
+            if options["input"] == "-":
+                input_file = sys.stdin
+            else:
+                input_file = stack.enter_context(open(options["input"], newline=""))
+
+            if options["output"] == "-":
+                output_file = self.stdout
+            else:
+                output_file = stack.enter_context(open(options["output"], "w", newline=""))
+
+            try:
+                stats = convert_ledger(input_file, output_file, options["to"], options["chunk_size"])
+
+            except LedgerConverterError as exc:
+                raise CommandError(str(exc))
+
+        (self.stderr if output_file is self.stdout else self.stdout).write(str(stats))
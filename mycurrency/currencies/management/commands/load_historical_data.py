@@ -1,89 +1,378 @@
-from datetime import date, datetime
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import date, datetime, timedelta
 import logging
+import math
 import multiprocessing as mp
 import os
+import pickle
+import time
 
-import django
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
 
-# Make models importable in each subprocess
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mycurrency.settings")
-django.setup()
-
-from currencies.exchange_rate_provider import ProviderHandler  # noqa: E402
-from currencies.models import Currency, CurrencyExchangeRate  # noqa: E402
+from currencies.exchange_rate_provider import TIME_RESOLUTION, ProviderHandler, derive_exchange_rates
+from currencies.exchange_rate_writer import ExchangeRateWriter
+from currencies.historical_workers import (
+    ExchangeRateCell,
+    ExchangeRateResult,
+    fetch_exchange_rate_cell,
+    init_worker,
+)
+from currencies.models import BackfillChunk, BackfillJob, Currency, CurrencyExchangeRate
 
 logger = logging.getLogger(__file__)
 
+CHUNKS_PER_WORKER = 4  # number of chunks a worker gets of the exchange rate cells for balancing the load
+
+BackfillChunkKey = tuple[date, str]  # date, base currency code
+
 
 class Command(BaseCommand):
-    help = "Load historical data of currency exchange rates."
+    help = "Load historical data of currency exchange rates in a resumable backfill job, skipping the stored ones."
 
     @staticmethod
     def date_arg(date_str):
         return datetime.strptime(date_str, "%Y-%m-%d").date()
 
     def add_arguments(self, parser):
-        parser.add_argument("date", type=self.date_arg, help="Date in YYYY-MM-DD format")
+        parser.add_argument("date", nargs="?", type=self.date_arg, help="Date in YYYY-MM-DD format")
+        parser.add_argument("--from-date", type=self.date_arg, help="First date of a range in YYYY-MM-DD format")
+        parser.add_argument(
+            "--to-date", type=self.date_arg, help="Last date of a range in YYYY-MM-DD format (default: --from-date)"
+        )
+        parser.add_argument("--base", nargs="+", help="Codes of the from-currencies (default: every currency)")
+        parser.add_argument("--symbols", nargs="+", help="Codes of the to-currencies (default: every currency)")
+        parser.add_argument(
+            "--pivot",
+            default=settings.CURRENCY_EXCHANGE_RATE_PIVOT,
+            help="Code of the currency whose rates are fetched for deriving all the other pairs",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of processes fetching the exchange rates (default: number of CPUs, 1 fetches in-process)",
+        )
+        parser.add_argument(
+            "--resume", type=int, metavar="JOB", help="Resume a backfill job from its checkpoint with its parameters"
+        )
+        parser.add_argument(
+            "--status",
+            nargs="?",
+            type=int,
+            const=0,
+            metavar="JOB",
+            help="Report the progress of a backfill job (default: the latest one) instead of loading",
+        )
 
     def handle(self, *args, **options):
-        query_date = options["date"]
+        if options["status"] is not None:
+            self.stdout.write(backfill_job_status(find_backfill_job(options["status"])))
+            return
+
+        if options["workers"] < 1:
+            raise CommandError("The number of workers shall be at least 1.")
+
+        currencies = Currency.objects.in_bulk(field_name="code")
+
+        if options["resume"]:
+            if any(options[name] for name in ["date", "from_date", "to_date", "base", "symbols"]):
+                raise CommandError("A resumed backfill job keeps its dates and currencies.")
+
+            job = find_backfill_job(options["resume"])
+        else:
+            job = create_backfill_job(currencies, options)
+
+        base_codes = currency_codes(currencies, job.base_currencies or None)
+        symbol_codes = currency_codes(currencies, job.symbols or None)
+        all_cells = list(exchange_rate_cells(job.from_date, job.to_date, base_codes, symbol_codes))
+        completed_chunks = set(job.chunks.values_list("date", "base_currency__code"))
+        chunks = {cell[:2] for cell in all_cells} - completed_chunks
+        stored_cells = find_stored_cells(job.from_date, job.to_date, base_codes, symbol_codes)
+        cells = [cell for cell in all_cells if cell[:2] in chunks and cell not in stored_cells]
+
+        job.status = BackfillJob.Status.RUNNING
+        job.total_chunks = len(chunks) + len(completed_chunks)
+        job.skipped = job.skipped if options["resume"] else len(stored_cells)
+        job.save(update_fields=["status", "total_chunks", "skipped", "updated_at"])
+        self.stdout.write(
+            f"Backfill job {job.pk}, exchange rates to load: {len(cells)}, already stored: {len(stored_cells)}"
+        )
+
+        if job.pivot:
+            exchange_rates = cross_exchange_rates(job.pivot, currencies, cells)
+        else:
+            stats = TransferStats()
+            exchange_rates = fetched_exchange_rates(currencies, cells, options["workers"], stats)
 
-        with (
-            BulkCreator(CurrencyExchangeRate) as create_exchange_rate,
-            mp.Pool(processes=mp.cpu_count(), initializer=init_process, initargs=(query_date,)) as pool,
-        ):
-            for result in pool.imap_unordered(load_currency_exchange_rate, currency_pairs(), chunksize=1):
-                if result:
-                    self.stdout.write(f"1 {result.from_currency.code} -> {result.rate} {result.to_currency.code}")
-                    create_exchange_rate(result)
+        try:
+            # The chunks are checkpointed as their batches are stored, so a resumed job continues with the rest
+            with CheckpointWriter(job, currencies, chunks, cells) as writer:
+                for cell, exchange_rate in exchange_rates:
+                    if exchange_rate:
+                        self.stdout.write(
+                            f"{exchange_rate.date} 1 {exchange_rate.from_currency.code} -> {exchange_rate.rate}"
+                            f" {exchange_rate.to_currency.code}"
+                        )
+
+                    writer.complete(cell, exchange_rate)
+        except BaseException:
+            job.status = BackfillJob.Status.INTERRUPTED
+            job.save(update_fields=["status", "updated_at"])
+            raise
+
+        job.status = BackfillJob.Status.COMPLETED
+        job.save(update_fields=["status", "updated_at"])
+
+        if not job.pivot:
+            self.stdout.write(str(stats))
 
         self.stdout.write(
-            f"Loaded currency exchange rates: {CurrencyExchangeRate.objects.filter(date=query_date).count()}"
+            "Loaded currency exchange rates: "
+            f"{CurrencyExchangeRate.objects.filter(date__range=(job.from_date, job.to_date)).count()}"
+        )
+        self.stdout.write(backfill_job_status(job))
+
+
+def create_backfill_job(currencies: dict[str, Currency], options: dict) -> BackfillJob:
+    if bool(options["date"]) == bool(options["from_date"]):
+        raise CommandError("Either a date or --from-date shall be given.")
+
+    from_date = options["date"] or options["from_date"]
+    to_date = options["date"] or options["to_date"] or from_date
+
+    if to_date < from_date:
+        raise CommandError("The last date shall not be before the first date.")
+
+    if options["pivot"] and options["pivot"] not in currencies:
+        raise CommandError(f"Invalid pivot currency: {options['pivot']}")
+
+    return BackfillJob.objects.create(
+        from_date=from_date,
+        to_date=to_date,
+        base_currencies=currency_codes(currencies, options["base"]) if options["base"] else [],
+        symbols=currency_codes(currencies, options["symbols"]) if options["symbols"] else [],
+        pivot=options["pivot"] or "",
+    )
+
+
+def find_backfill_job(job_id: int) -> BackfillJob:
+    """Returns the backfill job of the id, or the latest one for 0."""
+
+    jobs = BackfillJob.objects.order_by("-pk")
+
+    if job := (jobs.filter(pk=job_id) if job_id else jobs).first():
+        return job
+
+    raise CommandError(f"No backfill job {job_id}." if job_id else "No backfill job yet.")
+
+
+def backfill_job_status(job: BackfillJob) -> str:
+    completed_chunks = job.chunks.count()
+    rows_per_second = job.rows_per_second
+    eta = job.eta(completed_chunks)
+
+    return (
+        f"Backfill job {job.pk} {job.status}: {job.from_date} - {job.to_date},"
+        f" chunks {completed_chunks}/{job.total_chunks}, rows {job.rows}, failures {job.failures}, skipped {job.skipped},"
+        f" {'-' if rows_per_second is None else f'{rows_per_second:.1f}'} rows/s,"
+        f" ETA {'-' if eta is None else f'{eta.total_seconds():.0f}s'}"
+    )
+
+
+class CheckpointWriter(ExchangeRateWriter):
+    """Writes the exchange rates of a backfill job, checkpointing a (date, base) chunk once all its rates are stored.
+
+    The chunks are checkpointed in the transaction of the batch storing their last rates.
+    """
+
+    def __init__(
+        self,
+        job: BackfillJob,
+        currencies: dict[str, Currency],
+        chunks: Iterable[BackfillChunkKey],
+        cells: Iterable[ExchangeRateCell],
+        batch_size: int | None = None,
+    ):
+        super().__init__(batch_size)
+        self.job = job
+        self.currencies = currencies
+        self.pending = Counter(cell[:2] for cell in cells)
+        self.counts = {chunk: [0, 0] for chunk in chunks}  # rows and failures of a chunk
+        self.completed = [chunk for chunk in self.counts if chunk not in self.pending]  # stored before the job
+        self.checkpointed_at = time.monotonic()
+
+    def complete(self, cell: ExchangeRateCell, exchange_rate: CurrencyExchangeRate | None) -> None:
+        """Writes the exchange rate of the cell, or counts a failure without one."""
+
+        chunk = cell[:2]
+        self.counts[chunk][exchange_rate is None] += 1
+        self.pending[chunk] -= 1
+
+        if not self.pending[chunk]:
+            self.completed.append(chunk)
+
+        if exchange_rate:
+            self(exchange_rate)
+
+    def flush(self) -> None:
+        with transaction.atomic():
+            super().flush()
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        checkpointed_at = time.monotonic()
+        chunks = [
+            BackfillChunk(
+                job=self.job,
+                date=_date,
+                base_currency=self.currencies[base_code],
+                rows=self.counts[_date, base_code][0],
+                failures=self.counts[_date, base_code][1],
+            )
+            for _date, base_code in self.completed
+        ]
+        BackfillChunk.objects.bulk_create(chunks)
+        self.job.rows += sum(chunk.rows for chunk in chunks)
+        self.job.failures += sum(chunk.failures for chunk in chunks)
+        self.job.duration += timedelta(seconds=checkpointed_at - self.checkpointed_at)
+        self.job.save(update_fields=["rows", "failures", "duration", "updated_at"])
+        self.checkpointed_at = checkpointed_at
+        self.completed.clear()
+
+
+def currency_codes(currencies: dict[str, Currency], codes: Sequence[str] | None) -> list[str]:
+    if codes is None:
+        return sorted(currencies)
+
+    if invalid_codes := set(codes) - set(currencies):
+        raise CommandError(f"Invalid currency: {', '.join(sorted(invalid_codes))}")
+
+    return sorted(set(codes))
+
+
+def find_stored_cells(
+    from_date: date, to_date: date, base_codes: Sequence[str], symbol_codes: Sequence[str]
+) -> set[ExchangeRateCell]:
+    """Returns the cells of the work set whose exchange rates are already stored, in one query."""
+
+    return set(
+        CurrencyExchangeRate.objects.filter(
+            date__range=(from_date, to_date),
+            from_currency__code__in=base_codes,
+            to_currency__code__in=symbol_codes,
+        ).values_list("date", "from_currency__code", "to_currency__code")
+    )
+
+
+def exchange_rate_cells(
+    from_date: date, to_date: date, base_codes: Sequence[str], symbol_codes: Sequence[str]
+) -> Iterator[ExchangeRateCell]:
+    while from_date <= to_date:
+        for from_code in base_codes:
+            for to_code in symbol_codes:
+                if from_code != to_code:
+                    yield (from_date, from_code, to_code)
+
+        from_date += TIME_RESOLUTION
+
+
+class TransferStats:
+    """Counts the fetched exchange rate cells and the pickled bytes exchanged with the workers."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.cells = 0
+        self.bytes = 0
+
+    def count(self, item) -> None:
+        self.bytes += len(pickle.dumps(item))
+
+    def __str__(self) -> str:
+        duration = time.monotonic() - self.started
+
+        return (
+            f"Fetched exchange rates: {self.cells} in {duration:.2f}s ({self.cells / duration:.1f} rates/s),"
+            f" transferred {self.bytes} bytes"
+        )
+
+
+def fetched_exchange_rates(
+    currencies: dict[str, Currency], cells: list[ExchangeRateCell], workers: int, stats: TransferStats
+) -> Iterator[tuple[ExchangeRateCell, CurrencyExchangeRate | None]]:
+    """Fetches the cells by the workers, building the rates from the plain results in this process."""
+
+    for _date, from_code, to_code, rate in fetch_exchange_rate_cells(cells, workers, stats):
+        yield (
+            (_date, from_code, to_code),
+            rate
+            and CurrencyExchangeRate(
+                from_currency=currencies[from_code], to_currency=currencies[to_code], date=_date, rate=rate
+            ),
         )
 
 
-def init_process(query_date: date):
-    mp.current_process().provider_handler = ProviderHandler()
-    mp.current_process().query_date = query_date
+def fetch_exchange_rate_cells(
+    cells: list[ExchangeRateCell], workers: int, stats: TransferStats
+) -> Iterator[ExchangeRateResult]:
+    """Yields the plain results of fetching the cells by one pool of workers in the order of their completion.
+
+    A single worker fetches in this process without transferring anything.
+    """
+
+    if not cells:
+        return
+
+    if workers == 1:
+        init_worker()
 
+        for result in map(fetch_exchange_rate_cell, cells):
+            stats.cells += 1
 
-def load_currency_exchange_rate(currency_pair):
-    from_currency, to_currency = currency_pair
+            yield result
 
-    return mp.current_process().provider_handler(*currency_pair, mp.current_process().query_date)
+        return
 
+    for cell in cells:
+        stats.count(cell)
 
-class BulkCreator:
-    MAX_BULK_SIZE = 1000
+    connections.close_all()  # the forked workers shall not share the connections of this process
+    chunksize = max(1, math.ceil(len(cells) / (workers * CHUNKS_PER_WORKER)))
 
-    def __init__(self, model):
-        self.model = model
-        self.items = []
+    with mp.Pool(processes=workers, initializer=init_worker) as pool:
+        for result in pool.imap_unordered(fetch_exchange_rate_cell, cells, chunksize=chunksize):
+            stats.cells += 1
+            stats.count(result)
 
-    def __enter__(self):
-        return self
+            yield result
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self._bulk_create()
 
-        return False
+def cross_exchange_rates(
+    pivot_currency_code: str, currencies: dict[str, Currency], cells: list[ExchangeRateCell]
+) -> Iterator[tuple[ExchangeRateCell, CurrencyExchangeRate | None]]:
+    """Fetches the rates of the pivot currency once a date and derives the rates of the cells from them."""
 
-    def _bulk_create(self) -> None:
-        self.model.objects.bulk_create(self.items, ignore_conflicts=True)
-        self.items.clear()
+    pivot_currency = currencies[pivot_currency_code]
+    to_currencies_by_date: dict[date, dict[str, list[Currency]]] = {}
 
-    def __call__(self, item) -> None:
-        self.items.append(item)
+    for _date, from_code, to_code in cells:
+        to_currencies_by_date.setdefault(_date, {}).setdefault(from_code, []).append(currencies[to_code])
 
-        if len(self.items) >= self.MAX_BULK_SIZE:
-            self._bulk_create()
+    provider_handler = ProviderHandler()
+    other_currencies = [currency for currency in currencies.values() if currency != pivot_currency]
 
+    for _date, to_currencies_by_code in to_currencies_by_date.items():
+        pivot_rates = provider_handler.get_exchange_rates(pivot_currency, other_currencies, _date, rounded=False)
 
-def currency_pairs():
-    currencies = list(Currency.objects.all())
+        for from_code, to_currencies in to_currencies_by_code.items():
+            exchange_rates = {
+                exchange_rate.to_currency.code: exchange_rate
+                for exchange_rate in derive_exchange_rates(
+                    pivot_currency, pivot_rates, currencies[from_code], to_currencies
+                )
+            }
 
-    for one in currencies:
-        for other in currencies:
-            if one.code != other.code:
-                yield (one, other)
+            for to_currency in to_currencies:
+                yield (_date, from_code, to_currency.code), exchange_rates.get(to_currency.code)
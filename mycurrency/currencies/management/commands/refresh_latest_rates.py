@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from currencies.latest_rate_refresher import LatestExchangeRateRefresher
+
+
+class Command(BaseCommand):
+    help = "Keep the exchange rates of today warm for the hot base currencies."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base",
+            nargs="+",
+            default=settings.HOT_BASE_CURRENCIES,
+            help="Codes of the base currencies to refresh (default: HOT_BASE_CURRENCIES)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.LATEST_EXCHANGE_RATE_REFRESH_INTERVAL,
+            help="Seconds between the refreshes",
+        )
+        parser.add_argument(
+            "--jitter",
+            type=float,
+            default=settings.LATEST_EXCHANGE_RATE_REFRESH_JITTER,
+            help="Ratio of the interval the refreshes are randomly shifted by",
+        )
+        parser.add_argument("--cycles", type=int, help="Number of refreshes before exiting (default: run forever)")
+
+    def handle(self, *args, **options):
+        if not options["base"]:
+            raise CommandError("No base currency to refresh, set HOT_BASE_CURRENCIES or --base.")
+
+        LatestExchangeRateRefresher(options["base"], options["interval"], options["jitter"]).run(options["cycles"])
@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from currencies.rate_store import write_rate_store
+
+
+class Command(BaseCommand):
+    help = "Write the stored exchange rates of the last days into a new generation of the memory-mapped rate store."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dir", default=settings.RATE_STORE_DIR, help="Directory of the rate store (default: RATE_STORE_DIR)"
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.RATE_STORE_DAYS,
+            help="Days up to today written into the rate store (default: RATE_STORE_DAYS)",
+        )
+
+    def handle(self, *args, **options):
+        if not options["dir"]:
+            raise CommandError("No rate store directory, set RATE_STORE_DIR or --dir.")
+
+        if options["days"] < 1:
+            raise CommandError("The number of days shall be at least 1.")
+
+        to_date = date.today()
+        path = write_rate_store(Path(options["dir"]), to_date - timedelta(days=options["days"] - 1), to_date)
+        self.stdout.write(f"Written rate store: {path} ({path.stat().st_size} bytes)")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('currencies', '0004_currencyexchangerate_unique_rate_per_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='currencyexchangerate',
+            name='derived',
+            field=models.BooleanField(default=False),
+        ),
+    ]
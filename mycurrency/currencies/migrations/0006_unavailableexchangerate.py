@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('currencies', '0005_currencyexchangerate_derived'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnavailableExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('from_currency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='currencies.currency')),
+                ('provider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='currencies.provider')),
+                ('to_currency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='currencies.currency')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('provider', 'from_currency', 'to_currency', 'date'), name='unique_unavailable_rate_per_provider')],
+            },
+        ),
+    ]
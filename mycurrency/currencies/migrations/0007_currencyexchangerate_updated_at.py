@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('currencies', '0006_unavailableexchangerate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='currencyexchangerate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:42
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('currencies', '0007_currencyexchangerate_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_date', models.DateField()),
+                ('to_date', models.DateField()),
+                ('base_currencies', models.JSONField(default=list)),
+                ('symbols', models.JSONField(default=list)),
+                ('pivot', models.CharField(blank=True, max_length=3)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('interrupted', 'Interrupted'), ('completed', 'Completed')], default='running', max_length=11)),
+                ('total_chunks', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('failures', models.PositiveIntegerField(default=0)),
+                ('duration', models.DurationField(default=datetime.timedelta)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BackfillChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('rows', models.PositiveIntegerField()),
+                ('failures', models.PositiveIntegerField()),
+                ('completed_at', models.DateTimeField(auto_now_add=True)),
+                ('base_currency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='currencies.currency')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='currencies.backfilljob')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('job', 'date', 'base_currency'), name='unique_backfill_chunk_per_job')],
+            },
+        ),
+    ]
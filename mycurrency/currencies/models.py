@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from django.conf import settings
 from django.db import models
 
@@ -12,6 +14,8 @@ class CurrencyExchangeRate(models.Model):
     to_currency = models.ForeignKey(Currency, on_delete=models.CASCADE)
     date = models.DateField(db_index=True)
     rate = models.DecimalField(db_index=True, decimal_places=settings.CURRENCY_EXCHANGE_RATE_PRECISION, max_digits=18)
+    derived = models.BooleanField(default=False)  # computed from the rates of a pivot currency instead of fetched
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         constraints = [
@@ -23,3 +27,76 @@ class Provider(models.Model):
     name = models.CharField(max_length=20, db_index=True, unique=True)
     priority = models.PositiveIntegerField()
     active = models.BooleanField(default=True)
+
+
+class UnavailableExchangeRate(models.Model):
+    """Marks an exchange rate a provider had no data for or failed to provide, until it expires."""
+
+    provider = models.ForeignKey(Provider, related_name="+", on_delete=models.CASCADE)
+    from_currency = models.ForeignKey(Currency, related_name="+", on_delete=models.CASCADE)
+    to_currency = models.ForeignKey(Currency, related_name="+", on_delete=models.CASCADE)
+    date = models.DateField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["provider", "from_currency", "to_currency", "date"], name="unique_unavailable_rate_per_provider"
+            )
+        ]
+
+
+class BackfillJob(models.Model):
+    """A run of `load_historical_data` over a range of dates and currencies, checkpointed by (date, base) chunks."""
+
+    class Status(models.TextChoices):
+        RUNNING = "running"
+        INTERRUPTED = "interrupted"
+        COMPLETED = "completed"
+
+    from_date = models.DateField()
+    to_date = models.DateField()
+    base_currencies = models.JSONField(default=list)  # codes, every currency when empty
+    symbols = models.JSONField(default=list)  # codes, every currency when empty
+    pivot = models.CharField(max_length=3, blank=True)
+    status = models.CharField(max_length=11, choices=Status, default=Status.RUNNING)
+    total_chunks = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)  # exchange rates already stored when the job was started
+    rows = models.PositiveIntegerField(default=0)  # exchange rates stored by the job in its completed chunks
+    failures = models.PositiveIntegerField(default=0)  # exchange rates not provided
+    duration = models.DurationField(default=timedelta)  # time spent loading, over every run of the job
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def rows_per_second(self) -> float | None:
+        seconds = self.duration.total_seconds()
+
+        return self.rows / seconds if seconds else None
+
+    def eta(self, completed_chunks: int) -> timedelta | None:
+        """Estimates the time left from the average duration of the chunks completed so far."""
+
+        if self.status == self.Status.COMPLETED:
+            return timedelta()
+
+        if not completed_chunks:
+            return None
+
+        return self.duration / completed_chunks * (self.total_chunks - completed_chunks)
+
+
+class BackfillChunk(models.Model):
+    """Checkpoints the exchange rates of a date and a base currency completed by a backfill job."""
+
+    job = models.ForeignKey(BackfillJob, related_name="chunks", on_delete=models.CASCADE)
+    date = models.DateField()
+    base_currency = models.ForeignKey(Currency, related_name="+", on_delete=models.CASCADE)
+    rows = models.PositiveIntegerField()
+    failures = models.PositiveIntegerField()
+    completed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["job", "date", "base_currency"], name="unique_backfill_chunk_per_job")
+        ]
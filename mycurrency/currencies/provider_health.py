@@ -0,0 +1,110 @@
+from collections import deque
+from collections.abc import Callable
+import math
+import threading
+import time
+
+from django.conf import settings
+
+
+class ProviderHealth:
+    """Tracks the outcome and latency of the recent calls of a provider, tripping its circuit on too many errors.
+
+    A tripped provider is skipped for the cool-down period, after which a single trial call closes the circuit
+    on success or trips it again on failure. A trial not recorded within another cool-down is granted again.
+    While the circuit is open, the outcomes of the calls started before the trial are ignored.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: deque[bool] = deque(maxlen=settings.PROVIDER_CIRCUIT_BREAKER_WINDOW)  # True on failure
+        self._latencies: deque[float] = deque(maxlen=settings.PROVIDER_CIRCUIT_BREAKER_WINDOW)
+        self._tripped_until: float | None = None
+        self._trial_at: float | None = None  # when the trial call of the open circuit was granted
+
+    def record(self, latency: float, failed: bool = False, started: float | None = None) -> None:
+        """Records the outcome of a call started at the given clock time (by default now).
+
+        The circuit trips when the error rate exceeds the threshold.
+        """
+
+        with self._lock:
+            if self._tripped_until is not None:
+                if self._trial_at is None or (self.clock() if started is None else started) < self._trial_at:
+                    return
+
+                self._trial_at = None
+
+                if failed:
+                    self._tripped_until = self.clock() + settings.PROVIDER_CIRCUIT_BREAKER_COOL_DOWN
+                    return
+
+                self._tripped_until = None
+                self._outcomes.clear()
+
+            self._outcomes.append(failed)
+            self._latencies.append(latency)
+
+            if (
+                len(self._outcomes) >= settings.PROVIDER_CIRCUIT_BREAKER_MIN_CALLS
+                and self._error_rate() >= settings.PROVIDER_CIRCUIT_BREAKER_ERROR_RATE
+            ):
+                self._tripped_until = self.clock() + settings.PROVIDER_CIRCUIT_BREAKER_COOL_DOWN
+
+    def is_available(self) -> bool:
+        """Tells if the circuit is closed, or grants the trial call once the cool-down has elapsed."""
+
+        with self._lock:
+            if self._tripped_until is None:
+                return True
+
+            if (now := self.clock()) < self._tripped_until:
+                return False
+
+            self._trial_at = now
+            self._tripped_until = now + settings.PROVIDER_CIRCUIT_BREAKER_COOL_DOWN
+
+            return True
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            return self._error_rate()
+
+    def _error_rate(self) -> float:
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def latency_percentile(self, percent: float) -> float | None:
+        """Returns the latency in seconds under which the given percent of the recent calls completed."""
+
+        with self._lock:
+            latencies = sorted(self._latencies)
+
+        if not latencies:
+            return None
+
+        return latencies[max(math.ceil(len(latencies) * percent / 100) - 1, 0)]
+
+
+class ProviderHealthRegistry:
+    """Keeps the health of the providers by name, shared by the threads and the rebuilt handlers of the process."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._health: dict[str, ProviderHealth] = {}
+
+    def __getitem__(self, name: str) -> ProviderHealth:
+        with self._lock:
+            if name not in self._health:
+                self._health[name] = ProviderHealth(self.clock)
+
+            return self._health[name]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._health.clear()
+
+
+provider_health = ProviderHealthRegistry()
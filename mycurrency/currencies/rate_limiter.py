@@ -0,0 +1,22 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """Spaces out the calls evenly to keep their rate under the limit, shared by threads."""
+
+    def __init__(self, calls_per_second: float):
+        self.interval = 1 / calls_per_second
+        self._lock = threading.Lock()
+        self._next_call = time.monotonic()
+
+    def acquire(self) -> None:
+        """Blocks until the next call is allowed."""
+
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_call - now
+            self._next_call = max(now, self._next_call) + self.interval
+
+        if wait > 0:
+            time.sleep(wait)
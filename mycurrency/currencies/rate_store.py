@@ -0,0 +1,167 @@
+"""Memory-mapped rate snapshot files shared by the worker processes of a host.
+
+A file holds a header, the fixed-width currency codes and the scaled rates as fixed-width 64-bit records
+indexed by date, from-currency and to-currency index, in the layout of `RateSnapshot`.
+Every write creates a new generation file, which the processes map read-only once they notice it.
+"""
+
+from collections.abc import Iterator
+from datetime import date
+import mmap
+import os
+from pathlib import Path
+import struct
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+from currencies.exchange_rate_provider import ExchangeRateValues
+from currencies.models import Currency
+from currencies.rate_snapshot import RateSnapshot, rate_snapshot
+
+MAGIC = b"MCRS"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHQIII")  # magic, version, big-endian, precision, generation, first date, days, currencies
+CODE_SIZE = 3  # bytes of a currency code, padded with spaces
+RECORD_SIZE = 8  # bytes of a scaled rate
+KEPT_GENERATIONS = 2  # generation files left for the processes still mapping an older one
+FILE_PATTERN = "rates-*.bin"
+
+
+class RateStoreError(Exception):
+    pass
+
+
+def generation_paths(directory: Path) -> list[Path]:
+    """Returns the generation files in the directory from the oldest to the newest."""
+
+    return sorted(directory.glob(FILE_PATTERN))
+
+
+def write_rate_store(directory: Path, from_date: date, to_date: date) -> Path:
+    """Writes the stored exchange rates of the date range into a new generation file, returning its path.
+
+    The file is written under a temporary name and renamed, so the readers never see a partial one.
+    """
+
+    snapshot = RateSnapshot.load(from_date, to_date)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = generation_paths(directory)
+    generation = int(paths[-1].stem.split("-")[1]) + 1 if paths else 1
+    path = directory / FILE_PATTERN.replace("*", f"{generation:012}")
+    temporary_path = path.with_suffix(".tmp")
+    codes = "".join(code.ljust(CODE_SIZE) for code in snapshot.codes).encode("ascii")
+
+    with open(temporary_path, "wb") as file:
+        file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                sys.byteorder == "big",
+                settings.CURRENCY_EXCHANGE_RATE_PRECISION,
+                generation,
+                from_date.toordinal(),
+                (to_date - from_date).days + 1,
+                len(snapshot.codes),
+            )
+        )
+        file.write(codes)
+        file.write(bytes(-(HEADER.size + len(codes)) % RECORD_SIZE))  # aligns the records
+        snapshot.tofile(file)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temporary_path, path)
+
+    for old_path in generation_paths(directory)[:-KEPT_GENERATIONS]:
+        old_path.unlink(missing_ok=True)  # the processes mapping it keep reading it until they switch
+
+    return path
+
+
+def open_rate_store(path: Path) -> RateSnapshot:
+    """Maps a generation file read-only, the snapshot reads the rates from the shared pages without copying them."""
+
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, big_endian, precision, _, first_date, days, size = HEADER.unpack_from(mapped)
+
+    if (magic, version) != (MAGIC, VERSION):
+        raise RateStoreError(f"Not a rate store file: {path}")
+
+    if big_endian != (sys.byteorder == "big") or precision != settings.CURRENCY_EXCHANGE_RATE_PRECISION:
+        raise RateStoreError(f"Incompatible rate store file: {path}")
+
+    codes = mapped[HEADER.size : HEADER.size + size * CODE_SIZE].decode("ascii")
+    offset = HEADER.size + size * CODE_SIZE
+    offset += -offset % RECORD_SIZE
+    records = memoryview(mapped)[offset : offset + days * size * size * RECORD_SIZE].cast("q")
+
+    return RateSnapshot(
+        [codes[position : position + CODE_SIZE].rstrip() for position in range(0, len(codes), CODE_SIZE)],
+        date.fromordinal(first_date),
+        [records[day * size * size : (day + 1) * size * size] for day in range(days)],
+    )
+
+
+class RateStoreHolder:
+    """Holds the newest generation of the rate store in `RATE_STORE_DIR` mapped, None disables it.
+
+    The directory is checked for a newer generation every `RATE_STORE_CHECK_INTERVAL` seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: RateSnapshot | None = None
+        self._path: Path | None = None
+        self._checked_at: float | None = None
+
+    def get(self) -> RateSnapshot | None:
+        if settings.RATE_STORE_DIR is None:
+            return None
+
+        now = time.monotonic()
+
+        if self._checked_at is None or now - self._checked_at >= settings.RATE_STORE_CHECK_INTERVAL:
+            with self._lock:
+                self._checked_at = now
+                paths = generation_paths(Path(settings.RATE_STORE_DIR))
+
+                if paths and paths[-1] != self._path:
+                    self._snapshot, self._path = open_rate_store(paths[-1]), paths[-1]
+
+        return self._snapshot
+
+    def clear(self) -> None:
+        self._snapshot = self._path = self._checked_at = None
+
+
+rate_store = RateStoreHolder()
+
+
+def current_rate_snapshot() -> RateSnapshot | None:
+    """Returns the snapshot of the rate store when enabled, otherwise the one of the process if enabled."""
+
+    return rate_store.get() or rate_snapshot.get()
+
+
+def read_exchange_rate_values(
+    from_currency: Currency, from_date: date, to_date: date
+) -> Iterator[ExchangeRateValues] | None:
+    """Returns a generator of the exchange rates of the from-currency to every other currency from the rate store.
+
+    None is returned unless the store is enabled and has every one of them, checked without reading them out.
+    """
+
+    if (snapshot := rate_store.get()) is None:
+        return None
+
+    currency_codes = list(Currency.objects.exclude(pk=from_currency.pk).order_by("code").values_list("code", flat=True))
+
+    if not snapshot.is_complete(from_currency.code, currency_codes, from_date, to_date):
+        return None
+
+    return snapshot.exchange_rate_values(from_currency.code, currency_codes, from_date, to_date)
@@ -1,4 +1,5 @@
 from collections.abc import Generator, Iterable
+from datetime import date
 
 from django.conf import settings
 from rest_framework import serializers
@@ -10,6 +11,9 @@ class CurrencyRatesRequestSerializer(serializers.Serializer):
     from_date = serializers.DateField()
     to_date = serializers.DateField()
     from_currency = serializers.CharField(max_length=3)
+    output = serializers.ChoiceField(
+        choices=["json", "json-stream", "ndjson", "columnar-json", "columnar-csv"], default="json"
+    )
 
 
 class OrderByToCurrencyCodeSerializer(serializers.ListSerializer):
@@ -53,15 +57,40 @@ class CurrencyRatesResponseSerializer(serializers.Serializer):
         if exchange_rates:
             yield {"date": last_date, "from_currency": from_currency, "rates": exchange_rates}
 
+    @classmethod
+    def generate_data(
+        cls,
+        from_currency: str,
+        exchange_rates_by_date: Iterable[CurrencyExchangeRate],
+    ) -> Generator[dict, None, None]:
+        """Serializes the exchange rates lazily, one date group at a time."""
+
+        for raw_data in cls.generate_raw_data(from_currency, exchange_rates_by_date):
+            yield cls(raw_data).data
+
 
 class CurrencyConvertRequestSerializer(serializers.Serializer):
     from_currency = serializers.CharField(max_length=3)
     to_currency = serializers.CharField(max_length=3)
     amount = serializers.DecimalField(decimal_places=settings.CURRENCY_AMOUNT_PRECISION, max_digits=18, min_value=0)
+    date = serializers.DateField(required=False)  # the latest exchange rate when missing
+
+    def validate_date(self, value):
+        if value > date.today():
+            raise serializers.ValidationError("Date shall not be in the future.")
+
+        return value
 
 
 class CurrencyConvertResponseSerializer(CurrencyConvertRequestSerializer):
     rate = serializers.DecimalField(decimal_places=settings.CURRENCY_EXCHANGE_RATE_PRECISION, max_digits=18)
+    rate_date = serializers.DateField(required=False)  # the date of the rate of a conversion at a date
+
+
+class CurrencyBatchConvertRequestSerializer(serializers.Serializer):
+    conversions = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=settings.CURRENCY_BATCH_CONVERT_MAX_SIZE
+    )
 
 
 class CurrencySerializer(serializers.ModelSerializer):
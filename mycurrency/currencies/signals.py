@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from currencies.exchange_rate_provider import get_provider_handler
+from currencies.models import Provider
+
+
+@receiver([post_save, post_delete], sender=Provider)
+def invalidate_provider_handler(sender, **kwargs):
+    get_provider_handler.invalidate()
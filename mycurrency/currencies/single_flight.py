@@ -0,0 +1,106 @@
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager
+import hashlib
+import threading
+
+from django.db import connection
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Runs one call per key at a time, the concurrent callers of the same key waiting for and sharing its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict[Hashable, _Flight] = {}
+
+    def __call__(self, key: Hashable, func: Callable, *args, **kwargs):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+
+            if flight.error is not None:
+                raise flight.error
+
+            return flight.result
+
+        try:
+            flight.result = func(*args, **kwargs)
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+            flight.done.set()
+
+        return flight.result
+
+
+@contextmanager
+def advisory_lock(key: str) -> Iterator[bool]:
+    """Holds a PostgreSQL session-level advisory lock on the key, yielding whether another session was holding it.
+
+    Other databases are not locked.
+    """
+
+    if connection.vendor != "postgresql":
+        yield False
+        return
+
+    lock_id = _advisory_lock_id(key)
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [lock_id])
+        contended = not cursor.fetchone()[0]
+
+        if contended:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [lock_id])
+
+    try:
+        yield contended
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_id])
+
+
+@contextmanager
+def try_advisory_lock(key: str) -> Iterator[bool | None]:
+    """Takes a PostgreSQL session-level advisory lock on the key unless another session holds it, without waiting.
+
+    Yields whether the lock is taken, or None on other databases, which are not locked.
+    """
+
+    if connection.vendor != "postgresql":
+        yield None
+        return
+
+    lock_id = _advisory_lock_id(key)
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [lock_id])
+        locked = cursor.fetchone()[0]
+
+    try:
+        yield locked
+    finally:
+        if locked:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_id])
+
+
+def _advisory_lock_id(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big", signed=True)
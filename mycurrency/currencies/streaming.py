@@ -0,0 +1,28 @@
+from collections.abc import Generator, Iterable
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def _encode(item) -> bytes:
+    return json.dumps(item, cls=JSONEncoder, separators=(",", ":")).encode()
+
+
+def stream_json_array(items: Iterable) -> Generator[bytes, None, None]:
+    """Encodes the items one by one as the elements of a JSON array."""
+
+    separator = b"["
+
+    for item in items:
+        yield separator + _encode(item)
+
+        separator = b","
+
+    yield b"[]" if separator == b"[" else b"]"
+
+
+def stream_ndjson(items: Iterable) -> Generator[bytes, None, None]:
+    """Encodes the items one by one as newline delimited JSON."""
+
+    for item in items:
+        yield _encode(item) + b"\n"
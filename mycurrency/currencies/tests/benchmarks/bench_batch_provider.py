@@ -0,0 +1,49 @@
+from datetime import date
+
+from conftest import measure, mock_provider
+import pytest
+
+from currencies.exchange_rate_provider import ExchangeRateLoader
+from currencies.models import Currency
+
+pytestmark = pytest.mark.django_db
+
+ROUND_TRIP = 0.002  # simulated latency of a provider request in seconds
+PER_PAIR_PLUGIN_CODE = f"""
+import time
+
+class Provider:
+    def get_exchange_rate_data(self, from_currency, to_currency, date):
+        time.sleep({ROUND_TRIP})
+        return 1.234567
+"""
+BATCH_PLUGIN_CODE = (
+    PER_PAIR_PLUGIN_CODE
+    + f"""
+    def get_exchange_rates_data(self, from_currency, to_currencies, date):
+        time.sleep({ROUND_TRIP})
+        return {{code: 1.234567 for code in to_currencies}}
+"""
+)
+CURRENCIES = 20
+DAYS = 10
+
+
+@pytest.fixture
+def to_currencies():
+    return [Currency.objects.create(code=f"X{index:02}", name=f"Currency {index}") for index in range(CURRENCIES)]
+
+
+def load(from_currency, to_currencies):
+    with ExchangeRateLoader() as load_exchange_rates:
+        assert len(list(load_exchange_rates(from_currency, date(2023, 1, 1), date(2023, 1, DAYS), to_currencies))) == (
+            DAYS * CURRENCIES
+        )
+
+
+@pytest.mark.parametrize("plugin_code", [PER_PAIR_PLUGIN_CODE, BATCH_PLUGIN_CODE], ids=["per_pair", "batch"])
+def test_loading_exchange_rates(currency, to_currencies, plugin_code, report):
+    with mock_provider("bench_1", plugin_code):
+        duration = measure(lambda: load(currency["EUR"], to_currencies), repeat=1)
+
+    report(f"{DAYS} days x {CURRENCIES} currencies loaded in {duration * 1000:.1f} ms")
@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+import time
+
+import pytest
+
+from currencies.models import Currency, CurrencyExchangeRate
+
+pytestmark = pytest.mark.django_db
+
+URL = "/currencies/rates/"
+FIRST_DATE = date(2020, 1, 1)
+DAYS = 365
+CURRENCIES = 20
+
+
+@pytest.fixture
+def stored_exchange_rates(currency):
+    to_currencies = [
+        Currency.objects.create(code=f"X{index:02}", name=f"Currency {index}") for index in range(CURRENCIES)
+    ]
+    CurrencyExchangeRate.objects.bulk_create(
+        CurrencyExchangeRate(
+            date=FIRST_DATE + timedelta(days=day),
+            from_currency=currency["EUR"],
+            to_currency=to_currency,
+            rate=1.234567 + index,
+        )
+        for day in range(DAYS)
+        for index, to_currency in enumerate(to_currencies + [currency["USD"], currency["GBP"], currency["CHF"]])
+    )
+
+
+@pytest.mark.parametrize("output", ["json", "columnar-json", "columnar-csv"])
+def test_payload_size_and_serialization_time(client, stored_exchange_rates, output, report):
+    parameters = {
+        "from_date": FIRST_DATE.isoformat(),
+        "to_date": (FIRST_DATE + timedelta(days=DAYS - 1)).isoformat(),
+        "from_currency": "EUR",
+        "output": output,
+    }
+    start = time.perf_counter()
+
+    response = client.get(URL, parameters)
+    content = b"".join(response.streaming_content) if response.streaming else response.content
+
+    duration = time.perf_counter() - start
+
+    report(f"{DAYS} days x {CURRENCIES + 3} currencies: {len(content) / 1024:.0f} KiB in {duration * 1000:.0f} ms")
@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+
+from conftest import measure
+import pytest
+
+from currencies.exchange_rate_writer import ExchangeRateWriter
+from currencies.models import Currency, CurrencyExchangeRate
+
+pytestmark = pytest.mark.django_db
+
+FIRST_DATE = date(2023, 1, 1)
+DAYS = 100
+CURRENCIES = 50
+
+
+@pytest.fixture
+def exchange_rates(currency):
+    to_currencies = [
+        Currency.objects.create(code=f"X{index:02}", name=f"Currency {index}") for index in range(CURRENCIES)
+    ]
+
+    return [
+        CurrencyExchangeRate(
+            date=FIRST_DATE + timedelta(days=day), from_currency=currency["EUR"], to_currency=to_currency, rate=1.5
+        )
+        for day in range(DAYS)
+        for to_currency in to_currencies
+    ]
+
+
+def save_one_by_one(exchange_rates):
+    """The former way of the latest-rate path: get-then-save row by row."""
+
+    for exchange_rate in exchange_rates:
+        try:
+            stored_exchange_rate = CurrencyExchangeRate.objects.get(
+                from_currency=exchange_rate.from_currency,
+                to_currency=exchange_rate.to_currency,
+                date=exchange_rate.date,
+            )
+        except CurrencyExchangeRate.DoesNotExist:
+            CurrencyExchangeRate(
+                from_currency=exchange_rate.from_currency,
+                to_currency=exchange_rate.to_currency,
+                date=exchange_rate.date,
+                rate=exchange_rate.rate,
+            ).save()
+        else:
+            stored_exchange_rate.rate = exchange_rate.rate
+            stored_exchange_rate.save()
+
+
+def upsert(exchange_rates, batch_size):
+    with ExchangeRateWriter(batch_size) as write_exchange_rate:
+        for exchange_rate in exchange_rates:
+            write_exchange_rate(exchange_rate)
+
+
+@pytest.mark.parametrize(
+    "write",
+    [
+        save_one_by_one,
+        lambda exchange_rates: upsert(exchange_rates, 100),
+        lambda exchange_rates: upsert(exchange_rates, 1000),
+        lambda exchange_rates: upsert(exchange_rates, 5000),
+    ],
+    ids=["one_by_one", "upsert_100", "upsert_1000", "upsert_5000"],
+)
+@pytest.mark.parametrize("stored", [False, True], ids=["insert", "update"])
+def test_writing_exchange_rates(exchange_rates, write, stored, report):
+    if stored:
+        CurrencyExchangeRate.objects.bulk_create(
+            [
+                CurrencyExchangeRate(
+                    date=item.date, from_currency=item.from_currency, to_currency=item.to_currency, rate=1.2
+                )
+                for item in exchange_rates
+            ],
+            batch_size=5000,
+        )
+
+    duration = measure(lambda: write(exchange_rates), repeat=1)
+
+    assert CurrencyExchangeRate.objects.count() == len(exchange_rates)
+
+    report(f"{len(exchange_rates) / duration:,.0f} rows/s")
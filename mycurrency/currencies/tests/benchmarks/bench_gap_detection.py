@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+
+from conftest import measure
+import pytest
+
+from currencies.exchange_rate_provider import TIME_RESOLUTION, find_missing_exchange_rates
+from currencies.models import Currency, CurrencyExchangeRate
+
+pytestmark = pytest.mark.django_db
+
+FIRST_DATE = date(2020, 1, 1)
+DAYS = 3 * 365
+CURRENCIES = 20
+
+
+@pytest.fixture
+def stored_exchange_rates(currency):
+    to_currencies = [
+        Currency.objects.create(code=f"X{index:02}", name=f"Currency {index}") for index in range(CURRENCIES)
+    ]
+    to_currencies += [currency["USD"], currency["GBP"], currency["CHF"]]
+    CurrencyExchangeRate.objects.bulk_create(
+        (
+            CurrencyExchangeRate(
+                date=FIRST_DATE + timedelta(days=day), from_currency=currency["EUR"], to_currency=to_currency, rate=1.5
+            )
+            for day in range(DAYS)
+            for index, to_currency in enumerate(to_currencies)
+            if day % 100 or index % 2  # every 100th day misses half of the currencies
+        ),
+        batch_size=5000,
+    )
+
+
+def python_scan(from_currency, from_date, to_date):
+    """The former way: diffing the sets of currencies per date over every stored row."""
+
+    gaps = []
+    all_to_currencies = set(Currency.objects.exclude(pk=from_currency.pk))
+    last_date = from_date - TIME_RESOLUTION
+    to_currencies = set()
+
+    for exchange_rate in (
+        CurrencyExchangeRate.objects.filter(date__range=(from_date, to_date), from_currency=from_currency)
+        .select_related("to_currency")
+        .order_by("date")
+    ):
+        if exchange_rate.date != last_date and last_date >= from_date:
+            if to_currencies != all_to_currencies:
+                gaps.append((last_date, last_date, all_to_currencies - to_currencies))
+
+            to_currencies = set()
+
+        last_date = exchange_rate.date
+        to_currencies.add(exchange_rate.to_currency)
+
+    if to_currencies != all_to_currencies:
+        gaps.append((last_date, last_date, all_to_currencies - to_currencies))
+
+    return gaps
+
+
+@pytest.mark.parametrize("detect", [python_scan, find_missing_exchange_rates], ids=["python_scan", "sql"])
+def test_gap_detection_on_multi_year_table(currency, stored_exchange_rates, detect, report):
+    last_date = FIRST_DATE + timedelta(days=DAYS - 1)
+
+    assert len(detect(currency["EUR"], FIRST_DATE, last_date)) == (DAYS + 99) // 100
+
+    duration = measure(lambda: detect(currency["EUR"], FIRST_DATE, last_date), repeat=3)
+
+    report(f"{DAYS} days x {CURRENCIES + 3} currencies scanned in {duration * 1000:.0f} ms")
@@ -0,0 +1,32 @@
+from datetime import date
+from importlib import import_module
+
+from conftest import measure
+import pytest
+import requests
+
+from currencies.http_session import get_http_session
+
+pytestmark = pytest.mark.django_db
+
+REPEAT = 200
+
+
+@pytest.fixture
+def currency_beacon(monkeypatch, stub_server):
+    monkeypatch.setenv("CURRENCY_BEACON_API_KEY", "benchmark")
+    plugin = import_module("providers.CurrencyBeacon")
+    monkeypatch.setattr(plugin, "URL", f"http://127.0.0.1:{stub_server.server_address[1]}/")
+
+    return plugin.Provider()
+
+
+@pytest.mark.parametrize("pooled", [False, True], ids=["requests_get", "pooled_session"])
+def test_provider_requests_against_stub_server(currency_beacon, stub_server, pooled, report):
+    currency_beacon.session = get_http_session() if pooled else requests
+
+    duration = measure(lambda: currency_beacon.get_exchange_rate_data("EUR", "USD", date(2015, 10, 21)), REPEAT)
+
+    report(f"{duration * 1e3:.2f} ms/request, {stub_server.connections} connections for {REPEAT} requests")
+
+    get_http_session.close()
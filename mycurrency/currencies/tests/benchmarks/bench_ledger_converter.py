@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+from io import StringIO
+import random
+
+from conftest import measure
+import pytest
+
+from currencies.ledger_converter import convert_ledger
+from currencies.models import Currency, CurrencyExchangeRate
+
+pytestmark = pytest.mark.django_db
+
+FIRST_DATE = date(2023, 1, 1)
+DAYS = 365
+CURRENCIES = 20
+ROWS = 100_000
+
+
+@pytest.fixture
+def ledger(currency):
+    from_currencies = [
+        Currency.objects.create(code=f"X{index:02}", name=f"Currency {index}") for index in range(CURRENCIES)
+    ]
+    CurrencyExchangeRate.objects.bulk_create(
+        [
+            CurrencyExchangeRate(
+                date=FIRST_DATE + timedelta(days=day),
+                from_currency=from_currency,
+                to_currency=currency["USD"],
+                rate=1.5,
+            )
+            for day in range(DAYS)
+            for from_currency in from_currencies
+        ],
+        batch_size=5000,
+    )
+    rows = sorted(
+        (FIRST_DATE + timedelta(days=random.randrange(DAYS)), f"X{random.randrange(CURRENCIES):02}")
+        for _ in range(ROWS)
+    )
+
+    return "date,currency,amount\n" + "".join(
+        f"{_date},{code},{random.randrange(100_000) / 100}\n" for _date, code in rows
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1000, 10_000, 100_000])
+def test_converting_a_ledger(ledger, chunk_size, report):
+    duration = measure(lambda: convert_ledger(StringIO(ledger), StringIO(), "USD", chunk_size), repeat=1)
+
+    report(f"{ROWS / duration:,.0f} rows/s")
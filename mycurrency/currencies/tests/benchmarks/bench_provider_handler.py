@@ -0,0 +1,27 @@
+from datetime import date
+
+from conftest import measure, mock_provider
+import pytest
+
+from currencies.exchange_rate_provider import ProviderHandler, get_provider_handler
+
+pytestmark = pytest.mark.django_db
+
+PLUGIN_CODE = """
+class Provider:
+    def get_exchange_rate_data(self, from_currency, to_currency, date):
+        return 1.234567
+"""
+REPEAT = 200
+
+
+def test_per_request_overhead_of_provider_handler(currency, report):
+    args = (currency["EUR"], currency["USD"], date(2015, 10, 21))
+
+    with mock_provider("bench_1", PLUGIN_CODE, priority=1), mock_provider("bench_2", PLUGIN_CODE, priority=2):
+        fresh = measure(lambda: ProviderHandler()(*args), REPEAT)
+        cached = measure(lambda: get_provider_handler()(*args), REPEAT)
+
+    report(f"fresh handler {fresh * 1e6:.1f} us/request, cached handler {cached * 1e6:.1f} us/request")
+
+    assert cached < fresh
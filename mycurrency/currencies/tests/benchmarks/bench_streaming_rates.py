@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+import tracemalloc
+
+import pytest
+
+from currencies.models import CurrencyExchangeRate
+
+pytestmark = pytest.mark.django_db
+
+URL = "/currencies/rates/"
+FIRST_DATE = date(2020, 1, 1)
+
+
+@pytest.fixture
+def stored_exchange_rates(currency):
+    CurrencyExchangeRate.objects.bulk_create(
+        CurrencyExchangeRate(
+            date=FIRST_DATE + timedelta(days=day), from_currency=currency["EUR"], to_currency=to_currency, rate=1.5
+        )
+        for day in range(1000)
+        for to_currency in currency.values()
+        if to_currency != currency["EUR"]
+    )
+
+
+def peak_memory(client, days: int, output: str) -> int:
+    parameters = {
+        "from_date": FIRST_DATE.isoformat(),
+        "to_date": (FIRST_DATE + timedelta(days=days - 1)).isoformat(),
+        "from_currency": "EUR",
+        "output": output,
+    }
+    tracemalloc.start()
+
+    response = client.get(URL, parameters)
+    for _ in response.streaming_content if response.streaming else [response.content]:
+        pass
+
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return peak
+
+
+@pytest.mark.parametrize("output", ["json", "json-stream", "ndjson"])
+def test_peak_memory_by_date_range(client, stored_exchange_rates, output, report):
+    peak_memory(client, 10, output)  # warm-up
+    peaks = {days: peak_memory(client, days, output) for days in (200, 1000)}
+
+    report(", ".join(f"{days} days: {peak / 1024:.0f} KiB peak" for days, peak in peaks.items()))
@@ -0,0 +1,65 @@
+"""
+Benchmarks are not collected with the tests, run them explicitly, e.g.:
+```
+pytest currencies/tests/benchmarks/bench_*.py
+```
+"""
+
+from collections.abc import Callable
+from contextlib import contextmanager
+from shutil import rmtree
+import time
+
+from django.conf import settings
+import pytest
+
+from currencies.models import Provider
+
+_results = []
+
+
+def measure(func: Callable, repeat: int) -> float:
+    """Returns the average duration of a call in seconds."""
+
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        func()
+
+    return (time.perf_counter() - start) / repeat
+
+
+@pytest.fixture
+def report(request):
+    """Collects a benchmark result line for the terminal summary."""
+
+    return lambda message: _results.append(f"{request.node.name}: {message}")
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _results:
+        terminalreporter.section("benchmark results")
+
+        for line in _results:
+            terminalreporter.write_line(line)
+
+
+@contextmanager
+def mock_provider(name: str, plugin_code: str, priority: int = 1):
+    """Installs and activates a provider plugin with the given source code."""
+
+    plugin_path = settings.BASE_DIR / settings.PROVIDERS_PKG / name
+    plugin = None
+    try:
+        plugin_path.mkdir(exist_ok=True)
+
+        with open(plugin_path / "__init__.py", "w+") as plugin_file:
+            plugin_file.write(plugin_code)
+
+        plugin = Provider.objects.create(name=name, priority=priority)
+
+        yield plugin
+
+    finally:
+        plugin and plugin.delete()
+        rmtree(plugin_path)
@@ -1,7 +1,16 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+
 import pytest
 from rest_framework.test import APIClient
 
+from currencies.exchange_rate_cache import latest_exchange_rate_cache
+from currencies.exchange_rate_provider import get_provider_handler
 from currencies.models import Currency
+from currencies.provider_health import provider_health
+from currencies.rate_snapshot import rate_snapshot
+from currencies.rate_store import rate_store
 
 
 # Override the client fixture of django-pytest with the one of DRF:
@@ -21,3 +30,90 @@ def currency():
             ("GBP", "British Pound"),
         ]
     }
+
+
+@pytest.fixture(autouse=True)
+def provider_handler_registry():
+    """Prevents a provider handler cached by a previous test from leaking into the next one."""
+
+    get_provider_handler.invalidate()
+
+    yield get_provider_handler
+
+    get_provider_handler.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def exchange_rate_cache():
+    latest_exchange_rate_cache.clear()
+
+    yield latest_exchange_rate_cache
+
+    latest_exchange_rate_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def provider_health_registry():
+    """Prevents the provider health recorded by a previous test from tripping the circuit in the next one."""
+
+    provider_health.clear()
+
+    yield provider_health
+
+    provider_health.clear()
+
+
+@pytest.fixture(autouse=True)
+def rate_snapshot_holder():
+    rate_snapshot.clear()
+
+    yield rate_snapshot
+
+    rate_snapshot.clear()
+
+
+@pytest.fixture(autouse=True)
+def rate_store_holder():
+    rate_store.clear()
+
+    yield rate_store
+
+    rate_store.clear()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers rates in CurrencyBeacon format, counting the connections and replaying the queued statuses."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):  # noqa: N802
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        body = json.dumps({"rates": {"USD": 1.5}}).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.connections = 0
+    server.statuses = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
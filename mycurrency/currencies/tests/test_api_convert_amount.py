@@ -1,6 +1,6 @@
 from datetime import date
 from decimal import Decimal
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 from rest_framework import status
@@ -35,7 +35,7 @@ def test_success_retrieving_from_database(client, exchange_rates):
 
     with (
         patch("currencies.exchange_rate_provider.date") as _date,
-        patch("currencies.exchange_rate_provider.ProviderHandler", spec_set=True, return_value=None),
+        patch("currencies.exchange_rate_provider.get_provider_handler", return_value=Mock(return_value=None)),
     ):
         _date.today.return_value = exchange_rates[2].date
 
@@ -50,14 +50,16 @@ def test_success_retrieving_from_provider(client, exchange_rates):
 
     with (
         patch("currencies.exchange_rate_provider.date") as _date,
-        patch("currencies.exchange_rate_provider.ProviderHandler", spec_set=True) as provider_handler,
+        patch("currencies.exchange_rate_provider.get_provider_handler", spec_set=True) as provider_handler,
     ):
         _date.today.return_value = date(2015, 10, 21)
-        provider_handler.return_value.side_effect = lambda from_currency, to_currency, date: CurrencyExchangeRate(
-            date=date,
-            from_currency=from_currency,
-            to_currency=to_currency,
-            rate=Decimal("12.34"),
+        provider_handler.return_value.side_effect = (
+            lambda from_currency, to_currency, date, unavailable=None: CurrencyExchangeRate(
+                date=date,
+                from_currency=from_currency,
+                to_currency=to_currency,
+                rate=Decimal("12.34"),
+            )
         )
 
         response = client.get(URL, parameters)
@@ -72,14 +74,16 @@ def test_success_retrieving_from_database_updated_with_provider(client, exchange
 
     with (
         patch("currencies.exchange_rate_provider.date") as _date,
-        patch("currencies.exchange_rate_provider.ProviderHandler", spec_set=True) as provider_handler,
+        patch("currencies.exchange_rate_provider.get_provider_handler", spec_set=True) as provider_handler,
     ):
         _date.today.return_value = exchange_rates[2].date
-        provider_handler.return_value.side_effect = lambda from_currency, to_currency, date: CurrencyExchangeRate(
-            date=date,
-            from_currency=from_currency,
-            to_currency=to_currency,
-            rate=provider_rate,
+        provider_handler.return_value.side_effect = (
+            lambda from_currency, to_currency, date, unavailable=None: CurrencyExchangeRate(
+                date=date,
+                from_currency=from_currency,
+                to_currency=to_currency,
+                rate=provider_rate,
+            )
         )
 
         response = client.get(URL, parameters)
@@ -95,7 +99,7 @@ def test_no_data_available(client, exchange_rates):
 
     with (
         patch("currencies.exchange_rate_provider.date") as _date,
-        patch("currencies.exchange_rate_provider.ProviderHandler", spec_set=True, return_value=None),
+        patch("currencies.exchange_rate_provider.get_provider_handler", return_value=Mock(return_value=None)),
     ):
         _date.today.return_value = date(2015, 10, 21)
 
@@ -0,0 +1,119 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from rest_framework import status
+
+from currencies.models import CurrencyExchangeRate
+
+pytestmark = pytest.mark.django_db
+
+URL = "/currencies/convert/batch/"
+DATE = date(2023, 10, 15)
+
+
+@pytest.fixture
+def exchange_rates(currency):
+    return [
+        CurrencyExchangeRate.objects.create(
+            date=DATE, from_currency=currency["EUR"], to_currency=currency[to_currency], rate=rate
+        )
+        for to_currency, rate in [("USD", Decimal("1.05")), ("CHF", Decimal("0.95")), ("GBP", Decimal("0.87"))]
+    ]
+
+
+@pytest.fixture
+def provider_handler():
+    with patch("currencies.exchange_rate_provider.get_provider_handler", spec_set=True) as provider_handler:
+        provider_handler.return_value.side_effect = (
+            lambda from_currency, to_currency, date, unavailable=None: CurrencyExchangeRate(
+                date=date, from_currency=from_currency, to_currency=to_currency, rate=Decimal("1.1")
+            )
+        )
+
+        yield provider_handler.return_value
+
+
+def test_results_shall_be_in_input_order_resolving_each_rate_once(client, exchange_rates, provider_handler):
+    conversions = [
+        {"from_currency": "USD", "to_currency": "EUR", "amount": "10"},
+        {"from_currency": "EUR", "to_currency": "USD", "amount": "100", "date": DATE.isoformat()},
+        {"from_currency": "USD", "to_currency": "EUR", "amount": "20.50"},
+        {"from_currency": "EUR", "to_currency": "GBP", "amount": "1000", "date": DATE.isoformat()},
+        {"from_currency": "USD", "to_currency": "EUR", "amount": 3},
+    ]
+
+    response = client.post(URL, {"conversions": conversions}, format="json")
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.data["results"] == [
+        {"from_currency": "USD", "to_currency": "EUR", "amount": "11.00", "rate": "1.100000"},
+        {
+            "from_currency": "EUR",
+            "to_currency": "USD",
+            "amount": "105.00",
+            "rate": "1.050000",
+            "date": "2023-10-15",
+            "rate_date": "2023-10-15",
+        },
+        {"from_currency": "USD", "to_currency": "EUR", "amount": "22.55", "rate": "1.100000"},
+        {
+            "from_currency": "EUR",
+            "to_currency": "GBP",
+            "amount": "870.00",
+            "rate": "0.870000",
+            "date": "2023-10-15",
+            "rate_date": "2023-10-15",
+        },
+        {"from_currency": "USD", "to_currency": "EUR", "amount": "3.30", "rate": "1.100000"},
+    ]
+    assert provider_handler.call_count == 1
+    assert not provider_handler.get_exchange_rates.called
+
+
+def test_stored_historical_rates_shall_be_read_in_one_go(
+    client, exchange_rates, provider_handler, django_assert_max_num_queries
+):
+    conversions = [
+        {"from_currency": "EUR", "to_currency": to_currency, "amount": "1", "date": DATE.isoformat()}
+        for to_currency in ["USD", "CHF", "GBP"] * 10
+    ]
+
+    with django_assert_max_num_queries(6):
+        response = client.post(URL, {"conversions": conversions}, format="json")
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert [result["rate"] for result in response.data["results"][:3]] == ["1.050000", "0.950000", "0.870000"]
+    assert not provider_handler.called
+
+
+def test_failed_conversions_shall_have_their_errors(client, exchange_rates, provider_handler):
+    provider_handler.side_effect = None
+    provider_handler.return_value = None
+    conversions = [
+        {"from_currency": "EUR", "to_currency": "USD", "amount": "10", "date": DATE.isoformat()},
+        {"from_currency": "EUR", "to_currency": "HUF", "amount": "10"},
+        {"from_currency": "EUR", "to_currency": "USD", "amount": "-5"},
+        {"from_currency": "EUR", "to_currency": "USD", "amount": "10", "date": str(date.today() + timedelta(days=1))},
+        {"from_currency": "USD", "to_currency": "CHF", "amount": "10"},
+    ]
+
+    response = client.post(URL, {"conversions": conversions}, format="json")
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    results = response.data["results"]
+
+    assert results[0]["amount"] == "10.50"
+    assert results[1] == {"error": "Invalid currency."}
+    assert "amount" in results[2]["error"]
+    assert "date" in results[3]["error"]
+    assert results[4] == {"error": "Exchange rate is not available."}
+
+
+@pytest.mark.parametrize("conversions", [[], "EUR", [{"from_currency": "EUR"}] * 10001])
+def test_invalid_batch_shall_be_rejected(client, conversions):
+    response = client.post(URL, {"conversions": conversions}, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "conversions" in response.data
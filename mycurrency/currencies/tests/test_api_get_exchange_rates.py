@@ -1,5 +1,7 @@
 from datetime import date
-from unittest.mock import patch
+from decimal import Decimal
+import json
+from unittest.mock import Mock, patch
 
 import pytest
 from rest_framework import status
@@ -36,12 +38,12 @@ def exchange_rates(currency):
 def test_success(client, exchange_rates, currency):
     parameters = {"from_date": "2023-10-26", "to_date": "2023-10-27", "from_currency": "EUR"}
 
-    with patch("currencies.exchange_rate_provider.ProviderHandler", spec_set=True) as provider_handler:
-        provider_handler.return_value.side_effect = lambda from_currency, to_currency, date: CurrencyExchangeRate(
-            date=date,
-            from_currency=from_currency,
-            to_currency=to_currency,
-            rate=12.34,
+    with patch("currencies.exchange_rate_provider.get_provider_handler", spec_set=True) as provider_handler:
+        provider_handler.return_value.get_exchange_rates.side_effect = (
+            lambda from_currency, to_currencies, date, unavailable=None: [
+                CurrencyExchangeRate(date=date, from_currency=from_currency, to_currency=to_currency, rate=12.34)
+                for to_currency in to_currencies
+            ]
         )
 
         response = client.get(URL, parameters)
@@ -73,7 +75,10 @@ def test_success(client, exchange_rates, currency):
 def test_no_data_in_requested_interval(client):
     parameters = {"from_date": "2023-10-28", "to_date": "2023-10-29", "from_currency": "EUR"}
 
-    with patch("currencies.exchange_rate_provider.ProviderHandler", spec_set=True, return_value=None):
+    with patch(
+        "currencies.exchange_rate_provider.get_provider_handler",
+        return_value=Mock(**{"get_exchange_rates.return_value": []}),
+    ):
         response = client.get(URL, parameters)
 
     assert response.status_code == status.HTTP_200_OK
@@ -97,3 +102,126 @@ def test_invalid_date_format(client):
     assert response.status_code == status.HTTP_400_BAD_REQUEST
     assert "from_date" in response.data
     assert "to_date" in response.data
+
+
+@pytest.fixture
+def provider_handler():
+    with patch("currencies.exchange_rate_provider.get_provider_handler", spec_set=True) as provider_handler:
+        provider_handler.return_value.get_exchange_rates.side_effect = (
+            lambda from_currency, to_currencies, date, unavailable=None: [
+                CurrencyExchangeRate(date=date, from_currency=from_currency, to_currency=to_currency, rate=12.34)
+                for to_currency in to_currencies
+            ]
+        )
+
+        yield provider_handler
+
+
+@pytest.mark.parametrize(
+    "output, content_type, parse",
+    [
+        ("json-stream", "application/json", json.loads),
+        ("ndjson", "application/x-ndjson", lambda content: [json.loads(line) for line in content.splitlines()]),
+    ],
+)
+def test_streaming_output_shall_contain_the_same_data(
+    client, exchange_rates, provider_handler, output, content_type, parse
+):
+    parameters = {"from_date": "2023-10-24", "to_date": "2023-10-27", "from_currency": "EUR"}
+    expected = client.get(URL, parameters).data
+
+    response = client.get(URL, parameters | {"output": output})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    assert response["Content-Type"] == content_type
+    assert parse(b"".join(response.streaming_content)) == expected
+
+
+def test_streaming_empty_interval_shall_be_an_empty_array(client, provider_handler):
+    provider_handler.return_value.get_exchange_rates.side_effect = lambda *args: []
+    parameters = {"from_date": "2023-10-28", "to_date": "2023-10-29", "from_currency": "EUR", "output": "json-stream"}
+
+    response = client.get(URL, parameters)
+
+    assert json.loads(b"".join(response.streaming_content)) == []
+
+
+def test_streaming_shall_consume_the_exchange_rates_lazily(client, currency):
+    consumed_dates = []
+
+    def provide_exchange_rates(from_currency, from_date, to_date):
+        for day in range(1, 31):
+            consumed_dates.append(day)
+
+            yield CurrencyExchangeRate(
+                date=date(2023, 10, day), from_currency=from_currency, to_currency=currency["USD"], rate=1
+            )
+
+    parameters = {"from_date": "2023-10-01", "to_date": "2023-10-30", "from_currency": "EUR", "output": "ndjson"}
+
+    with patch("currencies.views.provide_exchange_rates", side_effect=provide_exchange_rates):
+        response = client.get(URL, parameters)
+        content = iter(response.streaming_content)
+
+        assert json.loads(next(content))["date"] == "2023-10-01"
+        assert len(consumed_dates) == 2  # the first date is complete when the second one arrives
+
+        assert len(list(content)) == 29
+
+
+def test_invalid_output(client):
+    parameters = {"from_date": "2023-10-26", "to_date": "2023-10-27", "from_currency": "EUR", "output": "xml"}
+
+    response = client.get(URL, parameters)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "output" in response.data
+
+
+def test_columnar_json_output(client, exchange_rates, provider_handler):
+    parameters = {"from_date": "2023-10-26", "to_date": "2023-10-27", "from_currency": "EUR", "output": "columnar-json"}
+
+    with patch.object(CurrencyExchangeRate, "from_db") as from_db:
+        response = client.get(URL, parameters)
+        content = b"".join(response.streaming_content)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "application/json"
+    assert json.loads(content, parse_float=Decimal) == {
+        "from_currency": "EUR",
+        "currencies": ["CHF", "GBP", "USD"],
+        "dates": ["2023-10-26", "2023-10-27"],
+        "rates": [
+            [Decimal("12.34"), Decimal("0.87"), Decimal("0.95")],
+            [Decimal("12.34"), Decimal("0.88"), Decimal("0.96")],
+        ],
+    }
+    assert not from_db.called  # no model is instantiated for the stored rates
+
+
+def test_columnar_csv_output_with_missing_rates(client, exchange_rates, provider_handler):
+    provider_handler.return_value.get_exchange_rates.side_effect = lambda *args: []
+    parameters = {"from_date": "2023-10-24", "to_date": "2023-10-27", "from_currency": "EUR", "output": "columnar-csv"}
+
+    response = client.get(URL, parameters)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "text/csv"
+    assert b"".join(response.streaming_content).decode() == (
+        "date,CHF,GBP,USD\n2023-10-25,0.940000,,\n2023-10-26,,0.870000,0.950000\n2023-10-27,,0.880000,0.960000\n"
+    )
+
+
+def test_columnar_json_output_of_empty_interval(client, provider_handler):
+    provider_handler.return_value.get_exchange_rates.side_effect = lambda *args: []
+    parameters = {"from_date": "2023-10-28", "to_date": "2023-10-29", "from_currency": "EUR", "output": "columnar-json"}
+
+    response = client.get(URL, parameters)
+
+    assert json.loads(b"".join(response.streaming_content)) == {
+        "from_currency": "EUR",
+        "currencies": ["CHF", "GBP", "USD"],
+        "dates": [],
+        "rates": [],
+    }
@@ -0,0 +1,136 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from django.contrib import admin
+from django.core.management import CommandError, call_command
+import pytest
+
+from currencies.exchange_rate_provider import ProviderHandler
+from currencies.models import BackfillChunk, BackfillJob, CurrencyExchangeRate, Provider
+
+pytestmark = pytest.mark.django_db
+
+DATE = date(2023, 10, 16)
+RATES = {"EUR": Decimal("0.9"), "USD": Decimal("1.1"), "CHF": Decimal("0.95"), "GBP": Decimal("0.8")}
+
+
+@pytest.fixture(autouse=True)
+def plugin():
+    """Creates a mock provider plugin answering the cross rates of `RATES` except for CHF to GBP."""
+
+    def get_exchange_rate_data(from_currency, to_currency, date):
+        if (from_currency, to_currency) != ("CHF", "GBP"):
+            return RATES[to_currency] / RATES[from_currency]
+
+    plugin = Mock(spec_set=["get_exchange_rate_data", "session"])
+    plugin.get_exchange_rate_data.side_effect = get_exchange_rate_data
+
+    with patch.object(ProviderHandler, "_import_provider", return_value=Mock(Provider=Mock(return_value=plugin))):
+        Provider.objects.create(name="mock_1", priority=1)
+
+        yield plugin
+
+
+def load_historical_data(*args) -> str:
+    stdout = StringIO()
+    call_command("load_historical_data", "--workers", "1", *args, stdout=stdout)
+
+    return stdout.getvalue()
+
+
+def load_range(*args) -> str:
+    return load_historical_data(
+        "--from-date", DATE.isoformat(), "--to-date", (DATE + timedelta(days=1)).isoformat(), *args
+    )
+
+
+def test_job_shall_record_the_chunks_and_the_progress(currency):
+    load_range("--base", "CHF", "EUR")
+
+    job = BackfillJob.objects.get()
+
+    assert job.status == BackfillJob.Status.COMPLETED
+    assert (job.from_date, job.to_date, job.base_currencies, job.symbols) == (
+        DATE,
+        DATE + timedelta(days=1),
+        ["CHF", "EUR"],
+        [],
+    )
+    assert job.total_chunks == 4
+    assert (job.rows, job.failures, job.skipped) == (10, 2, 0)
+    assert job.duration > timedelta()
+    assert set(job.chunks.values_list("date", "base_currency__code", "rows", "failures")) == {
+        (DATE, "CHF", 2, 1),
+        (DATE, "EUR", 3, 0),
+        (DATE + timedelta(days=1), "CHF", 2, 1),
+        (DATE + timedelta(days=1), "EUR", 3, 0),
+    }
+
+
+def test_interrupted_job_shall_be_resumed_from_its_checkpoint(currency, plugin, settings):
+    settings.EXCHANGE_RATE_WRITE_BATCH_SIZE = 4
+    get_exchange_rate_data = plugin.get_exchange_rate_data.side_effect
+
+    def get_exchange_rate_data_until_interrupted(*args):
+        if plugin.get_exchange_rate_data.call_count > 7:
+            raise KeyboardInterrupt
+
+        return get_exchange_rate_data(*args)
+
+    plugin.get_exchange_rate_data.side_effect = get_exchange_rate_data_until_interrupted
+
+    with pytest.raises(KeyboardInterrupt):
+        load_range()
+
+    job = BackfillJob.objects.get()
+
+    assert job.status == BackfillJob.Status.INTERRUPTED
+    assert set(job.chunks.values_list("date", "base_currency__code")) == {(DATE, "CHF"), (DATE, "EUR")}
+
+    plugin.get_exchange_rate_data.side_effect = get_exchange_rate_data
+    plugin.get_exchange_rate_data.reset_mock()
+    output = load_historical_data("--resume", str(job.pk))
+    job.refresh_from_db()
+
+    assert {call.args[0] for call in plugin.get_exchange_rate_data.call_args_list if call.args[2] == DATE} == {
+        "GBP",
+        "USD",
+    }
+    assert plugin.get_exchange_rate_data.call_count == 24 - 7  # the rates stored before the interruption are kept
+    assert job.status == BackfillJob.Status.COMPLETED
+    assert (job.total_chunks, job.chunks.count()) == (8, 8)
+    assert CurrencyExchangeRate.objects.count() == 22
+    assert (job.rows, job.failures) == (21, 2)  # the rate stored in an unfinished chunk is skipped on resuming
+    assert f"Backfill job {job.pk} completed" in output
+
+
+def test_status_shall_report_the_throughput_and_the_eta(currency):
+    job = BackfillJob.objects.create(
+        from_date=DATE, to_date=DATE + timedelta(days=1), total_chunks=8, rows=60, duration=timedelta(seconds=30)
+    )
+    BackfillChunk.objects.bulk_create(
+        BackfillChunk(job=job, date=DATE, base_currency=currency[code], rows=3, failures=0) for code in ["EUR", "USD"]
+    )
+
+    output = load_historical_data("--status")
+
+    assert f"Backfill job {job.pk} running" in output
+    assert "chunks 2/8, rows 60, failures 0, skipped 0, 2.0 rows/s, ETA 90s" in output
+
+
+def test_status_of_a_missing_job_shall_be_an_error(currency):
+    with pytest.raises(CommandError, match="No backfill job 7"):
+        load_historical_data("--status", "7")
+
+
+def test_resumed_job_shall_keep_its_parameters(currency):
+    load_historical_data(DATE.isoformat())
+
+    with pytest.raises(CommandError, match="keeps its dates and currencies"):
+        load_historical_data("--resume", "1", "--base", "EUR")
+
+
+def test_jobs_shall_be_visible_in_the_admin():
+    assert admin.site.is_registered(BackfillJob)
@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from unittest.mock import patch
+
+from django.db import connection
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from currencies.exchange_rate_provider import ExchangeRateLoader
+from currencies.models import CurrencyExchangeRate
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+URL = "/currencies/rates/"
+PARAMETERS = {"from_date": "2023-10-16", "to_date": "2023-10-25", "from_currency": "EUR"}
+DAYS = 10
+REQUESTS = 4
+
+
+@pytest.fixture
+def calls_in_transaction(currency):
+    """Makes the provider answer slowly, recording whether the requesting thread had a transaction open
+    while the loader was dispatching the calls to the provider threads and waiting for them.
+    """
+
+    calls_in_transaction = []
+    lock = threading.Lock()
+    fetch_in_date_order = ExchangeRateLoader._fetch_in_date_order
+
+    def record_fetch_in_date_order(self, *args):
+        exchange_rates = fetch_in_date_order(self, *args)
+
+        while True:
+            with lock:
+                calls_in_transaction.append(connection.in_atomic_block)
+
+            try:
+                yield next(exchange_rates)
+            except StopIteration:
+                return
+
+    def get_exchange_rates(from_currency, to_currencies, date, unavailable=None):
+        time.sleep(0.01)
+
+        return [
+            CurrencyExchangeRate(date=date, from_currency=from_currency, to_currency=to_currency, rate="1.5")
+            for to_currency in to_currencies
+        ]
+
+    with patch("currencies.exchange_rate_provider.get_provider_handler", spec_set=True) as provider_handler:
+        provider_handler.return_value.get_exchange_rates.side_effect = get_exchange_rates
+
+        with patch.object(ExchangeRateLoader, "_fetch_in_date_order", record_fetch_in_date_order):
+            yield calls_in_transaction
+
+
+def get_rates(_):
+    try:
+        return APIClient().get(URL, PARAMETERS)
+    finally:
+        connection.close()
+
+
+def test_providers_shall_not_be_called_in_a_transaction(client, calls_in_transaction):
+    response = client.get(URL, PARAMETERS)
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert calls_in_transaction == [False] * (DAYS + 1)
+
+
+def test_simultaneous_requests_shall_fill_the_same_gaps_without_conflict(calls_in_transaction):
+    with ThreadPoolExecutor(REQUESTS) as executor:
+        responses = list(executor.map(get_rates, range(REQUESTS)))
+
+    assert [response.status_code for response in responses] == [status.HTTP_200_OK] * REQUESTS
+    assert all(response.data == responses[0].data for response in responses)
+    assert len(responses[0].data) == DAYS
+    assert CurrencyExchangeRate.objects.count() == DAYS * 3
+    assert calls_in_transaction
+    assert not any(calls_in_transaction)
@@ -0,0 +1,153 @@
+from datetime import date
+from decimal import Decimal
+from functools import partial
+from unittest.mock import Mock, patch
+
+from django.core.management import call_command
+from django.test import override_settings
+import pytest
+
+from currencies.exchange_rate_provider import ExchangeRateLoader, ProviderHandler, derive_exchange_rates
+from currencies.models import CurrencyExchangeRate, Provider
+
+pytestmark = pytest.mark.django_db
+
+MUT = "currencies.exchange_rate_provider"
+DATE = date(2023, 10, 16)
+PIVOT_RATES = {"CHF": Decimal("0.9"), "EUR": Decimal("0.8"), "GBP": Decimal("0.75")}
+
+
+@pytest.fixture
+def pivot_rates(currency):
+    return [
+        CurrencyExchangeRate(date=DATE, from_currency=currency["USD"], to_currency=currency[code], rate=rate)
+        for code, rate in PIVOT_RATES.items()
+    ]
+
+
+def rates_of(exchange_rates) -> dict[str, tuple[Decimal, bool]]:
+    return {item.to_currency.code: (item.rate, item.derived) for item in exchange_rates}
+
+
+def test_cross_rates_and_inverse_shall_be_derived_from_pivot_rates(pivot_rates, currency):
+    exchange_rates = derive_exchange_rates(
+        currency["USD"], pivot_rates, currency["EUR"], [currency["USD"], currency["GBP"], currency["CHF"]]
+    )
+
+    assert rates_of(exchange_rates) == {
+        "CHF": (Decimal("1.125000"), True),
+        "GBP": (Decimal("0.937500"), True),
+        "USD": (Decimal("1.250000"), True),
+    }
+    assert [item.to_currency.code for item in exchange_rates] == ["CHF", "GBP", "USD"]
+    assert {(item.from_currency, item.date) for item in exchange_rates} == {(currency["EUR"], DATE)}
+
+
+def test_derived_rates_shall_be_rounded_to_exchange_rate_precision(currency):
+    pivot_rates = [
+        CurrencyExchangeRate(date=DATE, from_currency=currency["USD"], to_currency=currency["EUR"], rate=Decimal(3)),
+        CurrencyExchangeRate(date=DATE, from_currency=currency["USD"], to_currency=currency["GBP"], rate=Decimal(2)),
+    ]
+
+    exchange_rates = derive_exchange_rates(
+        currency["USD"], pivot_rates, currency["EUR"], [currency["GBP"], currency["USD"]]
+    )
+
+    assert rates_of(exchange_rates) == {"GBP": (Decimal("0.666667"), True), "USD": (Decimal("0.333333"), True)}
+
+
+def test_rates_from_pivot_currency_shall_be_direct(pivot_rates, currency):
+    exchange_rates = derive_exchange_rates(currency["USD"], pivot_rates, currency["USD"], [currency["EUR"]])
+
+    assert rates_of(exchange_rates) == {"EUR": (PIVOT_RATES["EUR"], False)}
+
+
+def test_nothing_is_derived_without_pivot_rate_of_base_currency(pivot_rates, currency):
+    assert derive_exchange_rates(currency["USD"], pivot_rates[:1], currency["EUR"], [currency["CHF"]]) == []
+
+
+def test_rates_missing_from_pivot_shall_be_skipped(pivot_rates, currency):
+    exchange_rates = derive_exchange_rates(
+        currency["USD"], pivot_rates[:2], currency["EUR"], [currency["CHF"], currency["GBP"]]
+    )
+
+    assert rates_of(exchange_rates) == {"CHF": (Decimal("1.125000"), True)}
+
+
+def test_provider_handler_shall_fetch_only_pivot_rates(pivot_rates, currency):
+    with (
+        patch.object(ProviderHandler, "__init__", return_value=None),
+        patch.object(ProviderHandler, "get_exchange_rates", return_value=pivot_rates) as get_exchange_rates,
+    ):
+        exchange_rates = ProviderHandler().get_cross_exchange_rates(
+            currency["USD"], currency["EUR"], [currency["CHF"], currency["GBP"], currency["USD"]], DATE
+        )
+
+    get_exchange_rates.assert_called_once_with(
+        currency["USD"], [currency["EUR"], currency["CHF"], currency["GBP"]], DATE, None, rounded=False
+    )
+    assert rates_of(exchange_rates) == {
+        "CHF": (Decimal("1.125000"), True),
+        "GBP": (Decimal("0.937500"), True),
+        "USD": (Decimal("1.250000"), True),
+    }
+
+
+def test_cross_rates_shall_be_derived_from_unrounded_pivot_rates(currency):
+    plugin = Mock(spec_set=["get_exchange_rates_data", "session"])
+    plugin.get_exchange_rates_data.return_value = {"EUR": "0.0066666", "USD": "0.0061234"}
+
+    with patch.object(ProviderHandler, "_import_provider", return_value=Mock(Provider=Mock(return_value=plugin))):
+        Provider.objects.create(name="mock_1", priority=1)
+
+        exchange_rates = ProviderHandler().get_cross_exchange_rates(
+            currency["CHF"], currency["EUR"], [currency["CHF"], currency["USD"]], DATE
+        )
+
+    assert rates_of(exchange_rates) == {"CHF": (Decimal("150.001500"), True), "USD": (Decimal("0.918519"), True)}
+
+
+def test_rates_from_pivot_currency_shall_be_rounded(currency):
+    pivot_rates = [
+        CurrencyExchangeRate(
+            date=DATE, from_currency=currency["USD"], to_currency=currency["EUR"], rate=Decimal("0.91851912")
+        )
+    ]
+
+    exchange_rates = derive_exchange_rates(currency["USD"], pivot_rates, currency["USD"], [currency["EUR"]])
+
+    assert rates_of(exchange_rates) == {"EUR": (Decimal("0.918519"), False)}
+    assert pivot_rates[0].rate == Decimal("0.91851912")
+
+
+@override_settings(CURRENCY_EXCHANGE_RATE_PIVOT="USD")
+def test_loader_shall_derive_rates_from_configured_pivot(pivot_rates, currency):
+    to_currencies = [currency["CHF"], currency["GBP"]]
+
+    with patch(MUT + ".get_provider_handler", spec_set=True) as provider_handler:
+        provider_handler.return_value.get_cross_exchange_rates.side_effect = partial(
+            ProviderHandler.get_cross_exchange_rates, provider_handler.return_value
+        )
+        provider_handler.return_value.get_exchange_rates.return_value = pivot_rates
+
+        with ExchangeRateLoader() as load_exchange_rates:
+            exchange_rates = list(load_exchange_rates(currency["EUR"], DATE, DATE, to_currencies))
+
+    assert rates_of(exchange_rates) == {"CHF": (Decimal("1.125000"), True), "GBP": (Decimal("0.937500"), True)}
+    assert rates_of(CurrencyExchangeRate.objects.all()) == rates_of(exchange_rates)
+
+
+def test_command_shall_derive_every_pair_from_pivot(pivot_rates, currency):
+    with patch("currencies.management.commands.load_historical_data.ProviderHandler") as provider_handler:
+        provider_handler.return_value.get_exchange_rates.return_value = pivot_rates
+
+        call_command("load_historical_data", DATE.isoformat(), "--pivot", "USD", stdout=None)
+
+    provider_handler.return_value.get_exchange_rates.assert_called_once()
+    assert CurrencyExchangeRate.objects.count() == len(currency) * (len(currency) - 1)
+    assert set(CurrencyExchangeRate.objects.filter(derived=False).values_list("from_currency__code", flat=True)) == {
+        "USD"
+    }
+    assert CurrencyExchangeRate.objects.get(
+        from_currency=currency["GBP"], to_currency=currency["CHF"], date=DATE
+    ).rate == Decimal("1.2")
@@ -1,6 +1,11 @@
 from datetime import date
-from unittest.mock import Mock, call, patch
+from decimal import Decimal
+import threading
+import time
+from unittest.mock import ANY, Mock, call, patch
 
+from django.conf import settings
+from django.test import override_settings
 import pytest
 
 from currencies.exchange_rate_provider import ExchangeRateLoader
@@ -13,16 +18,20 @@ pytestmark = pytest.mark.django_db
 
 @pytest.fixture
 def provider_handler(currency):
-    with patch(MUT + ".ProviderHandler", spec_set=True) as provider_handler:
+    with patch(MUT + ".get_provider_handler", spec_set=True) as provider_handler:
+        get_exchange_rates = provider_handler.return_value.get_exchange_rates
 
         def save(return_value):
-            provider_handler.return_value.side_effect.return_values.append(return_value)
+            get_exchange_rates.side_effect.return_values.extend(return_value)
             return return_value
 
-        provider_handler.return_value.side_effect = lambda from_currency, to_currency, date: save(
-            CurrencyExchangeRate(from_currency=from_currency, to_currency=to_currency, date=date, rate="12.34")
+        get_exchange_rates.side_effect = lambda from_currency, to_currencies, date, unavailable=None: save(
+            [
+                CurrencyExchangeRate(from_currency=from_currency, to_currency=to_currency, date=date, rate="12.34")
+                for to_currency in to_currencies
+            ]
         )
-        provider_handler.return_value.side_effect.return_values = []
+        get_exchange_rates.side_effect.return_values = []
 
         yield provider_handler
 
@@ -36,21 +45,17 @@ def test_yields_exchange_rates_for_given_currencies_from_provider(provider_handl
         )
 
         assert len(exchange_rates) == len(to_currencies) * 2  # number of to-currencies times number of days
-        assert exchange_rates == provider_handler.return_value.side_effect.return_values
-
-    assert provider_handler.return_value.call_args_list == [
-        call(currency["EUR"], currency["CHF"], date(2023, 10, 16)),
-        call(currency["EUR"], currency["GBP"], date(2023, 10, 16)),
-        call(currency["EUR"], currency["USD"], date(2023, 10, 16)),
-        call(currency["EUR"], currency["CHF"], date(2023, 10, 17)),
-        call(currency["EUR"], currency["GBP"], date(2023, 10, 17)),
-        call(currency["EUR"], currency["USD"], date(2023, 10, 17)),
+        assert exchange_rates == provider_handler.return_value.get_exchange_rates.side_effect.return_values
+
+    assert provider_handler.return_value.get_exchange_rates.call_args_list == [
+        call(currency["EUR"], to_currencies, date(2023, 10, 16), ANY),
+        call(currency["EUR"], to_currencies, date(2023, 10, 17), ANY),
     ]
-    assert len(exchange_rates) == provider_handler.return_value.call_count
 
 
 def test_yields_nothing_when_no_exchange_rate_is_provided(provider_handler: Mock, currency):
-    provider_handler.return_value.side_effect = provider_handler.return_value.return_value = None
+    provider_handler.return_value.get_exchange_rates.side_effect = None
+    provider_handler.return_value.get_exchange_rates.return_value = []
     to_currencies = [currency["CHF"], currency["GBP"], currency["USD"]]
 
     with ExchangeRateLoader() as load_exchange_rates:
@@ -58,15 +63,16 @@ def test_yields_nothing_when_no_exchange_rate_is_provided(provider_handler: Mock
             load_exchange_rates(currency["EUR"], date(2023, 10, 16), date(2023, 10, 17), to_currencies)
         )
 
-        # number of to-currencies times number of days
-        assert provider_handler.return_value.call_count == len(to_currencies) * 2
+        assert provider_handler.return_value.get_exchange_rates.call_count == 2  # number of days
         assert not exchange_rates
 
 
 def test_exchange_rates_shall_not_be_saved_under_bulk_limit_until_exit(provider_handler: Mock, currency):
     to_currencies = [currency["CHF"], currency["GBP"], currency["USD"]]
 
-    assert ExchangeRateLoader.MAX_BULK_SIZE > len(to_currencies) * 2  # number of to-currencies times number of days
+    assert (
+        settings.EXCHANGE_RATE_WRITE_BATCH_SIZE > len(to_currencies) * 2
+    )  # number of to-currencies times number of days
 
     with ExchangeRateLoader() as load_exchange_rates:
         exchange_rates = list(
@@ -85,12 +91,65 @@ def test_exchange_rates_shall_be_saved_when_bulk_limit_reached(provider_handler:
 
     assert bulk_limit < len(to_currencies) * 2  # number of to-currencies times number of days
 
-    with patch(MUT + ".ExchangeRateLoader.MAX_BULK_SIZE", new=bulk_limit), ExchangeRateLoader() as load_exchange_rates:
+    with override_settings(EXCHANGE_RATE_WRITE_BATCH_SIZE=bulk_limit), ExchangeRateLoader() as load_exchange_rates:
         exchange_rates = list(
             load_exchange_rates(currency["EUR"], date(2023, 10, 16), date(2023, 10, 17), to_currencies)
         )
 
-        assert CurrencyExchangeRate.objects.count() == ExchangeRateLoader.MAX_BULK_SIZE
+        assert CurrencyExchangeRate.objects.count() == bulk_limit
 
     assert exchange_rates
     assert CurrencyExchangeRate.objects.count() == len(exchange_rates)
+
+
+def test_rates_stored_by_a_concurrent_writer_shall_be_updated(provider_handler: Mock, currency):
+    to_currencies = [currency["CHF"], currency["GBP"], currency["USD"]]
+    CurrencyExchangeRate.objects.create(
+        from_currency=currency["EUR"], to_currency=currency["GBP"], date=date(2023, 10, 16), rate="1.5"
+    )
+
+    with ExchangeRateLoader() as load_exchange_rates:
+        exchange_rates = list(
+            load_exchange_rates(currency["EUR"], date(2023, 10, 16), date(2023, 10, 17), to_currencies)
+        )
+
+    assert CurrencyExchangeRate.objects.count() == len(exchange_rates)
+    assert set(CurrencyExchangeRate.objects.values_list("rate", flat=True)) == {Decimal("12.34")}
+
+
+@override_settings(EXCHANGE_RATE_LOADER_CONCURRENCY=3)
+def test_dates_fetched_concurrently_shall_be_yielded_in_date_order(provider_handler: Mock, currency):
+    get_exchange_rates = provider_handler.return_value.get_exchange_rates
+    fetch_exchange_rates = get_exchange_rates.side_effect
+    lock = threading.Lock()
+    in_flight = []
+    max_in_flight = 0
+
+    def slow_get_exchange_rates(from_currency, to_currencies, date, unavailable=None):
+        nonlocal max_in_flight
+
+        with lock:
+            in_flight.append(date)
+            max_in_flight = max(max_in_flight, len(in_flight))
+
+        time.sleep(0.003 * (11 - date.day))  # the later dates finish first
+
+        with lock:
+            in_flight.remove(date)
+
+        return fetch_exchange_rates(from_currency, to_currencies, date, unavailable)
+
+    slow_get_exchange_rates.return_values = fetch_exchange_rates.return_values
+    get_exchange_rates.side_effect = slow_get_exchange_rates
+    to_currencies = [currency["CHF"], currency["GBP"], currency["USD"]]
+
+    with ExchangeRateLoader() as load_exchange_rates:
+        exchange_rates = list(
+            load_exchange_rates(currency["EUR"], date(2023, 10, 1), date(2023, 10, 10), to_currencies)
+        )
+
+    assert [(item.date, item.to_currency.code) for item in exchange_rates] == [
+        (date(2023, 10, day), code) for day in range(1, 11) for code in ["CHF", "GBP", "USD"]
+    ]
+    assert get_exchange_rates.call_count == 10
+    assert 1 < max_in_flight <= 3
@@ -0,0 +1,65 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import pytest
+
+from currencies.exchange_rate_writer import ExchangeRateWriter, upsert_exchange_rates
+from currencies.models import CurrencyExchangeRate
+
+pytestmark = pytest.mark.django_db
+
+DATE = date(2023, 10, 16)
+
+
+def exchange_rate(currency, to_currency_code: str, rate: str, derived: bool = False) -> CurrencyExchangeRate:
+    return CurrencyExchangeRate(
+        from_currency=currency["EUR"],
+        to_currency=currency[to_currency_code],
+        date=DATE,
+        rate=Decimal(rate),
+        derived=derived,
+    )
+
+
+def stored_rates() -> dict[str, tuple[Decimal, bool]]:
+    return {
+        code: (rate, derived)
+        for code, rate, derived in CurrencyExchangeRate.objects.values_list("to_currency__code", "rate", "derived")
+    }
+
+
+def test_stored_rates_shall_be_updated_and_new_ones_inserted(currency):
+    CurrencyExchangeRate.objects.create(
+        from_currency=currency["EUR"], to_currency=currency["USD"], date=DATE, rate=Decimal("1"), derived=True
+    )
+
+    upsert_exchange_rates([exchange_rate(currency, "USD", "1.1"), exchange_rate(currency, "GBP", "0.8")])
+
+    assert stored_rates() == {"USD": (Decimal("1.1"), False), "GBP": (Decimal("0.8"), False)}
+
+
+def test_rates_shall_be_written_in_batches(currency):
+    with CaptureQueriesContext(connection) as queries, ExchangeRateWriter(batch_size=2) as write_exchange_rate:
+        for code in ("USD", "GBP", "CHF"):
+            write_exchange_rate(exchange_rate(currency, code, "1.5"))
+
+        assert CurrencyExchangeRate.objects.count() == 2
+
+    assert CurrencyExchangeRate.objects.count() == 3
+    assert len([query for query in queries if query["sql"].startswith("INSERT")]) == 2
+
+
+def test_last_buffered_rate_of_the_same_cell_shall_be_written(currency):
+    with ExchangeRateWriter() as write_exchange_rate:
+        write_exchange_rate(exchange_rate(currency, "USD", "1.1"))
+        write_exchange_rate(exchange_rate(currency, "USD", "1.2", derived=True))
+
+    assert stored_rates() == {"USD": (Decimal("1.2"), True)}
+
+
+def test_batch_size_shall_default_to_the_setting(settings):
+    settings.EXCHANGE_RATE_WRITE_BATCH_SIZE = 7
+
+    assert ExchangeRateWriter().batch_size == 7
@@ -0,0 +1,155 @@
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from currencies.exchange_rate_provider import ProviderHandler, provide_latest_exchange_rate
+from currencies.models import Provider
+
+pytestmark = pytest.mark.django_db
+
+DATE = date(2015, 10, 21)
+
+
+@pytest.fixture(autouse=True)
+def hedging(settings):
+    """Runs the hedged calls of a test on their own executor, waiting for the losing ones at the end."""
+
+    settings.PROVIDER_HEDGING_DELAY = 0.05
+    settings.PROVIDER_HEDGING_PERCENTILE = None
+    executor = ThreadPoolExecutor()
+
+    with patch("currencies.exchange_rate_provider.hedging_executor", executor):
+        yield executor
+
+    executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def plugin(provider_handler_registry):
+    """Creates the mock provider plugins `mock_1` and `mock_2` answering 1.1 and 2.2 after the given delays."""
+
+    plugins = {}
+
+    def import_provider(name):
+        plugins[name] = Mock(spec_set=["get_exchange_rate_data", "session"])
+        return Mock(Provider=Mock(return_value=plugins[name]))
+
+    with patch.object(ProviderHandler, "_import_provider", side_effect=import_provider):
+        Provider.objects.create(name="mock_1", priority=1)
+        Provider.objects.create(name="mock_2", priority=2)
+        handler = provider_handler_registry()
+
+    def answer(name, rate, delay=0.0, error=False):
+        def get_exchange_rate_data(*_):
+            time.sleep(delay)
+
+            if error:
+                raise Exception
+
+            return rate
+
+        plugins[name].get_exchange_rate_data.side_effect = get_exchange_rate_data
+
+    answer("mock_1", Decimal("1.1"))
+    answer("mock_2", Decimal("2.2"))
+
+    return handler, plugins, answer
+
+
+def hedged_call(handler, currency) -> tuple[Decimal | None, float]:
+    start = time.monotonic()
+    exchange_rate = handler.hedged(currency["EUR"], currency["USD"], DATE)
+
+    return exchange_rate and exchange_rate.rate, time.monotonic() - start
+
+
+def test_next_provider_shall_answer_when_the_primary_one_is_slower_than_the_delay(plugin, currency):
+    handler, plugins, answer = plugin
+    answer("mock_1", Decimal("1.1"), delay=1)
+
+    rate, elapsed = hedged_call(handler, currency)
+
+    assert rate == Decimal("2.2")
+    assert elapsed < 0.5
+
+
+def test_next_provider_shall_not_be_asked_when_the_primary_one_answers_within_the_delay(plugin, currency, settings):
+    settings.PROVIDER_HEDGING_DELAY = 1
+    handler, plugins, _ = plugin
+
+    assert hedged_call(handler, currency)[0] == Decimal("1.1")
+    assert not plugins["mock_2"].get_exchange_rate_data.called
+
+
+def test_next_provider_shall_be_asked_at_once_when_the_primary_one_fails(plugin, currency, settings):
+    settings.PROVIDER_HEDGING_DELAY = 10
+    handler, _, answer = plugin
+
+    for kwargs in ({"rate": None}, {"rate": None, "error": True}):
+        answer("mock_1", **kwargs)
+        rate, elapsed = hedged_call(handler, currency)
+
+        assert rate == Decimal("2.2")
+        assert elapsed < 1
+
+
+def test_priority_shall_be_respected_when_answers_arrive_together(plugin, currency, settings):
+    settings.PROVIDER_HEDGING_DELAY = 0
+    handler, plugins, answer = plugin
+    answer("mock_1", Decimal("1.1"), delay=0.1)
+
+    with patch("currencies.exchange_rate_provider.wait", side_effect=lambda fs, timeout, _: futures.wait(fs, timeout)):
+        assert hedged_call(handler, currency)[0] == Decimal("1.1")
+
+    assert plugins["mock_2"].get_exchange_rate_data.called
+
+
+def test_calls_losing_the_race_shall_leave_no_trace(plugin, currency, hedging, provider_health_registry):
+    handler, _, answer = plugin
+    answer("mock_1", None, delay=0.2)
+    unavailable = handler.track_unavailable()
+
+    exchange_rate = handler.hedged(currency["EUR"], currency["USD"], DATE, unavailable)
+    hedging.shutdown(wait=True)
+
+    assert exchange_rate.rate == Decimal("2.2")
+    assert ("mock_1", "EUR", "USD", DATE) not in unavailable
+    assert provider_health_registry["mock_1"].latency_percentile(50) is None
+    assert provider_health_registry["mock_2"].latency_percentile(50) is not None
+
+
+def test_none_shall_be_returned_when_no_provider_has_the_rate(plugin, currency):
+    handler, _, answer = plugin
+    answer("mock_1", None, delay=0.1)
+    answer("mock_2", None, error=True)
+
+    assert hedged_call(handler, currency)[0] is None
+
+
+def test_delay_shall_be_the_observed_latency_percentile_when_configured(
+    plugin, currency, settings, provider_health_registry
+):
+    settings.PROVIDER_HEDGING_DELAY = 10
+    settings.PROVIDER_HEDGING_PERCENTILE = 95
+    handler, _, answer = plugin
+    provider_health_registry["mock_1"].record(0.01)
+    answer("mock_1", Decimal("1.1"), delay=1)
+
+    rate, elapsed = hedged_call(handler, currency)
+
+    assert rate == Decimal("2.2")
+    assert elapsed < 0.5
+
+
+@pytest.mark.parametrize("hedging_delay, expected_rate", [(None, Decimal("1.1")), (0.05, Decimal("2.2"))])
+def test_latest_exchange_rate_shall_be_hedged_when_enabled(plugin, currency, settings, hedging_delay, expected_rate):
+    settings.PROVIDER_HEDGING_DELAY = hedging_delay
+    _, _, answer = plugin
+    answer("mock_1", Decimal("1.1"), delay=0.3)
+
+    assert provide_latest_exchange_rate(currency["EUR"], currency["USD"]).rate == expected_rate
@@ -0,0 +1,118 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import connection
+import pytest
+from rest_framework import status
+
+from currencies.exchange_rate_provider import find_exchange_rate_on_or_before
+from currencies.models import CurrencyExchangeRate
+
+pytestmark = pytest.mark.django_db
+
+URL = "/currencies/convert/"
+DATE = date(2023, 10, 20)
+
+
+@pytest.fixture
+def exchange_rates(currency):
+    return [
+        CurrencyExchangeRate.objects.create(
+            date=_date, from_currency=currency["EUR"], to_currency=currency["USD"], rate=rate
+        )
+        for _date, rate in [
+            (DATE - timedelta(days=30), Decimal("1.01")),
+            (DATE - timedelta(days=3), Decimal("1.05")),
+            (DATE + timedelta(days=1), Decimal("1.09")),
+        ]
+    ]
+
+
+@pytest.fixture
+def provider_handler():
+    with patch("currencies.exchange_rate_provider.get_provider_handler", spec_set=True) as provider_handler:
+        provider_handler.return_value.side_effect = (
+            lambda from_currency, to_currency, date, unavailable=None: CurrencyExchangeRate(
+                date=date, from_currency=from_currency, to_currency=to_currency, rate=Decimal("1.2")
+            )
+        )
+
+        yield provider_handler.return_value
+
+
+def convert(client, query_date: date, from_currency="EUR", to_currency="USD"):
+    return client.get(
+        URL,
+        {"from_currency": from_currency, "to_currency": to_currency, "amount": 100, "date": query_date.isoformat()},
+    )
+
+
+def test_nearest_stored_rate_on_or_before_the_date_shall_be_used(client, exchange_rates, provider_handler):
+    response = convert(client, DATE)
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.data == {
+        "from_currency": "EUR",
+        "to_currency": "USD",
+        "amount": "105.00",
+        "rate": "1.050000",
+        "date": "2023-10-20",
+        "rate_date": "2023-10-17",
+    }
+    assert not provider_handler.called
+
+
+def test_provider_shall_be_asked_without_a_stored_rate_within_the_lookback(
+    client, exchange_rates, provider_handler, settings
+):
+    settings.HISTORICAL_EXCHANGE_RATE_MAX_LOOKBACK = timedelta(days=2)
+
+    response = convert(client, DATE)
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert (response.data["rate"], response.data["rate_date"]) == ("1.200000", "2023-10-20")
+    assert provider_handler.call_count == 1
+    assert CurrencyExchangeRate.objects.get(date=DATE).rate == Decimal("1.2")
+
+
+def test_lookback_shall_be_unlimited_without_a_maximum(exchange_rates, currency):
+    exchange_rate = find_exchange_rate_on_or_before(currency["EUR"], currency["USD"], DATE - timedelta(days=4), None)
+
+    assert exchange_rate == exchange_rates[0]
+    assert (
+        find_exchange_rate_on_or_before(currency["EUR"], currency["USD"], DATE - timedelta(days=4), timedelta(days=7))
+        is None
+    )
+
+
+def test_unavailable_rate_shall_not_be_found(client, exchange_rates, provider_handler):
+    provider_handler.side_effect = None
+    provider_handler.return_value = None
+
+    response = convert(client, DATE, to_currency="GBP")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert "error" in response.data
+
+
+def test_future_date_shall_be_rejected(client, currency):
+    response = convert(client, date.today() + timedelta(days=1))
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "date" in response.data
+
+
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="the query plan is checked on SQLite")
+def test_lookup_shall_use_the_index_of_the_currency_pair_and_date(currency):
+    query_plan = (
+        CurrencyExchangeRate.objects.filter(
+            from_currency=currency["EUR"], to_currency=currency["USD"], date__lte=DATE, date__gte=DATE
+        )
+        .order_by("-date")
+        .explain()
+    )
+
+    assert "USING INDEX" in query_plan
+    assert "(from_currency_id=? AND to_currency_id=? AND date>? AND date<?)" in query_plan
+    assert "TEMP B-TREE" not in query_plan
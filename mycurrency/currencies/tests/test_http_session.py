@@ -0,0 +1,79 @@
+from unittest.mock import patch
+
+import pytest
+
+from currencies.exchange_rate_provider import ProviderHandler
+from currencies.http_session import ProviderSession, get_http_session
+from currencies.models import Provider
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def http_session(settings):
+    settings.PROVIDER_HTTP_BACKOFF_FACTOR = 0
+    get_http_session.close()
+
+    yield get_http_session
+
+    get_http_session.close()
+
+
+def url_of(server) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def test_connections_shall_be_reused_by_the_session(stub_server, http_session):
+    for _ in range(5):
+        assert http_session().get(url_of(stub_server)).json() == {"rates": {"USD": 1.5}}
+
+    assert stub_server.connections == 1
+
+
+def test_failed_requests_shall_be_retried(stub_server, http_session):
+    stub_server.statuses = [503, 502]
+
+    response = http_session().get(url_of(stub_server))
+
+    assert response.status_code == 200
+    assert not stub_server.statuses
+
+
+def test_last_response_shall_be_returned_when_retries_are_exhausted(settings, stub_server, http_session):
+    settings.PROVIDER_HTTP_RETRIES = 1
+    stub_server.statuses = [503, 503, 503]
+
+    assert http_session().get(url_of(stub_server)).status_code == 503
+
+
+def test_default_timeout_shall_be_applied(settings, http_session):
+    settings.PROVIDER_HTTP_TIMEOUT = 2.5
+
+    with patch("requests.Session.request") as request:
+        http_session().get("http://example.com/")
+        http_session().get("http://example.com/", timeout=1)
+
+    assert [item.kwargs["timeout"] for item in request.call_args_list] == [2.5, 1]
+
+
+def test_session_shall_be_shared_within_a_process(http_session):
+    assert isinstance(http_session(), ProviderSession)
+    assert http_session() is http_session()
+
+
+def test_forked_process_shall_get_its_own_session(http_session):
+    session = http_session()
+
+    with patch("currencies.http_session.os.getpid", return_value=-1):
+        assert http_session() is not session
+
+
+def test_provider_plugins_shall_get_the_shared_session(http_session):
+    with patch.object(ProviderHandler, "_import_provider") as import_provider:
+        Provider.objects.create(name="mock_1", priority=1)
+        Provider.objects.create(name="mock_2", priority=2)
+        import_provider.return_value.Provider.side_effect = lambda: type("Provider", (), {})()
+
+        providers = ProviderHandler().providers
+
+    assert [provider.session for provider in providers.values()] == [http_session(), http_session()]
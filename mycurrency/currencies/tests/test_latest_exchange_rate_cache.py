@@ -0,0 +1,118 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from django.test import override_settings
+import pytest
+from rest_framework import status
+
+from currencies.currency_converter import convert_with_latest_exchange_rate
+from currencies.models import CurrencyExchangeRate
+
+pytestmark = pytest.mark.django_db
+
+MUT = "currencies.exchange_rate_provider"
+TODAY = date(2023, 10, 30)
+
+
+@pytest.fixture
+def provider_handler():
+    with (
+        patch(MUT + ".date") as _date,
+        patch("currencies.currency_converter.date") as _converter_date,
+        patch(MUT + ".get_provider_handler", spec_set=True) as provider_handler,
+    ):
+        _date.today.return_value = _converter_date.today.return_value = TODAY
+        provider_handler.return_value.side_effect = (
+            lambda from_currency, to_currency, date, unavailable=None: CurrencyExchangeRate(
+                date=date,
+                from_currency=from_currency,
+                to_currency=to_currency,
+                rate=Decimal("1.234567"),
+            )
+        )
+
+        yield provider_handler.return_value
+
+
+def test_hot_pair_shall_be_converted_without_provider_and_database(
+    provider_handler: Mock, exchange_rate_cache, django_assert_num_queries
+):
+    assert convert_with_latest_exchange_rate(Decimal(100), "EUR", "USD") == (Decimal("123.46"), Decimal("1.234567"))
+
+    with django_assert_num_queries(0):
+        assert convert_with_latest_exchange_rate(Decimal(10), "EUR", "USD") == (Decimal("12.35"), Decimal("1.234567"))
+
+    assert provider_handler.call_count == 1
+    assert exchange_rate_cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_pairs_and_dates_shall_be_cached_separately(provider_handler: Mock, exchange_rate_cache):
+    convert_with_latest_exchange_rate(Decimal(100), "EUR", "USD")
+    convert_with_latest_exchange_rate(Decimal(100), "USD", "EUR")
+
+    assert exchange_rate_cache.get("EUR", "USD", TODAY) == Decimal("1.234567")
+    assert exchange_rate_cache.get("USD", "EUR", TODAY) == Decimal("1.234567")
+    assert exchange_rate_cache.get("EUR", "USD", date(2023, 10, 29)) is None
+    assert provider_handler.call_count == 2
+
+
+def test_expired_rate_shall_be_fetched_again(provider_handler: Mock, exchange_rate_cache):
+    convert_with_latest_exchange_rate(Decimal(100), "EUR", "USD")
+
+    with patch("django.core.cache.backends.locmem.time.time", return_value=float("inf")):
+        convert_with_latest_exchange_rate(Decimal(100), "EUR", "USD")
+
+    assert provider_handler.call_count == 2
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "latest_exchange_rates": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "bounded",
+            "OPTIONS": {"MAX_ENTRIES": 3, "CULL_FREQUENCY": 3},
+        },
+    }
+)
+def test_least_recently_used_rate_shall_be_evicted(exchange_rate_cache):
+    for to_currency_code in ["CHF", "GBP", "USD"]:
+        exchange_rate_cache.set("EUR", to_currency_code, TODAY, Decimal(1))
+
+    exchange_rate_cache.get("EUR", "CHF", TODAY)
+    exchange_rate_cache.set("EUR", "HUF", TODAY, Decimal(1))
+
+    assert exchange_rate_cache.get("EUR", "GBP", TODAY) is None
+    assert exchange_rate_cache.get("EUR", "CHF", TODAY) == Decimal(1)
+
+
+@override_settings(LATEST_EXCHANGE_RATE_CACHE=None)
+def test_disabled_cache_shall_always_fetch_the_rate(provider_handler: Mock, exchange_rate_cache):
+    convert_with_latest_exchange_rate(Decimal(100), "EUR", "USD")
+    convert_with_latest_exchange_rate(Decimal(100), "EUR", "USD")
+
+    assert provider_handler.call_count == 2
+    assert exchange_rate_cache.stats() == {"hits": 0, "misses": 0}
+
+
+def test_backoffice_converter_shall_use_the_cache(client, provider_handler: Mock, exchange_rate_cache):
+    exchange_rate_cache.set("EUR", "USD", TODAY, Decimal("2.5"))
+
+    response = client.post(
+        "/currencies/backoffice/converter/", {"from_currency": "EUR", "to_currency": "USD", "amount": 10}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.context["converted_amount"] == Decimal("25.00")
+    assert not provider_handler.called
+
+
+def test_stats_shall_be_exposed(client, provider_handler: Mock):
+    client.get("/currencies/convert/", {"from_currency": "EUR", "to_currency": "USD", "amount": 1})
+    client.get("/currencies/convert/", {"from_currency": "EUR", "to_currency": "USD", "amount": 2})
+
+    response = client.get("/currencies/convert/cache/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {"hits": 1, "misses": 1}
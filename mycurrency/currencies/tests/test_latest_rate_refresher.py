@@ -0,0 +1,204 @@
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.utils import timezone
+import pytest
+from rest_framework import status
+
+from currencies.latest_rate_refresher import LatestExchangeRateRefresher, refresh_latest_exchange_rates
+from currencies.models import CurrencyExchangeRate
+
+pytestmark = pytest.mark.django_db
+
+CONVERT_URL = "/currencies/convert/"
+
+
+@pytest.fixture
+def provider_handler(currency):
+    rates = {"EUR": Decimal("0.9"), "USD": Decimal("1.1"), "CHF": Decimal("0.95"), "GBP": Decimal("0.8")}
+
+    def get_exchange_rates(from_currency, to_currencies, date, unavailable=None):
+        return [
+            CurrencyExchangeRate(
+                from_currency=from_currency,
+                to_currency=to_currency,
+                date=date,
+                rate=rates[to_currency.code] / rates[from_currency.code],
+            )
+            for to_currency in to_currencies
+        ]
+
+    with patch("currencies.latest_rate_refresher.get_provider_handler", spec_set=True) as provider_handler:
+        provider_handler.return_value.get_exchange_rates.side_effect = get_exchange_rates
+
+        yield provider_handler.return_value
+
+
+@pytest.fixture
+def refresh_lock():
+    caches["default"].delete(LatestExchangeRateRefresher.LOCK_KEY)
+
+    yield caches["default"]
+
+    caches["default"].delete(LatestExchangeRateRefresher.LOCK_KEY)
+
+
+def stored_rates() -> dict[tuple[str, str], Decimal]:
+    return {
+        (item.from_currency.code, item.to_currency.code): item.rate
+        for item in CurrencyExchangeRate.objects.filter(date=date.today()).select_related(
+            "from_currency", "to_currency"
+        )
+    }
+
+
+def test_todays_rates_of_the_base_currencies_shall_be_upserted(currency, provider_handler):
+    stale = CurrencyExchangeRate.objects.create(
+        from_currency=currency["EUR"], to_currency=currency["USD"], date=date.today(), rate=Decimal("1")
+    )
+    CurrencyExchangeRate.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+
+    assert refresh_latest_exchange_rates([currency["EUR"], currency["USD"]]) == 6
+
+    rates = stored_rates()
+
+    assert len(rates) == 6
+    assert rates["EUR", "USD"] == Decimal("1.222222")
+    assert rates["USD", "GBP"] == Decimal("0.727273")
+    assert CurrencyExchangeRate.objects.get(pk=stale.pk).updated_at > timezone.now() - timedelta(minutes=1)
+
+
+def test_refresh_shall_be_skipped_while_another_one_is_in_progress(currency, provider_handler, refresh_lock):
+    refresher = LatestExchangeRateRefresher(["EUR"], interval=60, jitter=0)
+    refresh_lock.add(LatestExchangeRateRefresher.LOCK_KEY, -1)
+
+    assert refresher.refresh_once() is None
+    assert not provider_handler.get_exchange_rates.called
+
+    refresh_lock.delete(LatestExchangeRateRefresher.LOCK_KEY)
+
+    assert refresher.refresh_once() == 3
+    assert refresh_lock.get(LatestExchangeRateRefresher.LOCK_KEY) is None
+
+
+def test_cache_lock_shall_outlive_a_slow_refresh(currency, provider_handler, refresh_lock, settings):
+    settings.LATEST_EXCHANGE_RATE_REFRESH_LOCK_TIMEOUT = 3600
+    refresher = LatestExchangeRateRefresher(["EUR"], interval=60, jitter=0)
+
+    with patch.object(refresh_lock, "add", wraps=refresh_lock.add) as add:
+        assert refresher.refresh_once() == 3
+
+    assert add.call_args.kwargs["timeout"] == 3600
+    assert refresh_lock.get(LatestExchangeRateRefresher.LOCK_KEY) is None
+
+
+@pytest.mark.parametrize("locked, expected_refreshed", [(True, 3), (False, None)])
+def test_advisory_lock_shall_be_used_on_postgresql(
+    currency, provider_handler, refresh_lock, locked, expected_refreshed
+):
+    refresher = LatestExchangeRateRefresher(["EUR"], interval=60, jitter=0)
+    refresh_lock.add(LatestExchangeRateRefresher.LOCK_KEY, -1)  # not checked with the advisory lock
+
+    @contextmanager
+    def try_advisory_lock(key):
+        yield locked
+
+    with patch("currencies.latest_rate_refresher.try_advisory_lock", try_advisory_lock):
+        assert refresher.refresh_once() == expected_refreshed
+
+
+def test_refreshes_shall_be_scheduled_on_the_jittered_interval(currency, provider_handler, refresh_lock):
+    refresher = LatestExchangeRateRefresher(["EUR"], interval=60, jitter=0.1)
+
+    with (
+        patch("currencies.latest_rate_refresher.time.monotonic", return_value=1000.0),
+        patch("currencies.latest_rate_refresher.time.sleep") as sleep,
+    ):
+        refresher.run(cycles=4)
+
+    assert provider_handler.get_exchange_rates.call_count == 4
+    scheduled_at = [0] + [item.args[0] for item in sleep.call_args_list]
+    intervals = [later - earlier for earlier, later in zip(scheduled_at, scheduled_at[1:])]
+
+    assert len(intervals) == 3
+    assert all(54 <= interval <= 66 for interval in intervals)
+
+
+def test_command_shall_refresh_the_given_base_currencies(currency, provider_handler, refresh_lock):
+    call_command("refresh_latest_rates", "--base", "USD", "GBP", "--cycles", "1")
+
+    assert {from_code for from_code, _ in stored_rates()} == {"USD", "GBP"}
+
+
+def test_refresh_lag_shall_be_reported_for_the_hot_base_currencies(client, currency, provider_handler, settings):
+    settings.HOT_BASE_CURRENCIES = ["EUR", "USD"]
+    refresh_latest_exchange_rates([currency["EUR"]])
+    CurrencyExchangeRate.objects.filter(to_currency__code="GBP").update(
+        updated_at=timezone.now() - timedelta(minutes=2)
+    )
+
+    response = client.get("/currencies/convert/refresh/")
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert 120 <= response.data["EUR"] < 180
+    assert response.data["USD"] is None
+
+
+@pytest.mark.parametrize(
+    "age, expected_status",
+    [(timedelta(minutes=1), status.HTTP_200_OK), (timedelta(minutes=10), status.HTTP_404_NOT_FOUND)],
+)
+def test_conversion_from_a_hot_base_currency_shall_only_read_a_fresh_enough_rate(
+    client, currency, settings, age, expected_status
+):
+    settings.HOT_BASE_CURRENCIES = ["EUR"]
+    settings.LATEST_EXCHANGE_RATE_MAX_STALENESS = timedelta(minutes=5)
+    CurrencyExchangeRate.objects.create(
+        from_currency=currency["EUR"], to_currency=currency["USD"], date=date.today(), rate=Decimal("1.1")
+    )
+    CurrencyExchangeRate.objects.update(updated_at=timezone.now() - age)
+
+    with patch("currencies.exchange_rate_provider.get_provider_handler") as provider_handler:
+        response = client.get(CONVERT_URL, {"from_currency": "EUR", "to_currency": "USD", "amount": 10})
+
+    assert response.status_code == expected_status, response.text
+    assert not provider_handler.called
+
+
+def test_conversion_from_a_hot_base_currency_shall_not_read_a_recently_upserted_older_date(client, currency, settings):
+    settings.HOT_BASE_CURRENCIES = ["EUR"]
+    settings.LATEST_EXCHANGE_RATE_MAX_STALENESS = timedelta(minutes=10)
+    today = CurrencyExchangeRate.objects.create(
+        from_currency=currency["EUR"], to_currency=currency["USD"], date=date.today(), rate=Decimal("1.1")
+    )
+    CurrencyExchangeRate.objects.filter(pk=today.pk).update(updated_at=timezone.now() - timedelta(hours=2))
+    CurrencyExchangeRate.objects.create(
+        from_currency=currency["EUR"], to_currency=currency["USD"], date=date(2019, 1, 2), rate=Decimal("9.9")
+    )
+
+    with patch("currencies.exchange_rate_provider.get_provider_handler") as provider_handler:
+        response = client.get(CONVERT_URL, {"from_currency": "EUR", "to_currency": "USD", "amount": 10})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND, response.text
+    assert not provider_handler.called
+
+
+def test_conversion_from_another_base_currency_shall_fetch_the_rate(client, currency, settings):
+    settings.HOT_BASE_CURRENCIES = ["EUR"]
+    settings.LATEST_EXCHANGE_RATE_MAX_STALENESS = timedelta(minutes=5)
+    exchange_rate = CurrencyExchangeRate(
+        from_currency=currency["USD"], to_currency=currency["EUR"], date=date.today(), rate=Decimal("0.9")
+    )
+
+    with patch(
+        "currencies.exchange_rate_provider.get_provider_handler",
+        return_value=Mock(return_value=exchange_rate, **{"hedged.return_value": exchange_rate}),
+    ):
+        response = client.get(CONVERT_URL, {"from_currency": "USD", "to_currency": "EUR", "amount": 10})
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.data["amount"] == "9.00"
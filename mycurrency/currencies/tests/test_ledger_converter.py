@@ -0,0 +1,137 @@
+import csv
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import pytest
+
+from currencies.ledger_converter import ExchangeRateIndex, convert_ledger
+from currencies.models import CurrencyExchangeRate
+
+pytestmark = pytest.mark.django_db
+
+DATE = date(2023, 10, 16)
+LEDGER = """\
+id,date,currency,amount
+1,2023-10-16,EUR,100
+2,2023-10-18,EUR,33.33
+3,2023-10-16,USD,12.345
+4,2023-10-16,GBP,10
+5,2023-10-16,CHF,abc
+6,2023-11-30,EUR,1
+"""
+
+
+@pytest.fixture
+def exchange_rates(currency):
+    CurrencyExchangeRate.objects.bulk_create(
+        CurrencyExchangeRate(date=_date, from_currency=currency[code], to_currency=currency["USD"], rate=rate)
+        for _date, code, rate in [
+            (DATE, "EUR", Decimal("1.05")),
+            (DATE + timedelta(days=1), "EUR", Decimal("1.06")),
+            (DATE + timedelta(days=3), "EUR", Decimal("1.07")),
+            (DATE, "CHF", Decimal("1.1")),
+            (DATE, "USD", Decimal("2")),  # not used for the reporting currency itself
+        ]
+    )
+
+
+def converted_rows(output: str) -> dict[str, dict]:
+    return {row["id"]: row for row in csv.DictReader(StringIO(output))}
+
+
+@pytest.mark.parametrize("chunk_size", [2, 1000])
+def test_ledger_shall_be_converted_with_the_nearest_stored_rates(exchange_rates, chunk_size):
+    output = StringIO()
+
+    stats = convert_ledger(StringIO(LEDGER), output, "USD", chunk_size)
+
+    rows = converted_rows(output.getvalue())
+
+    assert output.getvalue().splitlines()[0] == "id,date,currency,amount,converted_amount,rate,rate_date,error"
+    assert [rows["1"][field] for field in ["converted_amount", "rate", "rate_date"]] == [
+        "105.00",
+        "1.050000",
+        "2023-10-16",
+    ]
+    assert [rows["2"][field] for field in ["converted_amount", "rate", "rate_date"]] == [
+        "35.33",
+        "1.060000",
+        "2023-10-17",
+    ]
+    assert (rows["3"]["converted_amount"], rows["3"]["rate"]) == ("12.34", "1")
+    assert rows["4"]["error"] == "Exchange rate is not available."
+    assert rows["5"]["error"] == "Invalid date or amount."
+    assert rows["6"]["error"] == "Exchange rate is not available."  # beyond the maximum lookback
+    assert (stats.rows, stats.failures) == (6, 3)
+
+
+def test_rates_shall_be_loaded_once_per_needed_slice(exchange_rates, currency, django_assert_num_queries):
+    index = ExchangeRateIndex(currency["USD"], timedelta(days=7))
+
+    with django_assert_num_queries(1):
+        index.load({"EUR", "CHF"}, DATE, DATE + timedelta(days=2))
+        index.load({"EUR"}, DATE + timedelta(days=1), DATE + timedelta(days=2))
+
+    assert index.find("EUR", DATE + timedelta(days=2)) == (Decimal("1.06"), DATE + timedelta(days=1))
+
+    with django_assert_num_queries(1):
+        index.load({"EUR", "CHF"}, DATE + timedelta(days=3), DATE + timedelta(days=4))
+
+    assert index.find("EUR", DATE + timedelta(days=4)) == (Decimal("1.07"), DATE + timedelta(days=3))
+    assert index.find("CHF", DATE - timedelta(days=1)) is None
+
+
+def test_rates_shall_be_loaded_once_without_maximum_lookback(exchange_rates, currency):
+    index = ExchangeRateIndex(currency["USD"], None)
+
+    with CaptureQueriesContext(connection) as queries:
+        for day in range(5):
+            index.load({"EUR"}, DATE + timedelta(days=day), DATE + timedelta(days=day))
+
+    assert len(queries) == 5
+    assert all(str(date.min) not in query["sql"] for query in queries[1:])
+    assert index.dates["EUR"] == [DATE, DATE + timedelta(days=1), DATE + timedelta(days=3)]
+    assert index.find("EUR", DATE + timedelta(days=4)) == (Decimal("1.07"), DATE + timedelta(days=3))
+    assert index.find("EUR", DATE - timedelta(days=1)) is None
+
+
+def test_command_shall_write_the_converted_ledger(exchange_rates, tmp_path):
+    (tmp_path / "ledger.csv").write_text(LEDGER)
+    stdout = StringIO()
+
+    call_command(
+        "convert_ledger", str(tmp_path / "ledger.csv"), str(tmp_path / "converted.csv"), "--to", "USD", stdout=stdout
+    )
+
+    assert converted_rows((tmp_path / "converted.csv").read_text())["1"]["converted_amount"] == "105.00"
+    assert "Converted ledger rows: 6 (3 failed) in " in stdout.getvalue()
+
+
+def test_rows_with_extra_fields_shall_be_reported_as_invalid(exchange_rates, tmp_path):
+    (tmp_path / "ledger.csv").write_text("id,date,currency,amount\n1,2023-10-16,EUR,100,extra\n2,2023-10-16,EUR,10\n")
+
+    call_command(
+        "convert_ledger", str(tmp_path / "ledger.csv"), str(tmp_path / "converted.csv"), "--to", "USD", stdout=None
+    )
+
+    rows = converted_rows((tmp_path / "converted.csv").read_text())
+
+    assert (rows["1"]["converted_amount"], rows["1"]["error"]) == ("", "Invalid number of fields.")
+    assert (rows["2"]["converted_amount"], rows["2"]["error"]) == ("10.50", "")
+
+
+@pytest.mark.parametrize(
+    "ledger, to_currency, error",
+    [(LEDGER, "XYZ", "Invalid currency: XYZ"), ("date,amount\n", "USD", "Missing columns: currency")],
+)
+def test_invalid_ledger_or_currency_shall_be_an_error(currency, tmp_path, ledger, to_currency, error):
+    (tmp_path / "ledger.csv").write_text(ledger)
+
+    with pytest.raises(CommandError, match=error):
+        call_command(
+            "convert_ledger", str(tmp_path / "ledger.csv"), str(tmp_path / "converted.csv"), "--to", to_currency
+        )
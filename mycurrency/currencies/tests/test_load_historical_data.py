@@ -0,0 +1,197 @@
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from django.core.management import CommandError, call_command
+import pytest
+
+from currencies.exchange_rate_provider import ProviderHandler
+from currencies.historical_workers import fetch_exchange_rate_cell, init_worker
+from currencies.models import CurrencyExchangeRate, Provider
+
+pytestmark = pytest.mark.django_db
+
+MUT = "currencies.management.commands.load_historical_data"
+DATE = date(2023, 10, 16)
+RATES = {"EUR": Decimal("0.9"), "USD": Decimal("1.1"), "CHF": Decimal("0.95"), "GBP": Decimal("0.8")}
+
+
+@pytest.fixture(autouse=True)
+def plugin():
+    """Creates a mock provider plugin answering the cross rates of `RATES` except for CHF to GBP."""
+
+    def get_exchange_rate_data(from_currency, to_currency, date):
+        if (from_currency, to_currency) != ("CHF", "GBP"):
+            return RATES[to_currency] / RATES[from_currency]
+
+    plugin = Mock(spec_set=["get_exchange_rate_data", "session"])
+    plugin.get_exchange_rate_data.side_effect = get_exchange_rate_data
+
+    with patch.object(ProviderHandler, "_import_provider", return_value=Mock(Provider=Mock(return_value=plugin))):
+        Provider.objects.create(name="mock_1", priority=1)
+
+        yield plugin
+
+
+class InProcessPool:
+    """Stands for the pool of worker processes, as the test database is not visible from other processes."""
+
+    instances = []
+
+    def __init__(self, processes, initializer):
+        self.processes = processes
+        initializer()
+        self.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def imap_unordered(self, func, iterable, chunksize):
+        self.chunksize = chunksize
+
+        return map(func, iterable)
+
+
+@contextmanager
+def in_process_pool():
+    InProcessPool.instances.clear()
+
+    with patch(MUT + ".mp.Pool", InProcessPool), patch(MUT + ".connections"):
+        yield InProcessPool.instances
+
+
+def load_historical_data(*args, query_date: date | None = DATE) -> str:
+    stdout = StringIO()
+    call_command("load_historical_data", *([query_date.isoformat()] if query_date else []), *args, stdout=stdout)
+
+    return stdout.getvalue()
+
+
+def test_workers_shall_exchange_plain_values_only(currency):
+    init_worker()
+
+    result = fetch_exchange_rate_cell((DATE, "EUR", "USD"))
+
+    assert result == (DATE, "EUR", "USD", Decimal("1.222222"))
+    assert [type(item) for item in result] == [date, str, str, Decimal]
+    assert fetch_exchange_rate_cell((DATE, "CHF", "GBP")) == (DATE, "CHF", "GBP", None)
+
+
+@pytest.mark.parametrize("workers", ["1", "3"])
+def test_every_available_pair_shall_be_stored(currency, workers):
+    with in_process_pool():
+        output = load_historical_data("--workers", workers)
+
+    assert CurrencyExchangeRate.objects.filter(date=DATE).count() == 11
+    assert CurrencyExchangeRate.objects.get(from_currency__code="EUR", to_currency__code="USD").rate == Decimal(
+        "1.222222"
+    )
+    assert "Fetched exchange rates: 12 in " in output
+    assert "Loaded currency exchange rates: 11" in output
+
+
+def test_cells_shall_be_chunked_for_the_workers(currency):
+    with in_process_pool() as pools:
+        output = load_historical_data("--workers", "2")
+
+    assert pools[0].processes == 2
+    assert pools[0].chunksize == 2  # 12 cells in 4 chunks per worker
+    assert "transferred 0 bytes" not in output
+
+
+def test_single_worker_shall_not_start_a_pool(currency):
+    with in_process_pool() as pools:
+        output = load_historical_data("--workers", "1")
+
+    assert not pools
+    assert "transferred 0 bytes" in output
+
+
+def test_number_of_workers_shall_be_positive(currency):
+    with pytest.raises(CommandError, match="at least 1"):
+        load_historical_data("--workers", "0")
+
+
+def test_date_range_shall_be_loaded_by_one_pool(currency, plugin):
+    with in_process_pool() as pools:
+        output = load_historical_data(
+            "--workers",
+            "3",
+            "--from-date",
+            DATE.isoformat(),
+            "--to-date",
+            (DATE + timedelta(days=2)).isoformat(),
+            query_date=None,
+        )
+
+    assert len(pools) == 1
+    assert plugin.get_exchange_rate_data.call_count == 36
+    assert CurrencyExchangeRate.objects.filter(date=DATE + timedelta(days=1)).count() == 11
+    assert "Loaded currency exchange rates: 33" in output
+
+
+def test_currency_subset_shall_be_loaded(currency):
+    load_historical_data("--workers", "1", "--base", "EUR", "USD", "--symbols", "GBP", "CHF")
+
+    assert set(CurrencyExchangeRate.objects.values_list("from_currency__code", "to_currency__code")) == {
+        ("EUR", "GBP"),
+        ("EUR", "CHF"),
+        ("USD", "GBP"),
+        ("USD", "CHF"),
+    }
+
+
+def test_stored_exchange_rates_shall_be_skipped(currency, plugin):
+    CurrencyExchangeRate.objects.create(
+        from_currency=currency["EUR"], to_currency=currency["USD"], date=DATE, rate=Decimal("1")
+    )
+
+    output = load_historical_data("--workers", "1", "--base", "EUR")
+
+    assert "exchange rates to load: 2, already stored: 1" in output
+    assert ("EUR", "USD", DATE) not in [item.args for item in plugin.get_exchange_rate_data.call_args_list]
+    assert CurrencyExchangeRate.objects.get(from_currency__code="EUR", to_currency__code="USD").rate == Decimal("1")
+
+
+def test_interrupted_load_shall_be_resumed(currency, plugin, settings):
+    settings.EXCHANGE_RATE_WRITE_BATCH_SIZE = 2
+    get_exchange_rate_data = plugin.get_exchange_rate_data.side_effect
+
+    def get_exchange_rate_data_until_interrupted(*args):
+        if plugin.get_exchange_rate_data.call_count > 6:
+            raise KeyboardInterrupt
+
+        return get_exchange_rate_data(*args)
+
+    plugin.get_exchange_rate_data.side_effect = get_exchange_rate_data_until_interrupted
+
+    with pytest.raises(KeyboardInterrupt):
+        load_historical_data("--workers", "1")
+
+    stored = CurrencyExchangeRate.objects.count()
+    plugin.get_exchange_rate_data.side_effect = get_exchange_rate_data
+    plugin.get_exchange_rate_data.reset_mock()
+
+    output = load_historical_data("--workers", "1")
+
+    assert stored == 5  # the rates fetched before the interruption are kept, CHF to GBP is unavailable
+    assert plugin.get_exchange_rate_data.call_count == 12 - stored
+    assert "Loaded currency exchange rates: 11" in output
+
+
+def test_either_a_date_or_a_range_shall_be_given(currency):
+    with pytest.raises(CommandError, match="Either a date"):
+        load_historical_data(query_date=None)
+
+    with pytest.raises(CommandError, match="Either a date"):
+        load_historical_data("--from-date", DATE.isoformat())
+
+
+def test_currencies_shall_be_valid(currency):
+    with pytest.raises(CommandError, match="Invalid currency: XYZ"):
+        load_historical_data("--base", "XYZ")
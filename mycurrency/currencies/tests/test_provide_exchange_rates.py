@@ -1,10 +1,10 @@
 from collections.abc import Sequence
 from datetime import date
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, call, patch
 
 import pytest
 
-from currencies.exchange_rate_provider import provide_exchange_rates
+from currencies.exchange_rate_provider import find_missing_exchange_rates, provide_exchange_rates
 from currencies.models import Currency, CurrencyExchangeRate
 
 MUT = "currencies.exchange_rate_provider"
@@ -22,6 +22,10 @@ def exchange_rate_loader():
         yield exchange_rate_loader
 
 
+def loaded(exchange_rate_loader: Mock) -> list:
+    return exchange_rate_loader.return_value.__enter__.return_value.call_args_list
+
+
 def create_exchange_rates(
     _date: date, from_currency: Currency, to_currencies: Sequence[Currency]
 ) -> list[CurrencyExchangeRate]:
@@ -46,6 +50,7 @@ def test_returns_continuous_date_range_from_db(exchange_rate_loader: Mock, curre
     assert list(provide_exchange_rates(from_currency, date(2023, 10, 15), date(2023, 10, 16))) == (
         db_exchange_rates_1 + db_exchange_rates_2
     )
+    assert not exchange_rate_loader.called
 
 
 def test_fills_the_gap_in_date_range(exchange_rate_loader: Mock, currency):
@@ -56,38 +61,39 @@ def test_fills_the_gap_in_date_range(exchange_rate_loader: Mock, currency):
     db_exchange_rates_2 = create_exchange_rates(date(2023, 10, 18), from_currency, to_all_currencies)
 
     assert list(provide_exchange_rates(from_currency, date(2023, 10, 15), date(2023, 10, 18))) == (
-        db_exchange_rates_1
-        + [(from_currency, date(2023, 10, 16), date(2023, 10, 17), to_all_currencies)]
-        + db_exchange_rates_2
+        db_exchange_rates_1 + db_exchange_rates_2
     )
+    assert loaded(exchange_rate_loader) == [
+        call(from_currency, date(2023, 10, 16), date(2023, 10, 17), to_all_currencies)
+    ]
 
 
 def test_completes_the_beginning_of_date_range(exchange_rate_loader: Mock, currency):
     from_currency = currency["EUR"]
     to_all_currencies = set(currency.values()) - {from_currency}
 
-    db_exchange_rates_1 = create_exchange_rates(date(2023, 10, 15), from_currency, to_all_currencies)
-    db_exchange_rates_2 = create_exchange_rates(date(2023, 10, 16), from_currency, to_all_currencies)
+    create_exchange_rates(date(2023, 10, 15), from_currency, to_all_currencies)
+    create_exchange_rates(date(2023, 10, 16), from_currency, to_all_currencies)
 
-    assert list(provide_exchange_rates(from_currency, date(2023, 10, 12), date(2023, 10, 16))) == (
-        [(from_currency, date(2023, 10, 12), date(2023, 10, 14), to_all_currencies)]
-        + db_exchange_rates_1
-        + db_exchange_rates_2
-    )
+    list(provide_exchange_rates(from_currency, date(2023, 10, 12), date(2023, 10, 16)))
+
+    assert loaded(exchange_rate_loader) == [
+        call(from_currency, date(2023, 10, 12), date(2023, 10, 14), to_all_currencies)
+    ]
 
 
 def test_completes_the_end_of_date_range(exchange_rate_loader: Mock, currency):
     from_currency = currency["EUR"]
     to_all_currencies = set(currency.values()) - {from_currency}
 
-    db_exchange_rates_1 = create_exchange_rates(date(2023, 10, 15), from_currency, to_all_currencies)
-    db_exchange_rates_2 = create_exchange_rates(date(2023, 10, 16), from_currency, to_all_currencies)
+    create_exchange_rates(date(2023, 10, 15), from_currency, to_all_currencies)
+    create_exchange_rates(date(2023, 10, 16), from_currency, to_all_currencies)
 
-    assert list(provide_exchange_rates(from_currency, date(2023, 10, 15), date(2023, 10, 18))) == (
-        db_exchange_rates_1
-        + db_exchange_rates_2
-        + [(from_currency, date(2023, 10, 17), date(2023, 10, 18), to_all_currencies)]
-    )
+    list(provide_exchange_rates(from_currency, date(2023, 10, 15), date(2023, 10, 18)))
+
+    assert loaded(exchange_rate_loader) == [
+        call(from_currency, date(2023, 10, 17), date(2023, 10, 18), to_all_currencies)
+    ]
 
 
 def test_completes_the_missing_currencies(exchange_rate_loader: Mock, currency):
@@ -96,12 +102,63 @@ def test_completes_the_missing_currencies(exchange_rate_loader: Mock, currency):
     missing_1 = {currency["USD"]}
     missing_2 = {currency["CHF"], currency["GBP"]}
 
-    db_exchange_rates_1 = create_exchange_rates(date(2023, 10, 15), from_currency, to_all_currencies - missing_1)
-    db_exchange_rates_2 = create_exchange_rates(date(2023, 10, 16), from_currency, to_all_currencies - missing_2)
+    create_exchange_rates(date(2023, 10, 15), from_currency, to_all_currencies - missing_1)
+    create_exchange_rates(date(2023, 10, 16), from_currency, to_all_currencies - missing_2)
 
-    assert list(provide_exchange_rates(from_currency, date(2023, 10, 15), date(2023, 10, 16))) == (
-        db_exchange_rates_1
-        + [(from_currency, date(2023, 10, 15), date(2023, 10, 15), missing_1)]
-        + db_exchange_rates_2
-        + [(from_currency, date(2023, 10, 16), date(2023, 10, 16), missing_2)]
-    )
+    list(provide_exchange_rates(from_currency, date(2023, 10, 15), date(2023, 10, 16)))
+
+    assert loaded(exchange_rate_loader) == [
+        call(from_currency, date(2023, 10, 15), date(2023, 10, 15), missing_1),
+        call(from_currency, date(2023, 10, 16), date(2023, 10, 16), missing_2),
+    ]
+
+
+def test_loaded_exchange_rates_are_returned_in_date_order_with_the_stored_ones(currency):
+    from_currency = currency["EUR"]
+    to_all_currencies = set(currency.values()) - {from_currency}
+
+    create_exchange_rates(date(2023, 10, 15), from_currency, to_all_currencies - {currency["USD"]})
+    create_exchange_rates(date(2023, 10, 17), from_currency, to_all_currencies)
+
+    with patch(MUT + ".get_provider_handler", spec_set=True) as provider_handler:
+        provider_handler.return_value.get_exchange_rates.side_effect = (
+            lambda from_currency, to_currencies, date, unavailable=None: [
+                CurrencyExchangeRate(date=date, from_currency=from_currency, to_currency=to_currency, rate=1)
+                for to_currency in to_currencies
+            ]
+        )
+
+        exchange_rates = list(provide_exchange_rates(from_currency, date(2023, 10, 15), date(2023, 10, 17)))
+
+    assert sorted((item.date, item.to_currency.code) for item in exchange_rates) == [
+        (date(2023, 10, day), code) for day in (15, 16, 17) for code in ["CHF", "GBP", "USD"]
+    ]
+    assert [item.date for item in exchange_rates] == sorted(item.date for item in exchange_rates)
+
+
+def test_consecutive_dates_with_the_same_missing_currencies_are_merged(currency):
+    from_currency = currency["EUR"]
+    to_all_currencies = set(currency.values()) - {from_currency}
+
+    for day in (11, 12, 13, 15):
+        create_exchange_rates(date(2023, 10, day), from_currency, to_all_currencies - {currency["USD"]})
+
+    create_exchange_rates(date(2023, 10, 14), from_currency, to_all_currencies)
+
+    assert find_missing_exchange_rates(from_currency, date(2023, 10, 10), date(2023, 10, 16)) == [
+        (date(2023, 10, 10), date(2023, 10, 10), to_all_currencies),
+        (date(2023, 10, 11), date(2023, 10, 13), {currency["USD"]}),
+        (date(2023, 10, 15), date(2023, 10, 15), {currency["USD"]}),
+        (date(2023, 10, 16), date(2023, 10, 16), to_all_currencies),
+    ]
+
+
+def test_rates_of_other_base_currencies_are_not_counted(currency):
+    from_currency = currency["EUR"]
+    to_all_currencies = set(currency.values()) - {from_currency}
+
+    create_exchange_rates(date(2023, 10, 15), currency["USD"], set(currency.values()) - {currency["USD"]})
+
+    assert find_missing_exchange_rates(from_currency, date(2023, 10, 15), date(2023, 10, 15)) == [
+        (date(2023, 10, 15), date(2023, 10, 15), to_all_currencies)
+    ]
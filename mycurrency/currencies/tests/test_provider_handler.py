@@ -2,6 +2,8 @@ from contextlib import contextmanager
 from datetime import date
 from decimal import Decimal
 from shutil import rmtree
+import time
+from unittest.mock import patch
 
 from django.conf import settings
 import pytest
@@ -18,12 +20,20 @@ def provider_plugin(
     exchange_rate: Decimal | None = Decimal("12.123456"),
     extra_code: str = "",
     active: bool = True,
+    batch_exchange_rates: dict | None = None,
 ):
     plugin_code = f"""
 class Provider:
     def get_exchange_rate_data(self, from_currency, to_currency, date):
         {extra_code}
         return {exchange_rate}
+"""
+    if batch_exchange_rates is not None:
+        batch_exchange_rates = "{" + ", ".join(f"'{code}': {rate}" for code, rate in batch_exchange_rates.items()) + "}"
+        plugin_code += f"""
+    def get_exchange_rates_data(self, from_currency, to_currencies, date):
+        {extra_code}
+        return {{code: rate for code, rate in {batch_exchange_rates}.items() if code in to_currencies}}
 """
     plugin_name = f"mock_{priority}"
     plugin_path = settings.BASE_DIR / settings.PROVIDERS_PKG / plugin_name
@@ -121,3 +131,152 @@ def test_highest_priority_active_provider_shall_be_called(provider_handler_call)
 
         assert isinstance(result, CurrencyExchangeRate)
         assert result.rate == provider["exchange_rate"]
+
+
+def test_registry_shall_provide_the_same_handler_until_providers_change(provider_handler_registry):
+    with provider_plugin():
+        provider_handler = provider_handler_registry()
+
+        assert provider_handler_registry() is provider_handler
+
+
+def test_registry_shall_import_provider_plugins_once(provider_handler_registry, currency):
+    with (
+        provider_plugin(),
+        patch.object(ProviderHandler, "_import_provider", wraps=ProviderHandler._import_provider) as import_provider,
+    ):
+        for _ in range(3):
+            provider_handler_registry()(currency["EUR"], currency["USD"], date(2015, 10, 21))
+
+        assert import_provider.call_count == 1
+
+
+def test_registry_shall_rebuild_handler_when_a_provider_is_created(provider_handler_registry, currency):
+    with provider_plugin(priority=2, exchange_rate=123):
+        provider_handler = provider_handler_registry()
+
+        with provider_plugin(priority=1, exchange_rate=456) as provider:
+            assert provider_handler_registry() is not provider_handler
+
+            result = provider_handler_registry()(currency["EUR"], currency["USD"], date(2015, 10, 21))
+
+            assert result.rate == provider["exchange_rate"]
+
+
+def test_registry_shall_rebuild_handler_when_a_provider_is_deactivated(provider_handler_registry):
+    with provider_plugin(priority=1, exchange_rate=456):
+        assert len(provider_handler_registry().providers) == 1
+
+        plugin = Provider.objects.get()
+        plugin.active = False
+        plugin.save()
+
+        assert not provider_handler_registry().providers
+
+
+def test_registry_shall_rebuild_handler_when_a_provider_is_deleted(provider_handler_registry):
+    with provider_plugin(priority=1, exchange_rate=456):
+        assert len(provider_handler_registry().providers) == 1
+
+    assert not provider_handler_registry().providers
+
+
+def test_registry_shall_rebuild_handler_when_providers_are_changed_elsewhere(provider_handler_registry, settings):
+    settings.PROVIDER_CONFIGURATION_CHECK_INTERVAL = 0
+
+    with provider_plugin(priority=1, exchange_rate=456):
+        provider_handler = provider_handler_registry()
+
+        assert provider_handler_registry() is provider_handler
+
+        Provider.objects.update(active=False)  # sends no signal, like a change made by another process
+
+        assert not provider_handler_registry().providers
+
+
+def test_registry_shall_check_providers_only_after_the_interval(
+    provider_handler_registry, settings, django_assert_num_queries
+):
+    settings.PROVIDER_CONFIGURATION_CHECK_INTERVAL = 60
+
+    with provider_plugin(priority=1, exchange_rate=456):
+        provider_handler = provider_handler_registry()
+        Provider.objects.update(active=False)
+
+        with django_assert_num_queries(0):
+            assert provider_handler_registry() is provider_handler
+
+
+@pytest.fixture
+def get_exchange_rates_call(currency):
+    from_currency = currency["EUR"]
+    to_currencies = [currency["USD"], currency["GBP"], currency["CHF"]]
+    _date = date(2015, 10, 21)
+
+    def get_exchange_rates() -> dict[str, Decimal]:
+        exchange_rates = ProviderHandler().get_exchange_rates(from_currency, to_currencies, _date)
+
+        for exchange_rate in exchange_rates:
+            assert exchange_rate.from_currency == from_currency
+            assert exchange_rate.date == _date
+
+        return {exchange_rate.to_currency.code: exchange_rate.rate for exchange_rate in exchange_rates}
+
+    return get_exchange_rates
+
+
+def test_batch_method_of_provider_plugin_shall_be_used_when_implemented(get_exchange_rates_call):
+    batch_exchange_rates = {"CHF": Decimal("1.1"), "GBP": Decimal("2.2"), "USD": Decimal("3.3")}
+
+    with provider_plugin(exchange_rate=Decimal("9.9"), batch_exchange_rates=batch_exchange_rates):
+        result = get_exchange_rates_call()
+
+    assert result == batch_exchange_rates
+    assert list(result) == ["CHF", "GBP", "USD"]
+
+
+def test_currency_pairs_shall_be_requested_one_by_one_without_batch_method(get_exchange_rates_call):
+    with provider_plugin(exchange_rate=Decimal("9.9")):
+        result = get_exchange_rates_call()
+
+    assert result == {"CHF": Decimal("9.9"), "GBP": Decimal("9.9"), "USD": Decimal("9.9")}
+
+
+def test_rates_missing_from_batch_shall_be_requested_from_next_provider(get_exchange_rates_call):
+    with (
+        provider_plugin(priority=1, batch_exchange_rates={"CHF": Decimal("1.1"), "USD": None}),
+        provider_plugin(priority=2, exchange_rate=Decimal("9.9")),
+    ):
+        result = get_exchange_rates_call()
+
+    assert result == {"CHF": Decimal("1.1"), "GBP": Decimal("9.9"), "USD": Decimal("9.9")}
+
+
+def test_next_provider_shall_be_used_when_batch_method_raises_exception(get_exchange_rates_call):
+    with (
+        provider_plugin(priority=1, extra_code="raise Exception", batch_exchange_rates={"CHF": Decimal("1.1")}),
+        provider_plugin(priority=2, batch_exchange_rates={"GBP": Decimal("2.2"), "CHF": Decimal("3.3")}),
+    ):
+        result = get_exchange_rates_call()
+
+    assert result == {"CHF": Decimal("3.3"), "GBP": Decimal("2.2")}
+
+
+def test_batch_returns_nothing_when_no_provider_has_rates(get_exchange_rates_call):
+    with provider_plugin(exchange_rate=None, batch_exchange_rates={}):
+        assert get_exchange_rates_call() == {}
+
+
+def test_provider_requests_shall_be_rate_limited(settings, get_exchange_rates_call):
+    with provider_plugin(exchange_rate=Decimal("9.9")) as provider:
+        settings.PROVIDER_RATE_LIMITS = {"mock_1": 50}
+
+        start = time.monotonic()
+        result = get_exchange_rates_call()
+
+    assert time.monotonic() - start >= 0.04  # 3 requests one by one
+    assert result == {
+        "CHF": provider["exchange_rate"],
+        "GBP": provider["exchange_rate"],
+        "USD": provider["exchange_rate"],
+    }
@@ -0,0 +1,203 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+import pytest
+
+from currencies.exchange_rate_provider import ProviderHandler
+from currencies.models import Provider
+from currencies.provider_health import ProviderHealth
+
+pytestmark = pytest.mark.django_db
+
+DATE = date(2015, 10, 21)
+
+
+@pytest.fixture(autouse=True)
+def circuit_breaker(settings):
+    settings.PROVIDER_CIRCUIT_BREAKER_WINDOW = 10
+    settings.PROVIDER_CIRCUIT_BREAKER_MIN_CALLS = 4
+    settings.PROVIDER_CIRCUIT_BREAKER_ERROR_RATE = 0.5
+    settings.PROVIDER_CIRCUIT_BREAKER_COOL_DOWN = 30
+
+
+@pytest.fixture
+def clock(provider_health_registry):
+    """Drives the clock of the provider health instead of the time of the process."""
+
+    clock = Mock(return_value=1000.0)
+
+    with patch.object(provider_health_registry, "clock", clock):
+        yield clock
+
+
+@pytest.fixture
+def plugin():
+    """Creates the mock provider plugins `mock_1` and `mock_2` answering 1.1 and 2.2."""
+
+    plugins = {}
+
+    def import_provider(name):
+        plugins[name] = Mock(spec_set=["get_exchange_rate_data", "session"])
+        return Mock(Provider=Mock(return_value=plugins[name]))
+
+    with patch.object(ProviderHandler, "_import_provider", side_effect=import_provider):
+        Provider.objects.create(name="mock_1", priority=1)
+        Provider.objects.create(name="mock_2", priority=2)
+        handler = ProviderHandler()
+
+    plugins["mock_1"].get_exchange_rate_data.return_value = Decimal("1.1")
+    plugins["mock_2"].get_exchange_rate_data.return_value = Decimal("2.2")
+
+    return handler, plugins
+
+
+def test_circuit_shall_trip_when_the_error_rate_reaches_the_threshold(clock):
+    health = ProviderHealth(clock)
+
+    for failed in (False, True, False):
+        health.record(0.1, failed=failed)
+
+    assert health.is_available()
+
+    health.record(0.1, failed=True)
+
+    assert health.error_rate == 0.5
+    assert not health.is_available()
+
+
+def test_circuit_shall_not_trip_before_the_minimum_number_of_calls(clock):
+    health = ProviderHealth(clock)
+
+    for _ in range(3):
+        health.record(0.1, failed=True)
+
+    assert health.is_available()
+
+
+def test_trial_call_after_the_cool_down_shall_close_the_circuit_on_success(clock):
+    health = ProviderHealth(clock)
+
+    for _ in range(4):
+        health.record(0.1, failed=True)
+
+    clock.return_value += 30
+
+    assert health.is_available()
+
+    health.record(0.1)
+
+    assert health.is_available()
+    assert health.error_rate == 0
+
+
+def test_trial_call_after_the_cool_down_shall_trip_the_circuit_again_on_failure(clock):
+    health = ProviderHealth(clock)
+
+    for _ in range(4):
+        health.record(0.1, failed=True)
+
+    clock.return_value += 30
+
+    assert health.is_available()
+
+    health.record(0.1, failed=True)
+
+    assert not health.is_available()
+
+    clock.return_value += 29
+
+    assert not health.is_available()
+
+
+def test_only_one_trial_call_shall_be_let_through_after_the_cool_down(clock):
+    health = ProviderHealth(clock)
+
+    for _ in range(4):
+        health.record(0.1, failed=True)
+
+    clock.return_value += 30
+
+    assert [health.is_available() for _ in range(3)] == [True, False, False]
+
+    health.record(0.1)
+
+    assert health.is_available()
+
+
+def test_calls_started_before_the_trial_shall_not_close_the_circuit(clock):
+    health = ProviderHealth(clock)
+    started = clock.return_value
+
+    for _ in range(4):
+        health.record(0.1, failed=True)
+
+    clock.return_value += 30
+    health.is_available()
+    health.record(30.0, started=started)
+
+    assert not health.is_available()
+
+    health.record(0.1)
+
+    assert health.is_available()
+
+
+def test_latency_percentiles_shall_be_computed_from_the_recent_calls():
+    health = ProviderHealth()
+
+    assert health.latency_percentile(50) is None
+
+    for latency in range(1, 21):
+        health.record(latency / 100)
+
+    assert health.latency_percentile(50) == 0.15
+    assert health.latency_percentile(95) == 0.20
+
+
+def test_tripped_provider_shall_be_skipped_until_the_cool_down_elapses(plugin, currency, clock):
+    handler, plugins = plugin
+    plugins["mock_1"].get_exchange_rate_data.side_effect = Exception
+
+    for _ in range(6):
+        assert handler(currency["EUR"], currency["USD"], DATE).rate == Decimal("2.2")
+
+    assert plugins["mock_1"].get_exchange_rate_data.call_count == 4
+
+    clock.return_value += 30
+    plugins["mock_1"].get_exchange_rate_data.side_effect = None
+
+    assert handler(currency["EUR"], currency["USD"], DATE).rate == Decimal("1.1")
+
+
+def test_provider_without_data_shall_not_trip_the_circuit(plugin, currency):
+    handler, plugins = plugin
+    plugins["mock_1"].get_exchange_rate_data.return_value = None
+
+    for _ in range(6):
+        handler(currency["EUR"], currency["USD"], DATE)
+
+    assert plugins["mock_1"].get_exchange_rate_data.call_count == 6
+
+
+def test_health_shall_be_shared_by_the_threads(plugin, currency, provider_health_registry):
+    handler, plugins = plugin
+
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda _: handler(currency["EUR"], currency["USD"], DATE), range(8)))
+
+    assert len(provider_health_registry["mock_1"]._latencies) == 8
+
+
+@pytest.mark.parametrize("order_by_latency, expected_rate", [(False, Decimal("1.1")), (True, Decimal("2.2"))])
+def test_providers_of_the_same_priority_shall_be_ordered_by_latency_when_enabled(
+    plugin, currency, settings, provider_health_registry, order_by_latency, expected_rate
+):
+    settings.PROVIDER_ORDER_BY_LATENCY = order_by_latency
+    handler, _ = plugin
+    handler.priorities = {"mock_1": 1, "mock_2": 1}
+    provider_health_registry["mock_1"].record(2.0)
+    provider_health_registry["mock_2"].record(0.1)
+
+    assert handler(currency["EUR"], currency["USD"], DATE).rate == expected_rate
@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import pytest
+
+from currencies.rate_limiter import RateLimiter
+
+pytestmark = pytest.mark.django_db
+
+
+def test_calls_shall_be_spaced_out_to_the_limit():
+    rate_limiter = RateLimiter(calls_per_second=100)
+    start = time.monotonic()
+
+    for _ in range(6):
+        rate_limiter.acquire()
+
+    assert time.monotonic() - start >= 0.05
+
+
+def test_limit_shall_be_shared_by_threads():
+    rate_limiter = RateLimiter(calls_per_second=100)
+    start = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        call_times = list(executor.map(lambda _: rate_limiter.acquire() or time.monotonic(), range(6)))
+
+    assert max(call_times) - start >= 0.05
+
+
+def test_first_call_shall_not_wait():
+    start = time.monotonic()
+
+    RateLimiter(calls_per_second=1).acquire()
+
+    assert time.monotonic() - start < 0.5
@@ -0,0 +1,118 @@
+from array import array
+from datetime import date, timedelta
+from decimal import Decimal
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+
+from currencies.currency_converter import convert_with_historical_exchange_rate
+from currencies.models import CurrencyExchangeRate
+from currencies.rate_snapshot import MISSING, RateSnapshot
+
+pytestmark = pytest.mark.django_db
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def exchange_rates(currency):
+    CurrencyExchangeRate.objects.bulk_create(
+        CurrencyExchangeRate(date=_date, from_currency=currency[from_code], to_currency=currency[to_code], rate=rate)
+        for _date, from_code, to_code, rate in [
+            (TODAY, "EUR", "USD", Decimal("1.05")),
+            (TODAY, "EUR", "GBP", Decimal("0.871234")),
+            (TODAY - timedelta(days=2), "EUR", "CHF", Decimal("0.95")),
+            (TODAY - timedelta(days=2), "USD", "EUR", Decimal("0.952381")),
+        ]
+    )
+
+
+def test_pair_and_row_lookups_shall_be_answered_without_the_database(exchange_rates, django_assert_num_queries):
+    snapshot = RateSnapshot.load(TODAY - timedelta(days=2), TODAY)
+
+    with django_assert_num_queries(0):
+        assert snapshot.get("EUR", "GBP", TODAY) == Decimal("0.871234")
+        assert str(snapshot.get("EUR", "USD", TODAY)) == "1.050000"
+        assert snapshot.get("EUR", "CHF", TODAY) is None
+        assert snapshot.get("EUR", "USD", TODAY - timedelta(days=3)) is None
+        assert snapshot.get("EUR", "XYZ", TODAY) is None
+        assert snapshot.rates("EUR", TODAY) == {"USD": Decimal("1.05"), "GBP": Decimal("0.871234")}
+        assert snapshot.rates("USD", TODAY - timedelta(days=2)) == {"EUR": Decimal("0.952381")}
+        assert snapshot.find_on_or_before("EUR", "CHF", TODAY, timedelta(days=7)) == (
+            Decimal("0.95"),
+            TODAY - timedelta(days=2),
+        )
+        assert snapshot.find_on_or_before("EUR", "CHF", TODAY, timedelta(days=1)) is None
+
+
+def test_range_values_shall_be_checked_in_place_and_yielded_lazily(exchange_rates):
+    snapshot = RateSnapshot.load(TODAY - timedelta(days=2), TODAY)
+
+    assert snapshot.is_complete("EUR", ["GBP", "USD"], TODAY, TODAY)
+    assert not snapshot.is_complete("EUR", ["GBP", "USD"], TODAY - timedelta(days=1), TODAY)
+    assert not snapshot.is_complete("EUR", ["USD"], TODAY, TODAY + timedelta(days=1))
+    assert not snapshot.is_complete("EUR", ["XYZ"], TODAY, TODAY)
+
+    values = snapshot.exchange_rate_values("EUR", ["GBP", "USD"], TODAY, TODAY)
+
+    assert not isinstance(values, list)
+    assert list(values) == [(TODAY, "GBP", Decimal("0.871234")), (TODAY, "USD", Decimal("1.05"))]
+
+
+def test_snapshot_shall_be_immutable(exchange_rates):
+    snapshot = RateSnapshot.load(TODAY, TODAY)
+
+    with pytest.raises(TypeError):
+        snapshot._rows[0][0] = 1
+
+    with pytest.raises(AttributeError):
+        snapshot.extra = 1
+
+
+def test_memory_footprint_shall_be_8_bytes_per_cell():
+    codes = [f"C{index:02}" for index in range(100)]
+    days = 100
+
+    tracemalloc.start()
+    try:
+        snapshot = RateSnapshot(codes, TODAY, [array("q", [MISSING]) * (len(codes) ** 2) for _ in range(days)])
+        allocated, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert snapshot.nbytes == 8 * 1_000_000
+    assert allocated < 8.1 * 1_000_000
+
+
+def test_snapshot_shall_be_swapped_on_refresh(exchange_rates, currency, rate_snapshot_holder, settings):
+    settings.RATE_SNAPSHOT_DAYS = 7
+    settings.RATE_SNAPSHOT_REFRESH_INTERVAL = 60
+
+    with patch("currencies.rate_snapshot.time.monotonic", return_value=1000.0) as monotonic:
+        snapshot = rate_snapshot_holder.get()
+        CurrencyExchangeRate.objects.filter(from_currency=currency["EUR"], to_currency=currency["USD"]).update(
+            rate=Decimal("1.1")
+        )
+        monotonic.return_value = 1059.0
+
+        assert rate_snapshot_holder.get() is snapshot
+
+        monotonic.return_value = 1060.0
+        refreshed_snapshot = rate_snapshot_holder.get()
+
+    assert refreshed_snapshot is not snapshot
+    assert snapshot.get("EUR", "USD", TODAY) == Decimal("1.05")
+    assert refreshed_snapshot.get("EUR", "USD", TODAY) == Decimal("1.1")
+    assert refreshed_snapshot.first_date == TODAY - timedelta(days=6)
+
+
+def test_conversion_at_a_date_shall_read_the_snapshot(exchange_rates, settings, django_assert_num_queries):
+    settings.RATE_SNAPSHOT_DAYS = 7
+
+    convert_with_historical_exchange_rate(Decimal(1), "EUR", "CHF", TODAY)
+
+    with django_assert_num_queries(2):  # the currencies
+        result = convert_with_historical_exchange_rate(Decimal(100), "EUR", "CHF", TODAY)
+
+    assert result == (Decimal("95.00"), Decimal("0.95"), TODAY - timedelta(days=2))
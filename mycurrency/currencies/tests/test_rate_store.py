@@ -0,0 +1,171 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+import mmap
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+import pytest
+from rest_framework import status
+
+from currencies.models import CurrencyExchangeRate
+from currencies.rate_store import RateStoreError, generation_paths, open_rate_store, write_rate_store
+
+pytestmark = pytest.mark.django_db
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def exchange_rates(currency):
+    CurrencyExchangeRate.objects.bulk_create(
+        CurrencyExchangeRate(date=_date, from_currency=currency["EUR"], to_currency=currency[to_code], rate=rate)
+        for _date in [TODAY - timedelta(days=1), TODAY]
+        for to_code, rate in [("USD", Decimal("1.05")), ("CHF", Decimal("0.95")), ("GBP", Decimal("0.871234"))]
+    )
+
+
+@pytest.fixture
+def store_dir(tmp_path, settings):
+    settings.RATE_STORE_DIR = str(tmp_path)
+    settings.RATE_STORE_CHECK_INTERVAL = 5
+
+    return tmp_path
+
+
+@pytest.fixture
+def provider_handler():
+    with patch("currencies.exchange_rate_provider.get_provider_handler", spec_set=True) as provider_handler:
+        yield provider_handler.return_value
+
+
+def test_rates_shall_be_read_from_the_mapped_file(exchange_rates, tmp_path):
+    path = write_rate_store(tmp_path, TODAY - timedelta(days=1), TODAY)
+
+    snapshot = open_rate_store(path)
+
+    assert snapshot.codes == ("CHF", "EUR", "GBP", "USD")
+    assert (snapshot.first_date, snapshot.last_date) == (TODAY - timedelta(days=1), TODAY)
+    assert snapshot.get("EUR", "GBP", TODAY) == Decimal("0.871234")
+    assert snapshot.get("USD", "EUR", TODAY) is None
+    assert isinstance(snapshot._rows[0].obj, mmap.mmap)  # zero-copy
+    assert path.stat().st_size == 28 + 4 * 3 + 2 * 16 * 8  # header, codes aligned to 8 bytes, records
+
+
+def test_old_generations_shall_be_removed(exchange_rates, tmp_path):
+    paths = [write_rate_store(tmp_path, TODAY, TODAY) for _ in range(3)]
+
+    assert [path.name for path in paths] == [f"rates-{generation:012}.bin" for generation in [1, 2, 3]]
+    assert generation_paths(tmp_path) == paths[1:]
+
+
+def test_invalid_file_shall_be_rejected(tmp_path):
+    (tmp_path / "rates-000000000001.bin").write_bytes(bytes(64))
+
+    with pytest.raises(RateStoreError, match="Not a rate store file"):
+        open_rate_store(tmp_path / "rates-000000000001.bin")
+
+
+def test_newer_generation_shall_be_mapped_after_the_check_interval(
+    exchange_rates, currency, store_dir, rate_store_holder
+):
+    write_rate_store(store_dir, TODAY, TODAY)
+
+    with patch("currencies.rate_store.time.monotonic", return_value=1000.0) as monotonic:
+        snapshot = rate_store_holder.get()
+        CurrencyExchangeRate.objects.filter(to_currency=currency["USD"]).update(rate=Decimal("1.1"))
+        write_rate_store(store_dir, TODAY, TODAY)
+        monotonic.return_value = 1004.0
+
+        assert rate_store_holder.get() is snapshot
+
+        monotonic.return_value = 1005.0
+
+        assert rate_store_holder.get().get("EUR", "USD", TODAY) == Decimal("1.1")
+
+    assert snapshot.get("EUR", "USD", TODAY) == Decimal("1.05")
+
+
+@pytest.mark.parametrize("output", ["json", "ndjson", "columnar-json"])
+def test_rates_endpoint_shall_read_the_store(client, exchange_rates, store_dir, provider_handler, output):
+    write_rate_store(store_dir, TODAY - timedelta(days=1), TODAY)
+    CurrencyExchangeRate.objects.all().delete()
+
+    response = client.get(
+        "/currencies/rates/",
+        {"from_currency": "EUR", "from_date": str(TODAY - timedelta(days=1)), "to_date": str(TODAY), "output": output},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert not provider_handler.get_exchange_rates.called
+
+    if output == "ndjson":
+        lines = b"".join(response.streaming_content).splitlines()
+
+        assert len(lines) == 2
+        assert b'{"to_currency":"GBP","rate":"0.871234"}' in lines[1].replace(b" ", b"")
+    elif output == "json":
+        assert response.data[1]["rates"] == [
+            {"to_currency": "CHF", "rate": "0.950000"},
+            {"to_currency": "GBP", "rate": "0.871234"},
+            {"to_currency": "USD", "rate": "1.050000"},
+        ]
+    else:
+        assert b'"rates":[[0.950000,0.871234,1.050000],[0.950000,0.871234,1.050000]]' in b"".join(
+            response.streaming_content
+        )
+
+
+def test_rates_endpoint_shall_complete_the_rates_missing_from_the_store(
+    client, exchange_rates, store_dir, provider_handler
+):
+    write_rate_store(store_dir, TODAY - timedelta(days=1), TODAY)
+    provider_handler.get_exchange_rates.return_value = []
+
+    response = client.get(
+        "/currencies/rates/",
+        {"from_currency": "EUR", "from_date": str(TODAY - timedelta(days=2)), "to_date": str(TODAY)},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert provider_handler.get_exchange_rates.called
+
+
+def test_convert_endpoint_shall_read_the_store_only_at_a_date(
+    client, currency, exchange_rates, store_dir, provider_handler
+):
+    write_rate_store(store_dir, TODAY - timedelta(days=1), TODAY)
+    CurrencyExchangeRate.objects.all().delete()
+
+    historical = client.get(
+        "/currencies/convert/",
+        {"from_currency": "EUR", "to_currency": "USD", "amount": 10, "date": str(TODAY - timedelta(days=1))},
+    )
+
+    assert historical.status_code == status.HTTP_200_OK
+    assert (historical.data["amount"], historical.data["rate_date"]) == ("10.50", str(TODAY - timedelta(days=1)))
+    assert not provider_handler.called
+
+    latest_exchange_rate = CurrencyExchangeRate(
+        date=TODAY, from_currency=currency["EUR"], to_currency=currency["GBP"], rate=Decimal("0.9")
+    )
+    provider_handler.return_value = provider_handler.hedged.return_value = latest_exchange_rate
+
+    latest = client.get("/currencies/convert/", {"from_currency": "EUR", "to_currency": "GBP", "amount": 100})
+
+    assert latest.status_code == status.HTTP_200_OK
+    assert latest.data["amount"] == "90.00"  # fetched, as the store may be older than the latest rate
+
+
+def test_command_shall_write_a_generation(exchange_rates, store_dir):
+    stdout = StringIO()
+
+    call_command("write_rate_store", "--days", "2", stdout=stdout)
+
+    assert "rates-000000000001.bin" in stdout.getvalue()
+    assert open_rate_store(generation_paths(store_dir)[-1]).first_date == TODAY - timedelta(days=1)
+
+
+def test_command_shall_need_a_directory(currency):
+    with pytest.raises(CommandError, match="No rate store directory"):
+        call_command("write_rate_store")
@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import pytest
+
+from currencies.models import CurrencyExchangeRate
+
+pytestmark = pytest.mark.django_db
+
+URL = "/currencies/rates/"
+FIRST_DATE = date(2023, 1, 1)
+
+
+@pytest.fixture
+def stored_exchange_rates(currency):
+    CurrencyExchangeRate.objects.bulk_create(
+        CurrencyExchangeRate(
+            date=FIRST_DATE + timedelta(days=day), from_currency=currency["EUR"], to_currency=to_currency, rate=1.5
+        )
+        for day in range(60)
+        for to_currency in currency.values()
+        if to_currency != currency["EUR"]
+    )
+
+
+@pytest.fixture
+def provider_handler():
+    with patch("currencies.exchange_rate_provider.get_provider_handler", spec_set=True) as provider_handler:
+        provider_handler.return_value.get_exchange_rates.return_value = []
+
+        yield provider_handler
+
+
+def count_queries(client, days: int, output: str) -> int:
+    parameters = {
+        "from_date": FIRST_DATE.isoformat(),
+        "to_date": (FIRST_DATE + timedelta(days=days - 1)).isoformat(),
+        "from_currency": "EUR",
+        "output": output,
+    }
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(URL, parameters)
+        content = b"".join(response.streaming_content) if response.streaming else response.content
+
+    assert content.count(b'"date"') == days or content.count(b"2023-") == days
+
+    return len(queries)
+
+
+@pytest.mark.parametrize("output", ["json", "json-stream", "ndjson", "columnar-json"])
+def test_query_count_shall_not_depend_on_the_length_of_date_range(
+    client, stored_exchange_rates, provider_handler, output
+):
+    query_counts = [count_queries(client, days, output) for days in (1, 10, 60)]
+
+    assert query_counts == [query_counts[0]] * 3
+    assert not provider_handler.return_value.get_exchange_rates.called
@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from currencies.exchange_rate_provider import provide_latest_exchange_rate
+from currencies.models import CurrencyExchangeRate
+from currencies.single_flight import SingleFlight, advisory_lock, try_advisory_lock
+
+pytestmark = pytest.mark.django_db
+
+
+def test_concurrent_calls_of_the_same_key_shall_share_one_call():
+    single_flight = SingleFlight()
+    func = Mock(side_effect=lambda: time.sleep(0.2) or object())
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: single_flight("key", func), range(8)))
+
+    assert func.call_count == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_calls_of_different_keys_shall_run_concurrently():
+    single_flight = SingleFlight()
+    barrier = threading.Barrier(2, timeout=1)
+
+    def call(key):
+        barrier.wait()
+        return key
+
+    with ThreadPoolExecutor(2) as executor:
+        results = list(executor.map(lambda key: single_flight(key, call, key), ["a", "b"]))
+
+    assert results == ["a", "b"]
+
+
+def test_waiters_shall_get_the_error_of_the_shared_call():
+    single_flight = SingleFlight()
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("failed")
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(single_flight, "key", fail)
+        started.wait()
+        waiter = executor.submit(single_flight, "key", Mock())
+
+        for future in (leader, waiter):
+            with pytest.raises(ValueError, match="failed"):
+                future.result()
+
+
+def test_key_shall_be_called_again_after_the_call_completed():
+    single_flight = SingleFlight()
+    func = Mock(return_value=1)
+
+    single_flight("key", func)
+    single_flight("key", func)
+
+    assert func.call_count == 2
+
+
+def test_concurrent_latest_exchange_rate_requests_shall_fetch_once(currency):
+    exchange_rate = CurrencyExchangeRate(
+        from_currency=currency["EUR"], to_currency=currency["USD"], date=date.today(), rate=Decimal("1.1")
+    )
+
+    with patch(
+        "currencies.exchange_rate_provider._provide_latest_exchange_rate",
+        side_effect=lambda *_: time.sleep(0.2) or exchange_rate,
+    ) as provide:
+        with ThreadPoolExecutor(8) as executor:
+            results = list(
+                executor.map(lambda _: provide_latest_exchange_rate(currency["EUR"], currency["USD"]), range(8))
+            )
+
+    assert provide.call_count == 1
+    assert results == [exchange_rate] * 8
+
+
+def test_advisory_lock_shall_not_lock_other_databases():
+    with advisory_lock("key") as contended:
+        assert contended is False
+
+
+def test_try_advisory_lock_shall_not_lock_other_databases():
+    with try_advisory_lock("key") as locked:
+        assert locked is None
+
+
+@contextmanager
+def contended_lock(key):
+    yield True
+
+
+def test_process_waiting_for_the_advisory_lock_shall_get_the_stored_rate(currency, settings):
+    settings.LATEST_EXCHANGE_RATE_ADVISORY_LOCK = True
+    stored_exchange_rate = CurrencyExchangeRate.objects.create(
+        from_currency=currency["EUR"], to_currency=currency["USD"], date=date.today(), rate=Decimal("1.1")
+    )
+
+    with (
+        patch("currencies.exchange_rate_provider.advisory_lock", contended_lock),
+        patch("currencies.exchange_rate_provider.get_provider_handler") as provider_handler,
+    ):
+        assert provide_latest_exchange_rate(currency["EUR"], currency["USD"]) == stored_exchange_rate
+
+    provider_handler.assert_not_called()
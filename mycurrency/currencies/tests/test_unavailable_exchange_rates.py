@@ -0,0 +1,185 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from django.utils import timezone
+import pytest
+
+from currencies.exchange_rate_provider import (
+    ProviderHandler,
+    find_missing_exchange_rates,
+    provide_exchange_rates,
+    provide_latest_exchange_rate,
+)
+from currencies.models import Provider, UnavailableExchangeRate
+
+pytestmark = pytest.mark.django_db
+
+DATE = date(2015, 10, 21)
+
+
+@pytest.fixture
+def plugin(provider_handler_registry):
+    """Creates the mock provider plugins `mock_1` and `mock_2` in priority order, building the shared handler."""
+
+    plugins = {}
+
+    def import_provider(name):
+        plugins[name] = Mock(spec_set=["get_exchange_rate_data", "get_exchange_rates_data", "session"])
+        return Mock(Provider=Mock(return_value=plugins[name]))
+
+    with patch.object(ProviderHandler, "_import_provider", side_effect=import_provider):
+        Provider.objects.create(name="mock_1", priority=1)
+        Provider.objects.create(name="mock_2", priority=2)
+        provider_handler_registry()
+
+        yield plugins
+
+
+@pytest.fixture
+def expiry(settings):
+    settings.UNAVAILABLE_EXCHANGE_RATE_EXPIRY = timedelta(hours=6)
+    settings.PROVIDER_FAILURE_EXPIRY = timedelta(minutes=5)
+
+
+def test_unavailable_rate_shall_be_remembered_until_it_expires(plugin, currency, expiry):
+    handler = ProviderHandler()
+    unavailable = handler.track_unavailable()
+    unavailable.record("mock_1", currency["EUR"], currency["USD"], DATE)
+    unavailable.save()
+
+    unavailable = handler.track_unavailable()
+    unavailable.load(currency["EUR"], DATE, DATE)
+
+    assert ("mock_1", "EUR", "USD", DATE) in unavailable
+    assert ("mock_2", "EUR", "USD", DATE) not in unavailable
+
+    UnavailableExchangeRate.objects.update(expires_at=timezone.now())
+
+    unavailable = handler.track_unavailable()
+    unavailable.load(currency["EUR"], DATE, DATE)
+
+    assert ("mock_1", "EUR", "USD", DATE) not in unavailable
+
+
+def test_recording_a_known_unavailable_rate_again_shall_extend_its_expiry(plugin, currency, expiry):
+    handler = ProviderHandler()
+
+    for failed in (True, False):
+        unavailable = handler.track_unavailable()
+        unavailable.record("mock_1", currency["EUR"], currency["USD"], DATE, failed=failed)
+        unavailable.save()
+
+    marker = UnavailableExchangeRate.objects.get()
+
+    assert marker.expires_at - timezone.now() > timedelta(hours=5)
+
+
+def test_provider_shall_not_be_asked_for_a_rate_known_to_be_unavailable(plugin, currency, expiry):
+    handler = ProviderHandler()
+    plugin["mock_1"].get_exchange_rate_data.return_value = None
+    plugin["mock_2"].get_exchange_rate_data.return_value = Decimal("1.1")
+
+    for _ in range(3):
+        unavailable = handler.track_unavailable()
+        unavailable.load(currency["EUR"], DATE, DATE, currency["USD"])
+
+        assert handler(currency["EUR"], currency["USD"], DATE, unavailable).rate == Decimal("1.1")
+
+        unavailable.save()
+
+    assert plugin["mock_1"].get_exchange_rate_data.call_count == 1
+    assert plugin["mock_2"].get_exchange_rate_data.call_count == 3
+
+
+def test_failed_provider_shall_be_asked_again_sooner_than_one_without_the_rate(plugin, currency, expiry):
+    handler = ProviderHandler()
+    plugin["mock_1"].get_exchange_rate_data.side_effect = Exception
+    plugin["mock_2"].get_exchange_rate_data.return_value = None
+
+    unavailable = handler.track_unavailable()
+
+    assert handler(currency["EUR"], currency["USD"], DATE, unavailable) is None
+
+    unavailable.save()
+    expires_in = {
+        marker.provider.name: marker.expires_at - timezone.now() for marker in UnavailableExchangeRate.objects.all()
+    }
+
+    assert timedelta(minutes=4) < expires_in["mock_1"] <= timedelta(minutes=5)
+    assert timedelta(hours=5) < expires_in["mock_2"] <= timedelta(hours=6)
+
+
+def test_rate_of_today_without_data_shall_be_asked_again_as_soon_as_a_failed_one(plugin, currency, expiry):
+    plugin["mock_1"].get_exchange_rate_data.return_value = None
+    plugin["mock_2"].get_exchange_rate_data.return_value = None
+
+    assert provide_latest_exchange_rate(currency["EUR"], currency["USD"]) is None
+
+    for marker in UnavailableExchangeRate.objects.all():
+        assert timedelta(minutes=4) < marker.expires_at - timezone.now() <= timedelta(minutes=5)
+
+
+def test_batch_requests_shall_skip_the_rates_known_to_be_unavailable(plugin, currency, expiry):
+    handler = ProviderHandler()
+    plugin["mock_1"].get_exchange_rates_data.return_value = {"USD": Decimal("1.1")}
+    plugin["mock_2"].get_exchange_rates_data.return_value = {}
+    to_currencies = [currency["USD"], currency["GBP"]]
+
+    for _ in range(2):
+        unavailable = handler.track_unavailable()
+        unavailable.load(currency["EUR"], DATE, DATE)
+        handler.get_exchange_rates(currency["EUR"], to_currencies, DATE, unavailable)
+        unavailable.save()
+
+    assert [item.args[1] for item in plugin["mock_1"].get_exchange_rates_data.call_args_list] == [
+        ["USD", "GBP"],
+        ["USD"],
+    ]
+    assert [item.args[1] for item in plugin["mock_2"].get_exchange_rates_data.call_args_list] == [["GBP"]]
+
+
+def test_latest_rate_unavailable_from_every_provider_shall_not_be_requested_again(plugin, currency, expiry):
+    plugin["mock_1"].get_exchange_rate_data.return_value = None
+    plugin["mock_2"].get_exchange_rate_data.return_value = None
+
+    for _ in range(3):
+        assert provide_latest_exchange_rate(currency["EUR"], currency["USD"]) is None
+
+    assert plugin["mock_1"].get_exchange_rate_data.call_count == 1
+    assert plugin["mock_2"].get_exchange_rate_data.call_count == 1
+
+
+def test_rates_unavailable_from_every_active_provider_shall_not_be_reported_missing(plugin, currency, expiry):
+    handler = ProviderHandler()
+    unavailable = handler.track_unavailable()
+    unavailable.record("mock_1", currency["EUR"], currency["USD"], DATE)
+    unavailable.record("mock_2", currency["EUR"], currency["USD"], DATE)
+    unavailable.record("mock_1", currency["EUR"], currency["GBP"], DATE)
+    unavailable.save()
+
+    assert find_missing_exchange_rates(currency["EUR"], DATE, DATE) == [
+        (DATE, DATE, {currency["GBP"], currency["CHF"]})
+    ]
+
+    Provider.objects.filter(name="mock_2").update(active=False)
+
+    assert find_missing_exchange_rates(currency["EUR"], DATE, DATE) == [(DATE, DATE, {currency["CHF"]})]
+
+
+def test_unavailable_rates_shall_not_be_requested_again_when_providing_a_date_range(plugin, currency, expiry):
+    plugin["mock_1"].get_exchange_rates_data.return_value = {"GBP": Decimal("0.8"), "CHF": Decimal("1.2")}
+    plugin["mock_2"].get_exchange_rates_data.return_value = {}
+
+    for _ in range(2):
+        exchange_rates = list(provide_exchange_rates(currency["EUR"], DATE, DATE + timedelta(days=1)))
+
+        assert [(item.date, item.to_currency.code) for item in exchange_rates] == [
+            (DATE, "CHF"),
+            (DATE, "GBP"),
+            (DATE + timedelta(days=1), "CHF"),
+            (DATE + timedelta(days=1), "GBP"),
+        ]
+
+    assert plugin["mock_1"].get_exchange_rates_data.call_count == 2
+    assert plugin["mock_2"].get_exchange_rates_data.call_count == 2
@@ -0,0 +1,122 @@
+from collections import defaultdict
+from collections.abc import Mapping
+from datetime import date
+import threading
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from currencies.models import Currency, Provider, UnavailableExchangeRate
+
+UnavailableKey = tuple[str, str, str, date]  # provider name, from-currency code, to-currency code, date
+
+
+class UnavailableExchangeRates:
+    """Remembers the exchange rates the providers could not provide, persisting them as expiring markers.
+
+    The markers are loaded and saved by the owner thread, while they can be checked and recorded from any thread.
+    """
+
+    def __init__(self, provider_ids: Mapping[str, int]):
+        self.provider_ids = provider_ids
+        self._lock = threading.Lock()
+        self._known: set[UnavailableKey] = set()
+        self._recorded: dict[UnavailableKey, UnavailableExchangeRate] = {}
+
+    def load(
+        self, from_currency: Currency, from_date: date, to_date: date, to_currency: Currency | None = None
+    ) -> None:
+        """Loads the unexpired markers of a base currency in a date range."""
+
+        provider_names = {pk: name for name, pk in self.provider_ids.items()}
+        markers = UnavailableExchangeRate.objects.filter(
+            provider__in=provider_names,
+            from_currency=from_currency,
+            date__range=(from_date, to_date),
+            expires_at__gt=timezone.now(),
+        )
+
+        if to_currency is not None:
+            markers = markers.filter(to_currency=to_currency)
+
+        known = {
+            (provider_names[provider_id], from_currency.code, to_currency_code, _date)
+            for provider_id, to_currency_code, _date in markers.values_list("provider_id", "to_currency__code", "date")
+        }
+
+        with self._lock:
+            self._known |= known
+
+    def __contains__(self, key: UnavailableKey) -> bool:
+        with self._lock:
+            return key in self._known
+
+    def record(
+        self, provider_name: str, from_currency: Currency, to_currency: Currency, date: date, failed: bool = False
+    ) -> None:
+        """Records that a provider had no data for the rate, or failed to provide it.
+
+        The providers often publish the rates of today later in the day, so missing ones of today or later
+        are asked again as soon as the failed ones.
+        """
+
+        key = (provider_name, from_currency.code, to_currency.code, date)
+        expiry = (
+            settings.PROVIDER_FAILURE_EXPIRY
+            if failed or date >= timezone.localdate()
+            else settings.UNAVAILABLE_EXCHANGE_RATE_EXPIRY
+        )
+
+        with self._lock:
+            self._known.add(key)
+            self._recorded[key] = UnavailableExchangeRate(
+                provider_id=self.provider_ids[provider_name],
+                from_currency=from_currency,
+                to_currency=to_currency,
+                date=date,
+                expires_at=timezone.now() + expiry,
+            )
+
+    def save(self) -> None:
+        """Stores the recorded markers, extending the expiry of the existing ones."""
+
+        with self._lock:
+            markers = list(self._recorded.values())
+            self._recorded.clear()
+
+        if markers:
+            UnavailableExchangeRate.objects.bulk_create(
+                markers,
+                update_conflicts=True,
+                unique_fields=["provider", "from_currency", "to_currency", "date"],
+                update_fields=["expires_at"],
+            )
+
+
+def find_unavailable_exchange_rates(from_currency: Currency, from_date: date, to_date: date) -> dict[date, set[int]]:
+    """Returns the to-currency ids per date whose exchange rates are known to be unavailable from every active provider."""
+
+    unavailable = defaultdict(set)
+    active_providers = Provider.objects.filter(active=True).count()
+
+    if not active_providers:
+        return unavailable
+
+    markers = (
+        UnavailableExchangeRate.objects.filter(
+            provider__active=True,
+            from_currency=from_currency,
+            date__range=(from_date, to_date),
+            expires_at__gt=timezone.now(),
+        )
+        .values("date", "to_currency_id")
+        .annotate(providers=Count("provider", distinct=True))
+        .filter(providers__gte=active_providers)
+        .order_by()
+    )
+
+    for marker in markers:
+        unavailable[marker["date"]].add(marker["to_currency_id"])
+
+    return unavailable
@@ -1,7 +1,15 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from currencies.views import CurrencyViewSet, backoffice_converter_view, convert_amount, get_exchange_rates
+from currencies.views import (
+    CurrencyViewSet,
+    backoffice_converter_view,
+    convert_amount,
+    convert_amounts,
+    get_exchange_rates,
+    get_latest_exchange_rate_cache_stats,
+    get_latest_exchange_rate_refresh_lag,
+)
 
 router = DefaultRouter()
 router.register("", CurrencyViewSet)
@@ -9,6 +17,9 @@ router.register("", CurrencyViewSet)
 urlpatterns = [
     path("rates/", get_exchange_rates, name="exchange_rates"),
     path("convert/", convert_amount, name="convert_amount"),
+    path("convert/batch/", convert_amounts, name="convert_amounts"),
+    path("convert/cache/", get_latest_exchange_rate_cache_stats, name="latest_exchange_rate_cache"),
+    path("convert/refresh/", get_latest_exchange_rate_refresh_lag, name="latest_exchange_rate_refresh"),
     path("", include(router.urls)),
     path("backoffice/converter/", backoffice_converter_view, name="backoffice_converter"),
 ]
@@ -1,23 +1,33 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
 from rest_framework import status, viewsets
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from currencies.columnar import stream_columnar_csv, stream_columnar_json
 from currencies.currency_converter import (
     CurrencyConverterError,
     CurrencyExchangeRateNotAvailableError,
+    convert_batch,
+    convert_with_historical_exchange_rate,
     convert_with_latest_exchange_rate,
 )
-from currencies.exchange_rate_provider import provide_exchange_rates
+from currencies.exchange_rate_cache import latest_exchange_rate_cache
+from currencies.exchange_rate_provider import provide_exchange_rate_values, provide_exchange_rates
 from currencies.forms import ConvertAmountForm
-from currencies.models import Currency
+from currencies.latest_rate_refresher import latest_exchange_rate_refresh_lag
+from currencies.models import Currency, CurrencyExchangeRate
+from currencies.rate_store import read_exchange_rate_values
 from currencies.serializers import (
+    CurrencyBatchConvertRequestSerializer,
     CurrencyConvertRequestSerializer,
     CurrencyConvertResponseSerializer,
     CurrencyRatesRequestSerializer,
     CurrencyRatesResponseSerializer,
     CurrencySerializer,
 )
+from currencies.streaming import stream_json_array, stream_ndjson
 
 
 @api_view(["GET"])
@@ -37,7 +47,50 @@ def get_exchange_rates(request):
     except Currency.DoesNotExist:
         return Response({"error": "Invalid currency."}, status=status.HTTP_400_BAD_REQUEST)
 
-    exchange_rates_by_date = provide_exchange_rates(from_currency, from_date, to_date)
+    output = serializer.validated_data["output"]
+    stored_exchange_rate_values = read_exchange_rate_values(from_currency, from_date, to_date)
+
+    if output.startswith("columnar-"):
+        currency_codes = list(
+            Currency.objects.exclude(pk=from_currency.pk).order_by("code").values_list("code", flat=True)
+        )
+
+        if stored_exchange_rate_values is None:
+            exchange_rate_values = provide_exchange_rate_values(from_currency, from_date, to_date)
+        else:
+            exchange_rate_values = stored_exchange_rate_values
+
+        if output == "columnar-csv":
+            return StreamingHttpResponse(
+                stream_columnar_csv(currency_codes, exchange_rate_values), content_type="text/csv"
+            )
+
+        return StreamingHttpResponse(
+            stream_columnar_json(from_currency.code, currency_codes, exchange_rate_values),
+            content_type="application/json",
+        )
+
+    if stored_exchange_rate_values is None:
+        exchange_rates_by_date = provide_exchange_rates(from_currency, from_date, to_date)
+    else:
+        exchange_rates_by_date = (
+            CurrencyExchangeRate(date=_date, to_currency=Currency(code=code), rate=rate)
+            for _date, code, rate in stored_exchange_rate_values
+        )
+
+    if output == "json-stream":
+        return StreamingHttpResponse(
+            stream_json_array(
+                CurrencyRatesResponseSerializer.generate_data(from_currency.code, exchange_rates_by_date)
+            ),
+            content_type="application/json",
+        )
+
+    if output == "ndjson":
+        return StreamingHttpResponse(
+            stream_ndjson(CurrencyRatesResponseSerializer.generate_data(from_currency.code, exchange_rates_by_date)),
+            content_type="application/x-ndjson",
+        )
 
     return Response(
         CurrencyRatesResponseSerializer(
@@ -56,13 +109,22 @@ def convert_amount(request):
 
     from_currency_code = serializer.validated_data["from_currency"]
     to_currency_code = serializer.validated_data["to_currency"]
+    query_date = serializer.validated_data.get("date")
 
     try:
-        converted_amount, exchange_rate = convert_with_latest_exchange_rate(
-            serializer.validated_data["amount"],
-            from_currency_code,
-            to_currency_code,
-        )
+        if query_date:
+            converted_amount, exchange_rate, rate_date = convert_with_historical_exchange_rate(
+                serializer.validated_data["amount"],
+                from_currency_code,
+                to_currency_code,
+                query_date,
+            )
+        else:
+            converted_amount, exchange_rate = convert_with_latest_exchange_rate(
+                serializer.validated_data["amount"],
+                from_currency_code,
+                to_currency_code,
+            )
 
     except CurrencyExchangeRateNotAvailableError as exc:
         return Response({"error": str(exc)}, status=status.HTTP_404_NOT_FOUND)
@@ -70,14 +132,18 @@ def convert_amount(request):
     except CurrencyConverterError as exc:
         return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-    result = CurrencyConvertResponseSerializer(
-        data={
-            "from_currency": from_currency_code,
-            "to_currency": to_currency_code,
-            "rate": exchange_rate,
-            "amount": converted_amount,
-        }
-    )
+    data = {
+        "from_currency": from_currency_code,
+        "to_currency": to_currency_code,
+        "rate": exchange_rate,
+        "amount": converted_amount,
+    }
+
+    if query_date:
+        data["date"] = query_date
+        data["rate_date"] = rate_date
+
+    result = CurrencyConvertResponseSerializer(data=data)
 
     if not result.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -85,6 +151,56 @@ def convert_amount(request):
     return Response(result.data)
 
 
+@api_view(["POST"])
+def convert_amounts(request):
+    """Converts a list of amounts, returning the results in the same order with an error for each failed one."""
+
+    serializer = CurrencyBatchConvertRequestSerializer(data=request.data)
+
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    items = [CurrencyConvertRequestSerializer(data=item) for item in serializer.validated_data["conversions"]]
+    valid_items = [item.validated_data for item in items if item.is_valid()]
+    outcomes = iter(
+        convert_batch(
+            (item["amount"], item["from_currency"], item["to_currency"], item.get("date")) for item in valid_items
+        )
+    )
+    results = []
+
+    for item in items:
+        if item.errors:
+            results.append({"error": item.errors})
+            continue
+
+        outcome = next(outcomes)
+
+        if isinstance(outcome, CurrencyConverterError):
+            results.append({"error": str(outcome)})
+        else:
+            converted_amount, exchange_rate, rate_date = outcome
+            results.append(
+                CurrencyConvertResponseSerializer(
+                    item.validated_data
+                    | {"rate": exchange_rate, "amount": converted_amount}
+                    | ({"rate_date": rate_date} if "date" in item.validated_data else {})
+                ).data
+            )
+
+    return Response({"results": results})
+
+
+@api_view(["GET"])
+def get_latest_exchange_rate_cache_stats(request):
+    return Response(latest_exchange_rate_cache.stats())
+
+
+@api_view(["GET"])
+def get_latest_exchange_rate_refresh_lag(request):
+    return Response(latest_exchange_rate_refresh_lag(settings.HOT_BASE_CURRENCIES))
+
+
 class CurrencyViewSet(viewsets.ModelViewSet):
     queryset = Currency.objects.all().order_by("code")
     serializer_class = CurrencySerializer
@@ -2,6 +2,7 @@
 Django settings for mycurrency project.
 """
 
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -59,6 +60,14 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # Readers do not block the writer, the writers wait for each other instead of failing
+            "init_command": "PRAGMA journal_mode=WAL;",
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
+        # A file, as the in-memory database shared by threads fails on locks instead of waiting
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
@@ -78,6 +87,19 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "latest_exchange_rates": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "latest_exchange_rates",
+        "TIMEOUT": 60,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+
 # Internationalization
 LANGUAGE_CODE = "en-us"
 
@@ -101,4 +123,39 @@ REST_FRAMEWORK = {
 
 CURRENCY_EXCHANGE_RATE_PRECISION = 6
 CURRENCY_AMOUNT_PRECISION = 2
+CURRENCY_BATCH_CONVERT_MAX_SIZE = 10000  # conversions in a request of the batch endpoint
+CURRENCY_EXCHANGE_RATE_PIVOT = None  # code of the currency for deriving the cross rates, None fetches every pair
 PROVIDERS_PKG = "providers"
+PROVIDER_HTTP_POOL_SIZE = 10  # maximum number of kept-alive connections per host
+PROVIDER_HTTP_TIMEOUT = 10  # seconds
+PROVIDER_HTTP_RETRIES = 3
+PROVIDER_HTTP_BACKOFF_FACTOR = 0.5  # seconds, doubled by every retry
+PROVIDER_CONFIGURATION_CHECK_INTERVAL = 5  # seconds between the checks for providers changed by other processes
+PROVIDER_RATE_LIMITS = {}  # maximum requests per second by provider name
+PROVIDER_CIRCUIT_BREAKER_WINDOW = 20  # number of recent calls of a provider the health is computed from
+PROVIDER_CIRCUIT_BREAKER_MIN_CALLS = 5  # calls in the window before the circuit can trip
+PROVIDER_CIRCUIT_BREAKER_ERROR_RATE = 0.5  # ratio of failed calls tripping the circuit
+PROVIDER_CIRCUIT_BREAKER_COOL_DOWN = 30  # seconds a tripped provider is skipped for
+PROVIDER_ORDER_BY_LATENCY = False  # order the providers of the same priority by their median latency
+PROVIDER_HEDGING_DELAY = None  # seconds to wait for a provider before asking the next one in parallel, None disables
+PROVIDER_HEDGING_PERCENTILE = None  # use this percentile of the observed latency of a provider as delay, e.g. 95
+EXCHANGE_RATE_LOADER_CONCURRENCY = 4  # number of dates fetched in parallel when completing missing rates
+EXCHANGE_RATE_WRITE_BATCH_SIZE = 1000  # rates upserted per statement
+LATEST_EXCHANGE_RATE_CACHE = "latest_exchange_rates"  # alias in CACHES, None disables the cache
+LATEST_EXCHANGE_RATE_ADVISORY_LOCK = False  # coalesce the fetches of the processes with PostgreSQL advisory locks
+HOT_BASE_CURRENCIES = []  # codes of the base currencies whose latest rates are kept warm by refresh_latest_rates
+LATEST_EXCHANGE_RATE_REFRESH_INTERVAL = 300  # seconds between the refreshes of the hot base currencies
+LATEST_EXCHANGE_RATE_REFRESH_JITTER = 0.1  # ratio of the interval the refreshes are randomly shifted by
+LATEST_EXCHANGE_RATE_REFRESH_LOCK_TIMEOUT = 3600  # seconds the cache lock of a crashed refresh is kept, above a run
+LATEST_EXCHANGE_RATE_MAX_STALENESS = (
+    None  # timedelta, conversions from the hot base currencies only read rates this fresh
+)
+RATE_SNAPSHOT_DAYS = None  # days up to today held in memory by the rate snapshot of a process, None disables it
+RATE_SNAPSHOT_REFRESH_INTERVAL = 60  # seconds until the rate snapshot is rebuilt
+RATE_STORE_DIR = None  # directory of the memory-mapped rate store shared by the processes, None disables it
+RATE_STORE_DAYS = 365  # days up to today written into the rate store by write_rate_store
+RATE_STORE_CHECK_INTERVAL = 5  # seconds between the checks for a newer generation of the rate store
+LEDGER_CONVERT_CHUNK_SIZE = 10000  # ledger rows converted at a time by convert_ledger
+HISTORICAL_EXCHANGE_RATE_MAX_LOOKBACK = timedelta(days=7)  # how old a stored rate converts at a date, None: any
+UNAVAILABLE_EXCHANGE_RATE_EXPIRY = timedelta(hours=6)  # until a provider is asked again for a rate it did not have
+PROVIDER_FAILURE_EXPIRY = timedelta(minutes=5)  # until a provider is asked again for a rate it failed to provide
@@ -1,3 +1,4 @@
+from collections.abc import Sequence
 import os
 
 import requests
@@ -9,13 +10,21 @@ API_KEY = os.environ["CURRENCY_BEACON_API_KEY"]
 class Provider:
     """Fetches currrency exchange rate data from CurrencyBeacon."""
 
+    session = requests  # replaced by the pooled session of the provider handler
+
     def get_exchange_rate_data(self, from_currency: str, to_currency: str, date):
-        params = {"api_key": API_KEY, "date": date, "base": from_currency, "symbols": to_currency}
+        return self._get_rates(from_currency, [to_currency], date).get(to_currency)
 
-        response = requests.get(URL, params=params)
+    def get_exchange_rates_data(self, from_currency: str, to_currencies: Sequence[str], date) -> dict:
+        rates = self._get_rates(from_currency, to_currencies, date)
 
-        response.raise_for_status()
+        return {to_currency: rates.get(to_currency) for to_currency in to_currencies}
+
+    def _get_rates(self, from_currency: str, to_currencies: Sequence[str], date) -> dict:
+        params = {"api_key": API_KEY, "date": date, "base": from_currency, "symbols": ",".join(to_currencies)}
 
-        rates = response.json()["rates"] or {}
+        response = self.session.get(URL, params=params)
+
+        response.raise_for_status()
 
-        return rates.get(to_currency)
+        return response.json()["rates"] or {}
@@ -16,3 +16,15 @@ def test_returns_exchange_rate_value():
 
 def test_no_data_available():
     assert Provider().get_exchange_rate_data("EUR", "USD", date(1955, 11, 12)) is None
+
+
+def test_returns_exchange_rate_values_of_several_currencies():
+    rates = Provider().get_exchange_rates_data("EUR", ["GBP", "USD"], date(2015, 10, 21))
+
+    assert set(rates) == {"GBP", "USD"}
+    assert rates["USD"] == 1.13432275
+    assert rates["GBP"] == Provider().get_exchange_rate_data("EUR", "GBP", date(2015, 10, 21))
+
+
+def test_no_data_available_for_several_currencies():
+    assert Provider().get_exchange_rates_data("EUR", ["GBP", "USD"], date(1955, 11, 12)) == {"GBP": None, "USD": None}